@@ -0,0 +1,197 @@
+# ----------------------------------------------------------------------------
+# PyWavefront
+# Copyright (c) 2018 Kurt Yoder
+# All rights reserved.
+#
+# Redistribution and use in source and binary forms, with or without
+# modification, are permitted provided that the following conditions
+# are met:
+#
+#  * Redistributions of source code must retain the above copyright
+#    notice, this list of conditions and the following disclaimer.
+#  * Redistributions in binary form must reproduce the above copyright
+#    notice, this list of conditions and the following disclaimer in
+#    the documentation and/or other materials provided with the
+#    distribution.
+#  * Neither the name of PyWavefront nor the names of its
+#    contributors may be used to endorse or promote products
+#    derived from this software without specific prior written
+#    permission.
+#
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS
+# "AS IS" AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT
+# LIMITED TO, THE IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS
+# FOR A PARTICULAR PURPOSE ARE DISCLAIMED. IN NO EVENT SHALL THE
+# COPYRIGHT OWNER OR CONTRIBUTORS BE LIABLE FOR ANY DIRECT, INDIRECT,
+# INCIDENTAL, SPECIAL, EXEMPLARY, OR CONSEQUENTIAL DAMAGES (INCLUDING,
+# BUT NOT LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS OR SERVICES;
+# LOSS OF USE, DATA, OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER
+# CAUSED AND ON ANY THEORY OF LIABILITY, WHETHER IN CONTRACT, STRICT
+# LIABILITY, OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN
+# ANY WAY OUT OF THE USE OF THIS SOFTWARE, EVEN IF ADVISED OF THE
+# POSSIBILITY OF SUCH DAMAGE.
+# ----------------------------------------------------------------------------
+"""
+Synthetic obj and mtl files for benchmarking.
+
+Every object is a strip of vertices where each face references consecutive
+vertices, so faces have a realistic index locality. The random generator is
+seeded making corpora with the same spec identical.
+"""
+from collections import namedtuple
+import gzip
+import os
+import random
+
+CorpusSpec = namedtuple('CorpusSpec', [
+    'vertices',     # Total number of positions
+    'faces',        # Total number of faces. None creates twice as many faces as vertices
+    'objects',      # Number of ``o`` blocks
+    'materials',    # Number of materials in the mtl file
+    'quad_ratio',   # Fraction of faces with four vertices
+    'ngon_ratio',   # Fraction of faces with five to eight vertices
+    'colors',       # Add vertex colors to the positions
+    'normals',      # Add normals
+    'tex_coords',   # Add texture coordinates
+    'gzip',         # Write a gzipped obj file
+    'seed',
+    'material_run', # Faces between ``usemtl`` statements cycling through the materials of an object.
+                    # None switches material evenly within each object
+])
+CorpusSpec.__new__.__defaults__ = (100000, None, 1, 1, 0.0, 0.0, False, True, True, False, 0, None)
+
+# Number of lines joined before writing
+WRITE_BATCH = 10000
+
+
+def generate(directory, spec=CorpusSpec(), name="corpus"):
+    """
+    Write an obj file and its mtl file
+
+    :param directory: Directory to write the files to
+    :param spec: The ``CorpusSpec`` describing the files
+    :param name: Base name of the files
+    :return: Path to the obj file
+    """
+    if spec.quad_ratio + spec.ngon_ratio > 1.0:
+        raise ValueError("quad_ratio and ngon_ratio can not add up to more than 1")
+    if spec.objects < 1 or spec.materials < 1 or spec.vertices < spec.objects * 3:
+        raise ValueError("A corpus needs at least one object, one material and three vertices per object")
+
+    mtl_name = name + ".mtl"
+    write_mtl(os.path.join(directory, mtl_name), spec)
+
+    obj_name = os.path.join(directory, name + (".obj.gz" if spec.gzip else ".obj"))
+    if spec.gzip:
+        fd = gzip.open(obj_name, 'wt', encoding='utf-8')
+    else:
+        fd = open(obj_name, 'w', encoding='utf-8')
+
+    with fd:
+        write_lines(fd, obj_lines(spec, mtl_name))
+
+    return obj_name
+
+
+def write_mtl(file_name, spec):
+    """Write ``spec.materials`` materials with textures"""
+    rand = random.Random(spec.seed)
+    with open(file_name, 'w', encoding='utf-8') as fd:
+        for i in range(spec.materials):
+            fd.write("newmtl material{}\n".format(i))
+            fd.write("Ns {:.1f}\n".format(rand.uniform(0, 500)))
+            fd.write("Ka 0.1 0.1 0.1\n")
+            fd.write("Kd {:.6f} {:.6f} {:.6f}\n".format(rand.random(), rand.random(), rand.random()))
+            fd.write("Ks 0.5 0.5 0.5\n")
+            fd.write("d 1.0\n")
+            fd.write("illum 2\n")
+            fd.write("map_Kd -s 1 1 1 textures/material{}.png\n\n".format(i))
+
+
+def write_lines(fd, lines):
+    """Write lines in batches"""
+    batch = []
+    for line in lines:
+        batch.append(line)
+        if len(batch) == WRITE_BATCH:
+            fd.write("\n".join(batch) + "\n")
+            batch = []
+
+    if batch:
+        fd.write("\n".join(batch) + "\n")
+
+
+def obj_lines(spec, mtl_name):
+    """Generate the lines of the obj file"""
+    rand = random.Random(spec.seed)
+    total_faces = spec.faces if spec.faces is not None else spec.vertices * 2
+
+    yield "# Synthetic corpus: {}".format(dict(spec._asdict()))
+    yield "mtllib {}".format(mtl_name)
+
+    offset = 0
+    for obj in range(spec.objects):
+        vertices = share(spec.vertices, spec.objects, obj)
+        faces = share(total_faces, spec.objects, obj)
+
+        yield "o object{}".format(obj)
+
+        for _ in range(vertices):
+            if spec.colors:
+                yield "v {:.6f} {:.6f} {:.6f} {:.4f} {:.4f} {:.4f}".format(
+                    rand.uniform(-1, 1), rand.uniform(-1, 1), rand.uniform(-1, 1),
+                    rand.random(), rand.random(), rand.random())
+            else:
+                yield "v {:.6f} {:.6f} {:.6f}".format(rand.uniform(-1, 1), rand.uniform(-1, 1), rand.uniform(-1, 1))
+
+        if spec.tex_coords:
+            for _ in range(vertices):
+                yield "vt {:.6f} {:.6f}".format(rand.random(), rand.random())
+
+        if spec.normals:
+            for _ in range(vertices):
+                yield "vn {:.6f} {:.6f} {:.6f}".format(rand.uniform(-1, 1), rand.uniform(-1, 1), rand.uniform(-1, 1))
+
+        # Spread the materials over the objects and switch material evenly within each object
+        materials = [m for m in range(spec.materials) if m % spec.objects == obj % spec.objects] or [obj % spec.materials]
+        per_material = spec.material_run or max(1, -(-faces // len(materials)))
+
+        for face in range(faces):
+            if face % per_material == 0:
+                yield "usemtl material{}".format(materials[(face // per_material) % len(materials)])
+
+            yield face_line(spec, rand, offset, vertices, face)
+
+        offset += vertices
+
+
+def face_line(spec, rand, offset, vertices, face):
+    """An f statement with three to eight corners referencing consecutive vertices"""
+    roll = rand.random()
+    if roll < spec.ngon_ratio:
+        size = rand.randint(5, 8)
+    elif roll < spec.ngon_ratio + spec.quad_ratio:
+        size = 4
+    else:
+        size = 3
+
+    size = min(size, vertices)
+    start = face % vertices
+    corners = []
+    for corner in range(size):
+        index = offset + (start + corner) % vertices + 1
+        if spec.tex_coords and spec.normals:
+            corners.append("{0}/{0}/{0}".format(index))
+        elif spec.tex_coords:
+            corners.append("{0}/{0}".format(index))
+        elif spec.normals:
+            corners.append("{0}//{0}".format(index))
+        else:
+            corners.append(str(index))
+
+    return "f " + " ".join(corners)
+
+
+def share(total, parts, part):
+    """Split ``total`` into ``parts`` nearly equal integers"""
+    return total // parts + (part < total % parts)
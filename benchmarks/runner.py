@@ -0,0 +1,355 @@
+# ----------------------------------------------------------------------------
+# PyWavefront
+# Copyright (c) 2018 Kurt Yoder
+# All rights reserved.
+#
+# Redistribution and use in source and binary forms, with or without
+# modification, are permitted provided that the following conditions
+# are met:
+#
+#  * Redistributions of source code must retain the above copyright
+#    notice, this list of conditions and the following disclaimer.
+#  * Redistributions in binary form must reproduce the above copyright
+#    notice, this list of conditions and the following disclaimer in
+#    the documentation and/or other materials provided with the
+#    distribution.
+#  * Neither the name of PyWavefront nor the names of its
+#    contributors may be used to endorse or promote products
+#    derived from this software without specific prior written
+#    permission.
+#
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS
+# "AS IS" AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT
+# LIMITED TO, THE IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS
+# FOR A PARTICULAR PURPOSE ARE DISCLAIMED. IN NO EVENT SHALL THE
+# COPYRIGHT OWNER OR CONTRIBUTORS BE LIABLE FOR ANY DIRECT, INDIRECT,
+# INCIDENTAL, SPECIAL, EXEMPLARY, OR CONSEQUENTIAL DAMAGES (INCLUDING,
+# BUT NOT LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS OR SERVICES;
+# LOSS OF USE, DATA, OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER
+# CAUSED AND ON ANY THEORY OF LIABILITY, WHETHER IN CONTRACT, STRICT
+# LIABILITY, OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN
+# ANY WAY OUT OF THE USE OF THIS SOFTWARE, EVEN IF ADVISED OF THE
+# POSSIBILITY OF SUCH DAMAGE.
+# ----------------------------------------------------------------------------
+"""
+Measure pywavefront with every option combination on a corpus.
+"""
+import argparse
+import ctypes
+import gc
+import itertools
+import json
+import os
+import platform
+import sys
+import tempfile
+import time
+import tracemalloc
+from pathlib import Path
+
+import pywavefront
+from pywavefront.cache import CACHE_FORMATS, cache_name, meta_name
+from pywavefront.storage import as_ctypes_array, numpy, STORAGE_ARRAY, STORAGE_LIST, STORAGE_NUMPY
+
+from benchmarks import corpus
+
+# Version of the JSON result layout
+RESULT_VERSION = 1
+
+
+def option_matrix(workers=()):
+    """
+    Every combination of the options changing how files are parsed
+
+    :param workers: Additional worker counts to run with numpy storage
+    :return: List of option dictionaries
+    """
+    storages = [STORAGE_LIST, STORAGE_ARRAY] + ([STORAGE_NUMPY] if numpy is not None else [])
+    options = [
+        {"storage": storage, "indexed": indexed, "collect_faces": collect_faces}
+        for storage, indexed, collect_faces in itertools.product(storages, (False, True), (False, True))
+    ]
+    # Topology mode only collects the face indices
+    options += [
+        {"storage": storage, "indexed": False, "collect_faces": True, "topology": True}
+        for storage in storages
+    ]
+    # Positions only skipping texture coordinates, normals and colors
+    options += [
+        {"storage": storage, "indexed": False, "collect_faces": False, "attributes": ["position"]}
+        for storage in storages
+    ]
+
+    if numpy is not None:
+        options += [
+            {"storage": STORAGE_NUMPY, "indexed": False, "collect_faces": False, "workers": count}
+            for count in workers if count > 1
+        ]
+
+    return options
+
+
+def timed(func, repeat):
+    """Best wall time of ``repeat`` calls and the last return value"""
+    best = None
+    for _ in range(repeat):
+        gc.collect()
+        start = time.perf_counter()
+        value = func()
+        duration = time.perf_counter() - start
+        best = duration if best is None else min(best, duration)
+
+    return best, value
+
+
+def peak_memory(func):
+    """Peak bytes allocated by python and numpy while calling ``func``"""
+    gc.collect()
+    tracemalloc.start()
+    try:
+        func()
+        return tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+
+
+def remove_cache(file_name):
+    for path in (cache_name(file_name), meta_name(file_name)):
+        if path.exists():
+            path.unlink()
+
+
+def first_draw(file_name, cache_format, options):
+    """
+    Load a file from its cache and create the ctypes arrays
+    the visualization module passes to OpenGL on the first draw
+    """
+    scene = pywavefront.Wavefront(file_name, cache=True, cache_format=cache_format, **options)
+    for material in scene.materials.values():
+        as_ctypes_array(ctypes.c_float, 'f', material.vertices)
+        if material.is_indexed:
+            as_ctypes_array(ctypes.c_uint, 'I', material.indices)
+
+    return scene
+
+
+def measure(file_name, options, repeat=3, memory=True):
+    """
+    Measure loading a file with one option combination
+
+    :param file_name: The obj file
+    :param options: Wavefront arguments
+    :param repeat: Number of times to run each measurement keeping the best time
+    :param memory: Measure peak memory. Runs the parser once more with tracemalloc
+    :return: Dictionary with the measurements
+    """
+    file_name = Path(file_name)
+
+    def load():
+        return pywavefront.Wavefront(file_name, **options)
+
+    parse_time, scene = timed(load, repeat)
+
+    result = {
+        "options": options,
+        "parse_time": parse_time,
+        "vertices": len(scene.vertices),
+        "materials": len(scene.materials),
+        "meshes": len(scene.mesh_list),
+    }
+
+    # Memory used by worker processes is not traced
+    if memory and "workers" not in options:
+        del scene
+        result["peak_memory"] = peak_memory(load)
+
+    # Workers and cache can be combined, but caching does not depend on how the file was parsed
+    if "workers" in options:
+        return result
+
+    result["cache"] = {}
+    for cache_format in CACHE_FORMATS:
+        scene = load()
+        parser = scene.parser
+
+        def write():
+            remove_cache(file_name)
+            parser.cache_writer_cls(
+                parser.file_name,
+                scene,
+                cache_format=cache_format,
+                parse_options=parser.parse_options(),
+                normals=parser.normals,
+                tex_coords=parser.tex_coords,
+            ).write()
+
+        write_time, _ = timed(write, repeat)
+        read_time, cached = timed(lambda: pywavefront.Wavefront(
+            file_name, cache=True, cache_format=cache_format, **options), repeat)
+
+        if not cached.parser.cache_loaded:
+            raise RuntimeError("The {} cache was not loaded".format(cache_format))
+
+        draw_time, _ = timed(lambda: first_draw(file_name, cache_format, options), repeat)
+
+        result["cache"][cache_format] = {
+            "write_time": write_time,
+            "read_time": read_time,
+            "draw_time": draw_time,
+            "bytes": cache_name(file_name).stat().st_size,
+        }
+        remove_cache(file_name)
+
+    return result
+
+
+def run(spec, directory, options=None, repeat=3, memory=True, log=None):
+    """
+    Generate a corpus and measure every option combination
+
+    :param spec: The ``CorpusSpec``
+    :param directory: Directory to write the corpus to
+    :param options: List of option dictionaries. Defaults to ``option_matrix()``
+    :param repeat: Number of times to run each measurement keeping the best time
+    :param memory: Measure peak memory
+    :param log: Function called with a progress message for every result
+    :return: Dictionary with the environment, corpus and results
+    """
+    start = time.perf_counter()
+    file_name = corpus.generate(directory, spec)
+    generate_time = time.perf_counter() - start
+
+    results = []
+    for option in (options if options is not None else option_matrix()):
+        # Parallel parsing is not supported for compressed files
+        if spec.gzip and option.get("workers", 1) > 1:
+            continue
+
+        result = measure(file_name, option, repeat=repeat, memory=memory)
+        results.append(result)
+        if log:
+            log(format_result(result))
+
+    return {
+        "version": RESULT_VERSION,
+        "environment": {
+            "pywavefront": pywavefront.__version__,
+            "python": platform.python_version(),
+            "implementation": platform.python_implementation(),
+            "numpy": numpy.__version__ if numpy is not None else None,
+            "platform": platform.platform(),
+            "cpus": os.cpu_count(),
+        },
+        "corpus": dict(spec._asdict(), bytes=os.path.getsize(file_name), generate_time=generate_time),
+        "results": results,
+    }
+
+
+def option_key(options):
+    return json.dumps(options, sort_keys=True)
+
+
+def format_options(options):
+    return " ".join("{}={}".format(key, value) for key, value in sorted(options.items()))
+
+
+def format_result(result):
+    """One line summary of a result"""
+    line = "{:<60} parse {:8.3f}s".format(format_options(result["options"]), result["parse_time"])
+    if "peak_memory" in result:
+        line += " peak {:8.1f}MB".format(result["peak_memory"] / 1e6)
+    for cache_format, cache in sorted(result.get("cache", {}).items()):
+        line += " {} write {:.3f}s read {:.3f}s draw {:.3f}s".format(
+            cache_format, cache["write_time"], cache["read_time"], cache["draw_time"])
+    return line
+
+
+def compare(baseline, current):
+    """
+    Compare two result files
+
+    :return: Lines with the relative parse time and memory of the current results
+    """
+    previous = {option_key(result["options"]): result for result in baseline["results"]}
+    lines = ["{} -> {}".format(baseline["environment"]["pywavefront"], current["environment"]["pywavefront"])]
+
+    for result in current["results"]:
+        old = previous.get(option_key(result["options"]))
+        if old is None:
+            continue
+
+        line = "{:<60} parse {:6.2f}x".format(format_options(result["options"]),
+                                              result["parse_time"] / old["parse_time"])
+        if "peak_memory" in result and "peak_memory" in old:
+            line += " memory {:6.2f}x".format(result["peak_memory"] / old["peak_memory"])
+        lines.append(line)
+
+    return lines
+
+
+def parse_args(args):
+    defaults = corpus.CorpusSpec()
+    parser = argparse.ArgumentParser(prog="python -m benchmarks", description=__doc__)
+    parser.add_argument("--vertices", type=int, default=defaults.vertices)
+    parser.add_argument("--faces", type=int, default=defaults.faces,
+                        help="Number of faces. Defaults to twice the number of vertices")
+    parser.add_argument("--objects", type=int, default=defaults.objects)
+    parser.add_argument("--materials", type=int, default=defaults.materials)
+    parser.add_argument("--quad-ratio", type=float, default=defaults.quad_ratio)
+    parser.add_argument("--ngon-ratio", type=float, default=defaults.ngon_ratio)
+    parser.add_argument("--colors", action="store_true", help="Add vertex colors")
+    parser.add_argument("--no-normals", action="store_true")
+    parser.add_argument("--no-tex-coords", action="store_true")
+    parser.add_argument("--gzip", action="store_true", help="Write a gzipped obj file")
+    parser.add_argument("--seed", type=int, default=defaults.seed)
+    parser.add_argument("--material-run", type=int, default=defaults.material_run,
+                        help="Switch material every this many faces")
+    parser.add_argument("--workers", type=int, nargs="*", default=[],
+                        help="Also measure parallel parsing with these worker counts")
+    parser.add_argument("--repeat", type=int, default=3, help="Keep the best of this many runs")
+    parser.add_argument("--no-memory", action="store_true", help="Skip the peak memory measurement")
+    parser.add_argument("--directory", help="Write the corpus to this directory instead of a temporary one")
+    parser.add_argument("--output", help="Write the results as JSON to this file")
+    parser.add_argument("--compare", help="Compare with the results in this JSON file")
+    return parser.parse_args(args)
+
+
+def main(args=None):
+    args = parse_args(sys.argv[1:] if args is None else args)
+    spec = corpus.CorpusSpec(
+        vertices=args.vertices,
+        faces=args.faces,
+        objects=args.objects,
+        materials=args.materials,
+        quad_ratio=args.quad_ratio,
+        ngon_ratio=args.ngon_ratio,
+        colors=args.colors,
+        normals=not args.no_normals,
+        tex_coords=not args.no_tex_coords,
+        gzip=args.gzip,
+        seed=args.seed,
+        material_run=args.material_run,
+    )
+
+    def log(message):
+        print(message, file=sys.stderr)
+
+    options = option_matrix(args.workers)
+
+    if args.directory:
+        os.makedirs(args.directory, exist_ok=True)
+        report = run(spec, args.directory, options, repeat=args.repeat, memory=not args.no_memory, log=log)
+    else:
+        with tempfile.TemporaryDirectory() as directory:
+            report = run(spec, directory, options, repeat=args.repeat, memory=not args.no_memory, log=log)
+
+    if args.output:
+        with open(args.output, 'w') as fd:
+            json.dump(report, fd, indent=2, sort_keys=True)
+    else:
+        print(json.dumps(report, indent=2, sort_keys=True))
+
+    if args.compare:
+        with open(args.compare) as fd:
+            for line in compare(json.load(fd), report):
+                log(line)
@@ -0,0 +1,53 @@
+"""
+Benchmark loading many small obj files sharing a material library.
+
+Usage: batch_benchmark.py [number of files] [workers]
+"""
+import os
+import random
+import sys
+import tempfile
+import time
+
+import pywavefront
+
+count = int(sys.argv[1]) if len(sys.argv) > 1 else 2000
+workers = int(sys.argv[2]) if len(sys.argv) > 2 else os.cpu_count()
+
+
+def write_files(directory):
+    """Write a shared mtl file and small obj files referencing it"""
+    with open(os.path.join(directory, 'props.mtl'), 'w') as fd:
+        for i in range(100):
+            fd.write("newmtl material{}\nKd 0.8 0.8 0.8\nKa 0.2 0.2 0.2\nNs 10\nmap_Kd -s 1 1 1 texture{}.png\n".format(i, i))
+
+    paths = []
+    for i in range(count):
+        path = os.path.join(directory, 'prop{}.obj'.format(i))
+        with open(path, 'w') as fd:
+            fd.write("mtllib props.mtl\no prop{}\n".format(i))
+            for _ in range(24):
+                fd.write("v {} {} {}\n".format(random.random(), random.random(), random.random()))
+            fd.write("vn 0 0 1\nusemtl material{}\n".format(i % 100))
+            for j in range(1, 23):
+                fd.write("f {0}//1 {1}//1 {2}//1\n".format(j, j + 1, j + 2))
+        paths.append(path)
+
+    return paths
+
+
+def run(name, load):
+    start = time.perf_counter()
+    load()
+    duration = time.perf_counter() - start
+    print("{:<28} {:8.0f} files/s".format(name, count / duration))
+
+
+with tempfile.TemporaryDirectory() as directory:
+    paths = write_files(directory)
+    print("{} files, {} workers".format(count, workers))
+    run("Wavefront() uncached mtl", lambda: [pywavefront.Wavefront(path, material_cache=False) for path in paths])
+    run("Wavefront() loop", lambda: [pywavefront.Wavefront(path) for path in paths])
+    run("load_many(workers=1)", lambda: pywavefront.load_many(paths, workers=1))
+    run("load_many(executor='thread')", lambda: pywavefront.load_many(paths, workers=workers, executor="thread"))
+    run("load_many(executor='process')", lambda: pywavefront.load_many(paths, workers=workers))
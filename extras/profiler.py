@@ -9,14 +9,16 @@ except:
 
 
 if len(sys.argv) < 2:
-    print("Usage: profiler.py <obj file>")
+    print("Usage: profiler.py <obj file> [storage]")
     exit(1)
 
+storage = sys.argv[2] if len(sys.argv) > 2 else "list"
+
 # Run the profiler
 pr = cProfile.Profile()
 pr.enable()
 import pywavefront
-pywavefront.Wavefront(sys.argv[1])
+pywavefront.Wavefront(sys.argv[1], storage=storage)
 pr.disable()
 
 # Print the stats
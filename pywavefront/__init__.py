@@ -32,10 +32,17 @@
 # POSSIBILITY OF SUCH DAMAGE.
 # ----------------------------------------------------------------------------
 import logging
+import sys
 
 from pywavefront.exceptions import PywavefrontException
 from pywavefront.obj import ObjParser
-from pywavefront.wavefront import Wavefront
+from pywavefront.wavefront import Wavefront, iter_meshes
+from pywavefront.batch import load_many
+from pywavefront.pointcloud import load_point_cloud
+
+# async and await are a syntax error on python 3.4
+if sys.version_info >= (3, 5):
+    from pywavefront.aio import load_async, load_many_async
 
 __version__ = '1.3.3'
 
@@ -0,0 +1,224 @@
+# ----------------------------------------------------------------------------
+# PyWavefront
+# Copyright (c) 2018 Kurt Yoder
+# All rights reserved.
+#
+# Redistribution and use in source and binary forms, with or without
+# modification, are permitted provided that the following conditions
+# are met:
+#
+#  * Redistributions of source code must retain the above copyright
+#    notice, this list of conditions and the following disclaimer.
+#  * Redistributions in binary form must reproduce the above copyright
+#    notice, this list of conditions and the following disclaimer in
+#    the documentation and/or other materials provided with the
+#    distribution.
+#  * Neither the name of PyWavefront nor the names of its
+#    contributors may be used to endorse or promote products
+#    derived from this software without specific prior written
+#    permission.
+#
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS
+# "AS IS" AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT
+# LIMITED TO, THE IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS
+# FOR A PARTICULAR PURPOSE ARE DISCLAIMED. IN NO EVENT SHALL THE
+# COPYRIGHT OWNER OR CONTRIBUTORS BE LIABLE FOR ANY DIRECT, INDIRECT,
+# INCIDENTAL, SPECIAL, EXEMPLARY, OR CONSEQUENTIAL DAMAGES (INCLUDING,
+# BUT NOT LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS OR SERVICES;
+# LOSS OF USE, DATA, OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER
+# CAUSED AND ON ANY THEORY OF LIABILITY, WHETHER IN CONTRACT, STRICT
+# LIABILITY, OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN
+# ANY WAY OUT OF THE USE OF THIS SOFTWARE, EVEN IF ADVISED OF THE
+# POSSIBILITY OF SUCH DAMAGE.
+# ----------------------------------------------------------------------------
+"""
+Load obj files from asyncio applications without blocking the event loop.
+
+By default the whole load runs in an executor. With ``cooperative=True``
+the statements are parsed on the event loop in short time slices while the file,
+material libraries, cache files and cache writes are read and written in the executor.
+"""
+import asyncio
+import collections
+import concurrent.futures
+import functools
+import time
+
+from pywavefront.batch import LoadResult
+from pywavefront.bgzf import supports_ranges
+from pywavefront.wavefront import Wavefront
+
+# Seconds spent parsing before control is given back to the event loop
+TIME_SLICE = 0.005
+# Faces parsed before checking the time slice
+FACE_BATCH_SIZE = 500
+
+
+async def load_async(file_name, executor=None, cooperative=False, semaphore=None,
+                     time_slice=TIME_SLICE, wavefront_cls=Wavefront, **kwargs):
+    """
+    Load an obj file without blocking the event loop
+
+    :param file_name: file name and path of obj file to read
+    :param executor: Executor running the blocking work. Defaults to the loop's default executor
+    :param cooperative: Parse the statements on the event loop in slices of ``time_slice`` seconds
+    :param semaphore: ``asyncio.Semaphore`` limiting the number of concurrent loads
+    :param time_slice: Seconds to parse before yielding to the event loop when cooperative
+    :param wavefront_cls: The Wavefront class to create
+    :param kwargs: Arguments passed to the Wavefront such as ``create_materials`` or ``cache``
+    :return: The Wavefront
+    """
+    if cooperative and isinstance(executor, concurrent.futures.ProcessPoolExecutor):
+        raise ValueError("Cooperative loading modifies the parser and requires a thread executor")
+
+    if semaphore is not None:
+        async with semaphore:
+            return await load_async(file_name, executor=executor, cooperative=cooperative,
+                                    time_slice=time_slice, wavefront_cls=wavefront_cls, **kwargs)
+
+    loop = asyncio.get_event_loop()
+
+    if not cooperative:
+        return await loop.run_in_executor(executor, functools.partial(wavefront_cls, file_name, **kwargs))
+
+    kwargs['parse'] = False
+    wavefront = wavefront_cls(file_name, **kwargs)
+    await parse_cooperative(wavefront.parser, loop, executor, time_slice)
+    return wavefront
+
+
+async def load_many_async(paths, concurrency=4, **kwargs):
+    """
+    Load obj files concurrently. A failing file does not stop the other files from loading.
+
+    :param paths: Paths to the obj files
+    :param concurrency: Maximum number of files loaded at the same time
+    :param kwargs: Arguments for ``load_async``
+    :return: A ``LoadResult`` for every path in the same order as ``paths``
+    """
+    if not isinstance(concurrency, int) or concurrency < 1:
+        raise ValueError("concurrency must be a positive integer, got {}".format(concurrency))
+
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def load(path):
+        try:
+            return LoadResult(path, await load_async(path, semaphore=semaphore, **kwargs), None)
+        except Exception as ex:
+            return LoadResult(path, None, ex)
+
+    return list(await asyncio.gather(*[load(path) for path in paths]))
+
+
+async def parse_cooperative(parser, loop, executor=None, time_slice=TIME_SLICE):
+    """
+    Parse in time slices on the event loop. Does the same work as ``ObjParser.parse``.
+
+    :param parser: ObjParser created with ``parse=False``
+    :param loop: The running event loop
+    :param executor: Executor reading the file, cache files and material libraries
+    :param time_slice: Seconds to parse before yielding to the event loop
+    """
+    run = functools.partial(loop.run_in_executor, executor)
+    if parser.stats is not None:
+        parser.stats.begin()
+
+    if parser.cache:
+        await run(parser.load_cache)
+
+    if parser.lazy:
+        await run(parser.parse_lazy)
+    elif parser.cache_loaded:
+        pass
+    elif parser.workers > 1 and supports_ranges(parser.file_name):
+        await run(parser.parse_parallel)
+    else:
+        await parse_statements(parser, run, time_slice)
+
+        if parser.stats is not None:
+            parser.stats.add_file(parser.file_name)
+
+        if parser.auto_post_parse:
+            await run(parser.post_parse)
+
+    await run(parser.finish_parse)
+
+
+async def parse_statements(parser, run, time_slice):
+    """
+    Parse the statements of the file on the event loop.
+    The file and the material libraries are read in the executor.
+
+    :param parser: ObjParser created with ``parse=False``
+    :param run: Function running a blocking call in the executor
+    :param time_slice: Seconds to parse before yielding to the event loop
+    """
+    mtllibs = []
+
+    def defer_mtllib():
+        mtllibs.append((parser.line, parser.values))
+        parser.consume_line()
+
+    fd = await run(parser.open_file)
+    reader = ChunkReader(fd, parser.chunk_size)
+    parser.lines = parser.split_chunks(reader)
+    parser.dispatcher['mtllib'] = defer_mtllib
+    parser.face_batch_size = FACE_BATCH_SIZE
+
+    try:
+        await run(reader.read_ahead)
+        deadline = time.monotonic() + time_slice
+        for _ in parser.iter_parse():
+            if mtllibs:
+                parser.line, parser.values = mtllibs.pop()
+                await run(parser.parse_mtllib)
+
+            if reader.needs_data:
+                await run(reader.read_ahead)
+
+            if time.monotonic() > deadline:
+                await asyncio.sleep(0)
+                deadline = time.monotonic() + time_slice
+    finally:
+        parser.dispatcher['mtllib'] = parser.parse_mtllib
+        del parser.face_batch_size
+        await run(fd.close)
+
+
+class ChunkReader:
+    """
+    Iterator over the chunks of a text file.
+    The next chunk is read ahead in the executor while the parser works on the current one.
+    """
+
+    def __init__(self, fd, size):
+        self.fd = fd
+        self.size = size
+        self.chunks = collections.deque()
+        self.eof = False
+
+    @property
+    def needs_data(self):
+        """bool: Has the parser taken every chunk read so far before the end of the file"""
+        return not self.chunks and not self.eof
+
+    def read_ahead(self):
+        """Read the next chunk. Blocks, so it should run in the executor"""
+        data = self.fd.read(self.size)
+        if data:
+            self.chunks.append(data)
+        else:
+            self.eof = True
+
+    def __iter__(self):
+        return self
+
+    def __next__(self):
+        # A statement spanning more than the chunk read ahead is read on the event loop
+        if self.needs_data:
+            self.read_ahead()
+
+        if not self.chunks:
+            raise StopIteration
+
+        return self.chunks.popleft()
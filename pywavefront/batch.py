@@ -0,0 +1,132 @@
+# ----------------------------------------------------------------------------
+# PyWavefront
+# Copyright (c) 2018 Kurt Yoder
+# All rights reserved.
+#
+# Redistribution and use in source and binary forms, with or without
+# modification, are permitted provided that the following conditions
+# are met:
+#
+#  * Redistributions of source code must retain the above copyright
+#    notice, this list of conditions and the following disclaimer.
+#  * Redistributions in binary form must reproduce the above copyright
+#    notice, this list of conditions and the following disclaimer in
+#    the documentation and/or other materials provided with the
+#    distribution.
+#  * Neither the name of PyWavefront nor the names of its
+#    contributors may be used to endorse or promote products
+#    derived from this software without specific prior written
+#    permission.
+#
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS
+# "AS IS" AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT
+# LIMITED TO, THE IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS
+# FOR A PARTICULAR PURPOSE ARE DISCLAIMED. IN NO EVENT SHALL THE
+# COPYRIGHT OWNER OR CONTRIBUTORS BE LIABLE FOR ANY DIRECT, INDIRECT,
+# INCIDENTAL, SPECIAL, EXEMPLARY, OR CONSEQUENTIAL DAMAGES (INCLUDING,
+# BUT NOT LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS OR SERVICES;
+# LOSS OF USE, DATA, OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER
+# CAUSED AND ON ANY THEORY OF LIABILITY, WHETHER IN CONTRACT, STRICT
+# LIABILITY, OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN
+# ANY WAY OUT OF THE USE OF THIS SOFTWARE, EVEN IF ADVISED OF THE
+# POSSIBILITY OF SUCH DAMAGE.
+# ----------------------------------------------------------------------------
+"""
+Load many obj files using a pool of threads or processes.
+
+Parsed material libraries are shared through the process wide
+``MaterialLibraryCache``, so a library referenced by many files is only
+parsed once per process.
+"""
+from collections import namedtuple
+import concurrent.futures
+import functools
+import logging
+import os
+
+from pywavefront.wavefront import Wavefront
+
+logger = logging.getLogger("pywavefront")
+
+EXECUTOR_THREAD = "thread"
+EXECUTOR_PROCESS = "process"
+EXECUTOR_TYPES = (EXECUTOR_THREAD, EXECUTOR_PROCESS)
+
+# The outcome of loading a single file. ``wavefront`` is None and ``error`` is set if loading failed
+LoadResult = namedtuple('LoadResult', 'path wavefront error')
+
+
+def load_many(paths, workers=None, executor=EXECUTOR_PROCESS, wavefront_cls=Wavefront, **kwargs):
+    """
+    Load obj files in parallel.
+    A failing file does not stop the other files from loading.
+
+    :param paths: Paths to the obj files
+    :param workers: Number of threads or processes. Defaults to the number of CPUs
+    :param executor: Distribute the files across a "process" (default) or "thread" pool
+    :param wavefront_cls: The Wavefront class to create for every file
+    :param kwargs: Arguments passed to every Wavefront such as ``create_materials`` or ``cache``
+    :return: A ``LoadResult`` for every path in the same order as ``paths``
+    """
+    if executor not in EXECUTOR_TYPES:
+        raise ValueError("Unknown executor '{}'. Supported executors: {}".format(
+            executor, ", ".join(EXECUTOR_TYPES)))
+
+    paths = list(paths)
+    workers = workers or os.cpu_count() or 1
+
+    load = functools.partial(load_file, wavefront_cls=wavefront_cls, kwargs=kwargs)
+
+    if workers == 1 or len(paths) < 2:
+        results = [load(path) for path in paths]
+    else:
+        if executor == EXECUTOR_THREAD:
+            pool = concurrent.futures.ThreadPoolExecutor(max_workers=workers)
+        else:
+            pool = concurrent.futures.ProcessPoolExecutor(max_workers=workers)
+
+        # Results are collected one by one so an error sending one back only fails its path
+        with pool:
+            futures = [pool.submit(load, path) for path in paths]
+            results = [collect_result(path, future) for path, future in zip(paths, futures)]
+
+    failed = sum(1 for result in results if result.error is not None)
+    if failed:
+        logger.warning("Failed to load %s of %s files", failed, len(results))
+
+    return results
+
+
+def collect_result(path, future):
+    """
+    Wait for the ``LoadResult`` of a file.
+    Errors outside of ``load_file`` such as failing to send the
+    result back from a worker process are reported for the path.
+
+    :param path: Path to the obj file
+    :param future: The future running ``load_file``
+    :return: A ``LoadResult``
+    """
+    try:
+        return future.result()
+    except Exception as ex:
+        logger.info("%s: Failed to receive result: %s", path, ex)
+        return LoadResult(path, None, ex)
+
+
+def load_file(path, wavefront_cls=Wavefront, kwargs=None):
+    """
+    Load a single obj file catching any error
+
+    :param path: Path to the obj file
+    :param wavefront_cls: The Wavefront class to create
+    :param kwargs: Arguments passed to the Wavefront
+    :return: A ``LoadResult``
+    """
+    try:
+        wavefront = wavefront_cls(path, **(kwargs or {}))
+    except Exception as ex:
+        logger.info("%s: Failed to load: %s", path, ex)
+        return LoadResult(path, None, ex)
+
+    return LoadResult(path, wavefront, None)
@@ -0,0 +1,344 @@
+# ----------------------------------------------------------------------------
+# PyWavefront
+# Copyright (c) 2018 Kurt Yoder
+# All rights reserved.
+#
+# Redistribution and use in source and binary forms, with or without
+# modification, are permitted provided that the following conditions
+# are met:
+#
+#  * Redistributions of source code must retain the above copyright
+#    notice, this list of conditions and the following disclaimer.
+#  * Redistributions in binary form must reproduce the above copyright
+#    notice, this list of conditions and the following disclaimer in
+#    the documentation and/or other materials provided with the
+#    distribution.
+#  * Neither the name of PyWavefront nor the names of its
+#    contributors may be used to endorse or promote products
+#    derived from this software without specific prior written
+#    permission.
+#
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS
+# "AS IS" AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT
+# LIMITED TO, THE IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS
+# FOR A PARTICULAR PURPOSE ARE DISCLAIMED. IN NO EVENT SHALL THE
+# COPYRIGHT OWNER OR CONTRIBUTORS BE LIABLE FOR ANY DIRECT, INDIRECT,
+# INCIDENTAL, SPECIAL, EXEMPLARY, OR CONSEQUENTIAL DAMAGES (INCLUDING,
+# BUT NOT LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS OR SERVICES;
+# LOSS OF USE, DATA, OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER
+# CAUSED AND ON ANY THEORY OF LIABILITY, WHETHER IN CONTRACT, STRICT
+# LIABILITY, OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN
+# ANY WAY OUT OF THE USE OF THIS SOFTWARE, EVEN IF ADVISED OF THE
+# POSSIBILITY OF SUCH DAMAGE.
+# ----------------------------------------------------------------------------
+"""
+Block compressed gzip files (BGZF).
+
+A BGZF file is a series of gzip members each holding at most 64 KB of
+data. The compressed size of each member is stored in a ``BC`` extra field,
+so the blocks can be located without decompressing the file. Regular gzip
+readers decompress BGZF files like any other gzip file.
+
+Byte ranges of the decompressed data can be read by only decompressing
+the blocks covering the range. This lets ``workers`` parse a compressed
+obj file in parallel and ``lazy`` load single objects. A ``.gzi`` index
+with the offsets of every block (the format used by ``bgzip``) is written
+next to the compressed file and is rebuilt by scanning the block headers
+when missing.
+"""
+import bisect
+import os
+import struct
+import zlib
+from pathlib import Path
+
+from pywavefront.exceptions import PywavefrontException
+from pywavefront.parser import is_compressed
+
+# Maximum number of bytes compressed into a block
+BLOCK_SIZE = 0xff00
+# Maximum size of a compressed block including header and footer
+MAX_BLOCK_SIZE = 0x10000
+
+# Gzip header with the FEXTRA flag, a 6 byte extra field with the ``BC`` subfield
+# holding the block size - 1 as the last two bytes
+HEADER = struct.Struct('<4BI2BH2BHH')
+HEADER_MAGIC = b'\x1f\x8b\x08\x04'
+FOOTER = struct.Struct('<II')
+
+# Empty block marking the end of the file
+EOF_BLOCK = bytes.fromhex('1f8b08040000000000ff0600424302001b0003000000000000000000')
+
+
+def index_name(path):
+    """Generate the name of the block index file"""
+    path = Path(path)
+    return path.with_suffix(path.suffix + '.gzi')
+
+
+def is_block_gzip(file_name):
+    """bool: Is the file block compressed gzip"""
+    if Path(file_name).suffix != ".gz":
+        return False
+
+    try:
+        with open(str(file_name), mode='rb') as fd:
+            header = fd.read(HEADER.size)
+    except IOError:
+        return False
+
+    return len(header) == HEADER.size and header[:4] == HEADER_MAGIC and header[12:16] == b'BC\x02\x00'
+
+
+def supports_ranges(file_name):
+    """bool: Can byte ranges of the file be read without reading the whole file"""
+    return not is_compressed(file_name) or is_block_gzip(file_name)
+
+
+def open_ranges(file_name):
+    """
+    Open a file for reading byte ranges. Block compressed gzip files
+    are read through their block index and other files are read directly.
+
+    :return: ``BlockGzipFile`` or ``RawFile``
+    """
+    if is_block_gzip(file_name):
+        return BlockGzipFile(file_name)
+
+    return RawFile(file_name)
+
+
+def compress(file_name, output=None, level=6, block_size=BLOCK_SIZE):
+    """
+    Write a block compressed gzip file and its ``.gzi`` block index
+
+    :param file_name: The file to compress
+    :param output: Path of the compressed file. Defaults to ``file_name`` + ``.gz``
+    :param level: zlib compression level
+    :param block_size: Maximum number of bytes in a block
+    :return: Path to the compressed file
+    """
+    if not 0 < block_size <= BLOCK_SIZE:
+        raise ValueError("block_size must be between 1 and {}, got {}".format(BLOCK_SIZE, block_size))
+
+    output = Path(output) if output is not None else Path(str(file_name) + ".gz")
+    offsets = []
+    compressed_offset = 0
+    offset = 0
+
+    with open(str(file_name), mode='rb') as src, open(str(output), mode='wb') as dst:
+        while True:
+            data = src.read(block_size)
+            if not data:
+                break
+
+            for block, size in compress_block(data, level):
+                offsets.append((compressed_offset, offset))
+                dst.write(block)
+                compressed_offset += len(block)
+                offset += size
+
+        dst.write(EOF_BLOCK)
+
+    BlockIndex(offsets, offset).write(index_name(output))
+    return output
+
+
+def compress_block(data, level=6):
+    """
+    Compress data into one or more blocks. Data that does not compress
+    well is split since a block can not be larger than 64 KB.
+
+    :return: List of (block, uncompressed size) tuples
+    """
+    compressor = zlib.compressobj(level, zlib.DEFLATED, -15)
+    cdata = compressor.compress(data) + compressor.flush()
+    size = HEADER.size + len(cdata) + FOOTER.size
+
+    if size > MAX_BLOCK_SIZE:
+        half = len(data) // 2
+        return compress_block(data[:half], level) + compress_block(data[half:], level)
+
+    header = HEADER.pack(0x1f, 0x8b, 8, 4, 0, 0, 0xff, 6, ord('B'), ord('C'), 2, size - 1)
+    footer = FOOTER.pack(zlib.crc32(data) & 0xffffffff, len(data))
+    return [(header + cdata + footer, len(data))]
+
+
+class BlockIndex:
+    """Compressed and uncompressed offsets of every block in a block compressed gzip file"""
+
+    def __init__(self, offsets, size):
+        """
+        :param offsets: List of (compressed offset, uncompressed offset) of every block
+        :param size: Size of the uncompressed data
+        """
+        self.offsets = offsets
+        self.size = size
+        self._starts = [offset for _, offset in offsets]
+
+    @classmethod
+    def load(cls, file_name):
+        """Read the ``.gzi`` index of a file or scan the block headers if it is missing or outdated"""
+        path = index_name(file_name)
+        try:
+            if os.path.getmtime(str(path)) >= os.path.getmtime(str(file_name)):
+                return cls.from_file(path, file_name)
+        except (IOError, PywavefrontException):
+            pass
+
+        return cls.scan(file_name)
+
+    @classmethod
+    def scan(cls, file_name):
+        """Build the index by reading the header and size of every block"""
+        offsets = []
+        compressed_offset = 0
+        offset = 0
+
+        with open(str(file_name), mode='rb') as fd:
+            while True:
+                fd.seek(compressed_offset)
+                header = fd.read(HEADER.size)
+                if not header:
+                    break
+
+                block_size = read_block_size(header, file_name)
+                fd.seek(compressed_offset + block_size - 4)
+                size, = struct.unpack('<I', fd.read(4))
+
+                if size:
+                    offsets.append((compressed_offset, offset))
+                compressed_offset += block_size
+                offset += size
+
+        return cls(offsets, offset)
+
+    @classmethod
+    def from_file(cls, path, file_name):
+        """
+        Read a ``.gzi`` index. It contains the number of entries followed by the
+        compressed and uncompressed offset of every block except the first one.
+        """
+        with open(str(path), mode='rb') as fd:
+            data = fd.read()
+
+        count, = struct.unpack_from('<Q', data)
+        if len(data) != 8 + count * 16:
+            raise PywavefrontException("Invalid block index {}".format(path))
+
+        values = struct.unpack_from('<{}Q'.format(count * 2), data, 8)
+        offsets = [(0, 0)] + list(zip(values[0::2], values[1::2]))
+
+        # The index does not contain the uncompressed size of the last block
+        with open(str(file_name), mode='rb') as fd:
+            fd.seek(offsets[-1][0])
+            block_size = read_block_size(fd.read(HEADER.size), file_name)
+            fd.seek(offsets[-1][0] + block_size - 4)
+            size, = struct.unpack('<I', fd.read(4))
+
+        if size == 0:
+            # Empty file where the only block is the end of file marker
+            return cls([], 0)
+
+        return cls(offsets, offsets[-1][1] + size)
+
+    def write(self, path):
+        """Write the index in the ``.gzi`` format"""
+        entries = self.offsets[1:]
+        with open(str(path), mode='wb') as fd:
+            fd.write(struct.pack('<Q', len(entries)))
+            fd.write(struct.pack('<{}Q'.format(len(entries) * 2), *(v for entry in entries for v in entry)))
+
+    def blocks(self, start, end):
+        """Indices of the blocks containing the uncompressed range ``[start, end)``"""
+        first = max(bisect.bisect_right(self._starts, start) - 1, 0)
+        last = bisect.bisect_left(self._starts, end)
+        return range(first, last)
+
+
+def read_block_size(header, file_name):
+    """Total size of a block from its header"""
+    if len(header) != HEADER.size or header[:4] != HEADER_MAGIC or header[12:16] != b'BC\x02\x00':
+        raise PywavefrontException("{} is not a block compressed gzip file".format(file_name))
+
+    return struct.unpack_from('<H', header, 16)[0] + 1
+
+
+class BlockGzipFile:
+    """Reads byte ranges of the uncompressed data in a block compressed gzip file"""
+
+    def __init__(self, file_name, index=None):
+        """
+        :param file_name: Path to the block compressed gzip file
+        :param index: The ``BlockIndex``. Loaded from the ``.gzi`` file or built if not specified
+        """
+        self.file_name = file_name
+        self.index = index or BlockIndex.load(file_name)
+        self._fd = open(str(file_name), mode='rb')
+
+    @property
+    def size(self):
+        """int: Size of the uncompressed data"""
+        return self.index.size
+
+    def read(self, start, end):
+        """
+        Decompress a byte range
+
+        :param start: Uncompressed offset of the first byte
+        :param end: Uncompressed offset after the last byte
+        :return: bytes
+        """
+        end = min(end, self.size)
+        if start >= end:
+            return b""
+
+        blocks = self.index.blocks(start, end)
+        offsets = self.index.offsets
+        first = offsets[blocks[0]]
+        stop = offsets[blocks[-1] + 1][0] if blocks[-1] + 1 < len(offsets) else None
+
+        self._fd.seek(first[0])
+        data = self._fd.read(stop - first[0] if stop is not None else -1)
+
+        parts = []
+        position = 0
+        for _ in blocks:
+            block_size = read_block_size(data[position:position + HEADER.size], self.file_name)
+            parts.append(zlib.decompress(data[position + HEADER.size:position + block_size - FOOTER.size], -15))
+            position += block_size
+
+        data = b"".join(parts)
+        return data[start - first[1]:end - first[1]]
+
+    def close(self):
+        self._fd.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
+
+
+class RawFile:
+    """Reads byte ranges of an uncompressed file like ``BlockGzipFile``"""
+
+    def __init__(self, file_name):
+        self.file_name = file_name
+        self.size = os.path.getsize(str(file_name))
+        self._fd = open(str(file_name), mode='rb')
+
+    def read(self, start, end):
+        """Read the bytes from ``start`` up to ``end``"""
+        self._fd.seek(start)
+        return self._fd.read(max(end - start, 0))
+
+    def close(self):
+        self._fd.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
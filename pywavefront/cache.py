@@ -34,18 +34,43 @@
 """
 Parser and metadata handler for cached binary versions of obj files
 """
+import array
 import gzip
+import itertools
 import json
 import logging
-import struct
+import mmap
 import os
+import struct
 from datetime import datetime
 from pathlib import Path
 
-from pywavefront.material import Material, MaterialParser
+from pywavefront.material import Material, MaterialParser, load_library
+from pywavefront.mesh import Mesh
+from pywavefront.polygons import Polygons
+from pywavefront.storage import is_array, numpy, STORAGE_ARRAY, STORAGE_LIST, STORAGE_NUMPY
 
 logger = logging.getLogger("pywavefront")
 
+# Buffers are gzip compressed and copied into memory when loaded
+CACHE_GZIP = "gzip"
+# Buffers are stored uncompressed and aligned so they can be memory mapped
+CACHE_RAW = "raw"
+CACHE_FORMATS = (CACHE_GZIP, CACHE_RAW)
+# Mesh attributes with vertex indices of lines and points
+ELEMENT_BUFFERS = ("lines", "points")
+# Type of every index buffer stored with a mesh. Polygons are stored as int32 indices and offsets
+MESH_BUFFERS = {"lines": 'I', "points": 'I', "polygon_indices": 'i', "polygon_offsets": 'i'}
+# Numpy types of the buffer typecodes
+NUMPY_TYPES = {'f': 'f4', 'I': 'u4', 'i': 'i4'}
+
+
+def validate_cache_format(cache_format):
+    """Ensure the cache format is known"""
+    if cache_format not in CACHE_FORMATS:
+        raise ValueError("Unknown cache format '{}'. Supported formats: {}".format(
+            cache_format, ", ".join(CACHE_FORMATS)))
+
 
 def cache_name(path):
     """Generate the name of the binary cache file"""
@@ -57,18 +82,37 @@ def meta_name(path):
     return path.with_suffix(path.suffix + '.json')
 
 
+def read_into(fd, buffer):
+    """Fill a writable buffer with the next bytes in a file"""
+    view = memoryview(buffer)
+    while len(view):
+        count = fd.readinto(view)
+        if not count:
+            raise EOFError("Cache file ended {} bytes early".format(len(view)))
+        view = view[count:]
+
+
 class CacheLoader:
     material_parser_cls = MaterialParser
+    mesh_cls = Mesh
 
-    def __init__(self, file_name, wavefront, strict=False, create_materials=False, encoding='utf-8', parse=True, **kwargs):
+    def __init__(self, file_name, wavefront, strict=False, create_materials=False, encoding='utf-8', parse=True,
+                 storage=STORAGE_LIST, parse_options=None, material_cache=None, **kwargs):
         self.wavefront = wavefront
         self.file_name = Path(file_name)
         self.path = self.file_name.parent
         self.encoding = encoding
         self.strict = strict
         self.dir = self.file_name.parent
+        self.storage = storage
+        self.parse_options = parse_options or {}
+        self.material_cache = material_cache
         self.meta = None
 
+        # Normals and texture coordinates for the entire file
+        self.normals = []
+        self.tex_coords = []
+
     def parse(self):
         # FIXME: We rely on os.path here because of mocking
         meta_exists = os.path.exists(str(meta_name(self.file_name)))
@@ -86,11 +130,46 @@ class CacheLoader:
         logger.info("%s loading cached version", self.file_name)
 
         self.meta = Meta.from_file(meta_name(self.file_name))
+        if self.meta.version != Meta.format_version:
+            logger.info("%s cache has format version %s instead of %s. Cache loading will be disabled.",
+                        self.file_name, self.meta.version, Meta.format_version)
+            return False
+
+        if self.meta.parse_options != self.parse_options:
+            logger.info("%s cache was created with parse options %s. Cache loading will be disabled.",
+                        self.file_name, self.meta.parse_options)
+            return False
+
         self._parse_mtllibs()
         self._load_vertex_buffers()
+        self._load_meshes()
 
         return True
 
+    def load_buffer(self, fd, length, typecode):
+        """
+        Read float32 (``f``), uint32 (``I``) or int32 (``i``) values from file.
+        With array and numpy storage the data is read straight into a writable
+        buffer that can be shared with ctypes and OpenGL without further copies.
+        List storage gets a tuple so the result can still be pickled.
+
+        :param fd: file object
+        :param length: Byte length of the data
+        :param typecode: ``f`` for float32, ``I`` for uint32 or ``i`` for int32
+        """
+        if self.storage == STORAGE_ARRAY:
+            values = array.array(typecode, [0]) * (length // 4)
+            read_into(fd, memoryview(values).cast('B'))
+            return values
+
+        buffer = bytearray(length)
+        read_into(fd, buffer)
+
+        if self.storage == STORAGE_NUMPY:
+            return numpy.frombuffer(buffer, dtype=NUMPY_TYPES[typecode])
+
+        return struct.unpack('{}{}'.format(length // 4, typecode), buffer)
+
     def load_vertex_buffer(self, fd, material, length):
         """
         Load vertex data from file. Can be overriden to reduce data copy
@@ -99,14 +178,44 @@ class CacheLoader:
         :param material: The material these vertices belong to
         :param length: Byte length of the vertex data
         """
-        material.vertices = struct.unpack('{}f'.format(length // 4), fd.read(length))
+        material.vertices = self.load_buffer(fd, length, 'f')
 
-    def _load_vertex_buffers(self):
-        """Load each vertex buffer into each material"""
-        # FIXME: Coverting path to str to not break library mocking
-        fd = gzip.open(str(cache_name(self.file_name)), 'rb')
+    def load_index_buffer(self, fd, material, length):
+        """
+        Load index data from file. Can be overriden to reduce data copy
 
-        for buff in self.meta.vertex_buffers:
+        :param fd: file object
+        :param material: The material these indices belong to
+        :param length: Byte length of the index data
+        """
+        indices = self.load_buffer(fd, length, 'I')
+        material.indices = indices if self.storage in (STORAGE_NUMPY, STORAGE_ARRAY) else list(indices)
+
+    def map_buffer(self, buffer, offset, length, typecode):
+        """
+        Read values from a memory mapped cache file. With numpy storage this is a
+        view without copying data. Pages are shared with other processes mapping
+        the same file until written to. Array storage copies the values once into
+        an ``array.array`` and list storage gets a tuple, as memoryviews can not be pickled.
+
+        :param buffer: The memory mapped file
+        :param offset: Byte offset of the data
+        :param length: Byte length of the data
+        :param typecode: ``f`` for float32, ``I`` for uint32 or ``i`` for int32
+        """
+        if self.storage == STORAGE_NUMPY:
+            return numpy.frombuffer(buffer, dtype=NUMPY_TYPES[typecode], count=length // 4, offset=offset)
+
+        if self.storage == STORAGE_ARRAY:
+            values = array.array(typecode)
+            values.frombytes(memoryview(buffer)[offset:offset + length])
+            return values
+
+        return struct.unpack_from('{}{}'.format(length // 4, typecode), buffer, offset)
+
+    def _load_vertex_buffers(self):
+        """Load each vertex buffer into each material and the raw attributes and faces"""
+        for buff in self.meta.vertex_buffers + self.meta.corner_buffers:
 
             mat = self.wavefront.materials.get(buff['material'])
             if not mat:
@@ -114,68 +223,323 @@ class CacheLoader:
                 self.wavefront.materials[mat.name] = mat
 
             mat.vertex_format = buff['vertex_format']
-            self.load_vertex_buffer(fd, mat, buff['byte_length'])
+
+        if self.meta.cache_format == CACHE_RAW:
+            self._map_vertex_buffers()
+            return
+
+        # FIXME: Coverting path to str to not break library mocking
+        fd = gzip.open(str(cache_name(self.file_name)), 'rb')
+
+        for buff in self.meta.vertex_buffers:
+            fd.seek(buff['byte_offset'])
+            self.load_vertex_buffer(fd, self.wavefront.materials[buff['material']], buff['byte_length'])
+
+        for buff in self.meta.index_buffers:
+            fd.seek(buff['byte_offset'])
+            self.load_index_buffer(fd, self.wavefront.materials[buff['material']], buff['byte_length'])
+
+        for buff in self.meta.corner_buffers:
+            fd.seek(buff['byte_offset'])
+            self.wavefront.materials[buff['material']].corner_indices = self.load_buffer(
+                fd, buff['byte_length'], 'i')
+
+        self._attributes = {}
+        for buff in self.meta.attribute_buffers:
+            fd.seek(buff['byte_offset'])
+            self._attributes[buff['name']] = self.load_buffer(fd, buff['byte_length'], 'f')
+
+        self._faces = {}
+        self._elements = {}
+        for i, mesh in enumerate(self.meta.meshes):
+            if mesh['faces']:
+                fd.seek(mesh['faces']['byte_offset'])
+                self._faces[i] = self.load_buffer(fd, mesh['faces']['byte_length'], 'I')
+
+            for name, typecode in MESH_BUFFERS.items():
+                if mesh.get(name):
+                    fd.seek(mesh[name]['byte_offset'])
+                    self._elements[i, name] = self.load_buffer(fd, mesh[name]['byte_length'], typecode)
 
         fd.close()
 
+    def _map_vertex_buffers(self):
+        """Memory map each buffer from an uncompressed cache file"""
+        self._attributes = {}
+        self._faces = {}
+        self._elements = {}
+        if not self.meta.vertex_buffers and not self.meta.corner_buffers and not self.meta.attribute_buffers:
+            return
+
+        with open(str(cache_name(self.file_name)), 'rb') as fd:
+            # Copy on write keeps the buffers writable without touching the file
+            buffer = mmap.mmap(fd.fileno(), 0, access=mmap.ACCESS_COPY)
+
+        for buff in self.meta.vertex_buffers:
+            mat = self.wavefront.materials[buff['material']]
+            mat.vertices = self.map_buffer(buffer, buff['byte_offset'], buff['byte_length'], 'f')
+
+        for buff in self.meta.index_buffers:
+            mat = self.wavefront.materials[buff['material']]
+            mat.indices = self.map_buffer(buffer, buff['byte_offset'], buff['byte_length'], 'I')
+
+        for buff in self.meta.corner_buffers:
+            mat = self.wavefront.materials[buff['material']]
+            mat.corner_indices = self.map_buffer(buffer, buff['byte_offset'], buff['byte_length'], 'i')
+
+        for buff in self.meta.attribute_buffers:
+            self._attributes[buff['name']] = self.map_buffer(buffer, buff['byte_offset'], buff['byte_length'], 'f')
+
+        for i, mesh in enumerate(self.meta.meshes):
+            if mesh['faces']:
+                faces = mesh['faces']
+                self._faces[i] = self.map_buffer(buffer, faces['byte_offset'], faces['byte_length'], 'I')
+
+            for name, typecode in MESH_BUFFERS.items():
+                if mesh.get(name):
+                    elements = mesh[name]
+                    self._elements[i, name] = self.map_buffer(
+                        buffer, elements['byte_offset'], elements['byte_length'], typecode)
+
+    def _load_meshes(self):
+        """Restore the raw attributes, meshes and their faces"""
+        widths = {buff['name']: buff['width'] for buff in self.meta.attribute_buffers}
+
+        if 'vertices' in self._attributes:
+            self.wavefront.vertices = self._rows(self._attributes['vertices'], widths['vertices'])
+        if 'normals' in self._attributes:
+            self.normals = self._rows(self._attributes['normals'], widths['normals'])
+        if 'tex_coords' in self._attributes:
+            self.tex_coords = self._rows(self._attributes['tex_coords'], widths['tex_coords'])
+
+        collect_faces = self.parse_options.get('collect_faces', False)
+        collect_polygons = self.parse_options.get('collect_polygons', False)
+
+        for i, data in enumerate(self.meta.meshes):
+            mesh = self.mesh_cls(data['name'], has_faces=collect_faces, has_polygons=collect_polygons)
+
+            for name in data['materials']:
+                material = self.wavefront.materials.get(name)
+                if material is None:
+                    material = Material(name=name, is_default=True)
+                    self.wavefront.materials[name] = material
+                mesh.add_material(material)
+
+            if i in self._faces:
+                mesh.faces = [list(face) for face in zip(*[iter(self._faces[i])] * 3)]
+
+            for name in ELEMENT_BUFFERS:
+                if (i, name) in self._elements:
+                    setattr(mesh, name, list(self._elements[i, name]))
+
+            if (i, "polygon_offsets") in self._elements:
+                indices, offsets = self._elements[i, "polygon_indices"], self._elements[i, "polygon_offsets"]
+                if self.storage == STORAGE_LIST:
+                    indices, offsets = array.array('i', indices), array.array('i', offsets)
+                mesh.polygons = Polygons(indices, offsets)
+
+            for name in data.get('groups', ()):
+                mesh.add_group(name)
+            for value in data.get('smoothing_groups', ()):
+                mesh.add_smoothing_group(value)
+
+            self.wavefront.add_mesh(mesh)
+
+    def _rows(self, values, width):
+        """Reshape flat attribute data into rows"""
+        if self.storage == STORAGE_NUMPY:
+            return values.reshape(-1, width)
+
+        it = iter(values)
+        return list(zip(*[it] * width))
+
     def _parse_mtllibs(self):
         """Load mtl files"""
         for mtllib in self.meta.mtllibs:
             try:
-                materials = self.material_parser_cls(
+                materials = load_library(
                     self.path / mtllib,
+                    self.material_parser_cls,
+                    material_cache=self.material_cache,
                     encoding=self.encoding,
-                    strict=self.strict).materials
+                    strict=self.strict)
             except IOError:
-                raise IOError("Failed to load mtl file:".format(self.path / mtllib))
+                raise IOError("Failed to load mtl file: {}".format(self.path / mtllib))
 
             for name, material in materials.items():
                 self.wavefront.materials[name] = material
 
 
 class CacheWriter:
+    # Byte alignment of each buffer in uncompressed cache files
+    alignment = 16
 
-    def __init__(self, file_name, wavefront):
+    def __init__(self, file_name, wavefront, cache_format=CACHE_GZIP, parse_options=None,
+                 normals=(), tex_coords=()):
+        """
+        :param file_name: The obj file the cache is created for
+        :param wavefront: The parsed wavefront instance
+        :param cache_format: "gzip" or "raw"
+        :param parse_options: Parse options affecting the cached data
+        :param normals: Normals for the entire file
+        :param tex_coords: Texture coordinates for the entire file
+        """
+        validate_cache_format(cache_format)
         self.file_name = file_name
         self.wavefront = wavefront
-        self.meta = Meta()
+        self.cache_format = cache_format
+        self.normals = normals
+        self.tex_coords = tex_coords
+        self.meta = Meta(cache_format=cache_format, parse_options=parse_options or {})
 
     def write(self):
+        attributes = [
+            ("vertices", self.wavefront.vertices),
+            ("normals", self.normals),
+            ("tex_coords", self.tex_coords),
+        ]
+        widths = {name: self._row_width(rows) for name, rows in attributes}
+        if None in widths.values():
+            logger.warning("%s has attributes of mixed sizes. No cache will be created.", self.file_name)
+            return
+
         logger.info("%s creating cache", self.file_name)
 
         self.meta.mtllibs = self.wavefront.mtllibs
 
         offset = 0
-        fd = gzip.open(cache_name(self.file_name), 'wb')
+        if self.cache_format == CACHE_RAW:
+            fd = open(cache_name(self.file_name), 'wb')
+        else:
+            fd = gzip.open(cache_name(self.file_name), 'wb')
 
         for mat in self.wavefront.materials.values():
 
             if len(mat.vertices) == 0:
                 continue
 
+            offset = self._pad(fd, offset)
             self.meta.add_vertex_buffer(
                 mat.name,
                 mat.vertex_format,
                 offset,
                 len(mat.vertices) * 4,
             )
-            offset += len(mat.vertices) * 4
-            fd.write(struct.pack('{}f'.format(len(mat.vertices)), *mat.vertices))
+            offset += self._write_buffer(fd, mat.vertices, 'f')
+
+        for mat in self.wavefront.materials.values():
+
+            if len(mat.vertices) == 0 or len(mat.indices) == 0:
+                continue
+
+            offset = self._pad(fd, offset)
+            self.meta.add_index_buffer(mat.name, offset, len(mat.indices) * 4)
+            offset += self._write_buffer(fd, mat.indices, 'I')
+
+        for mat in self.wavefront.materials.values():
+
+            if len(mat.corner_indices) == 0:
+                continue
+
+            offset = self._pad(fd, offset)
+            self.meta.add_corner_buffer(mat.name, mat.vertex_format, offset, len(mat.corner_indices) * 4)
+            offset += self._write_buffer(fd, mat.corner_indices, 'i')
+
+        for name, rows in attributes:
+            if len(rows) == 0:
+                continue
+
+            offset = self._pad(fd, offset)
+            length = self._write_buffer(fd, self._flatten(rows), 'f')
+            self.meta.add_attribute_buffer(name, widths[name], offset, length)
+            offset += length
+
+        for mesh in self.wavefront.mesh_list:
+            faces = None
+            if mesh.has_faces and len(mesh.faces) > 0:
+                offset = self._pad(fd, offset)
+                length = self._write_buffer(fd, self._flatten(mesh.faces), 'I')
+                faces = {"byte_offset": offset, "byte_length": length}
+                offset += length
+
+            buffers = {name: getattr(mesh, name) for name in ELEMENT_BUFFERS}
+            if mesh.polygons is not None and len(mesh.polygons) > 0:
+                buffers["polygon_indices"] = mesh.polygons.indices
+                buffers["polygon_offsets"] = mesh.polygons.offsets
+
+            elements = {}
+            for name, values in buffers.items():
+                if len(values) > 0:
+                    offset = self._pad(fd, offset)
+                    length = self._write_buffer(fd, values, MESH_BUFFERS[name])
+                    elements[name] = {"byte_offset": offset, "byte_length": length}
+                    offset += length
+
+            self.meta.add_mesh(mesh.name, [m.name for m in mesh.materials], faces,
+                               groups=mesh.groups, smoothing_groups=mesh.smoothing_groups, **elements)
 
         fd.close()
         self.meta.write(meta_name(self.file_name))
 
+    def _pad(self, fd, offset):
+        """Align the next buffer in uncompressed files. Returns the new offset."""
+        if self.cache_format != CACHE_RAW:
+            return offset
+
+        padding = -offset % self.alignment
+        fd.write(b'\0' * padding)
+        return offset + padding
+
+    @staticmethod
+    def _row_width(rows):
+        """The width of all rows or None if the widths differ"""
+        if is_array(rows):
+            return rows.shape[1] if rows.ndim == 2 else 1
+
+        widths = set(map(len, rows))
+        if len(widths) > 1:
+            return None
+
+        return widths.pop() if widths else 0
+
+    @staticmethod
+    def _flatten(rows):
+        """Flatten rows of values"""
+        if is_array(rows):
+            return rows.reshape(-1)
+
+        return list(itertools.chain.from_iterable(rows))
+
+    @staticmethod
+    def _write_buffer(fd, values, typecode):
+        """Write float32 (``f``), uint32 (``I``) or int32 (``i``) values. Returns the byte length."""
+        if is_array(values):
+            fd.write(values.astype(NUMPY_TYPES[typecode], copy=False).tobytes())
+        elif isinstance(values, array.array) and values.typecode == typecode:
+            # Arrays with storage="array" are written without a copy
+            fd.write(values)
+        else:
+            fd.write(array.array(typecode, values).tobytes())
+
+        return len(values) * 4
+
 
 class Meta:
     """
     Metadata for binary obj cache files
     """
-    format_version = "0.1"
+    format_version = "0.2"
 
     def __init__(self, **kwargs):
         self._mtllibs = kwargs.get('mtllibs') or []
         self._vertex_buffers = kwargs.get('vertex_buffers') or []
-        self._version = kwargs.get('version') or self.format_version
+        self._index_buffers = kwargs.get('index_buffers') or []
+        self._corner_buffers = kwargs.get('corner_buffers') or []
+        self._attribute_buffers = kwargs.get('attribute_buffers') or []
+        self._meshes = kwargs.get('meshes') or []
+        self._parse_options = kwargs.get('parse_options') or {}
+        self._cache_format = kwargs.get('cache_format') or CACHE_GZIP
+        self._version = kwargs.get('version', self.format_version)
         self._created_at = kwargs.get('created_at') or datetime.now().isoformat()
 
     def add_vertex_buffer(self, material, vertex_format, byte_offset, byte_length):
@@ -187,11 +551,66 @@ class Meta:
             "byte_length": byte_length,
         })
 
+    def add_index_buffer(self, material, byte_offset, byte_length):
+        """Add an index buffer of unsigned 32 bit integers"""
+        self._index_buffers.append({
+            "material": material,
+            "byte_offset": byte_offset,
+            "byte_length": byte_length,
+        })
+
+    def add_corner_buffer(self, material, vertex_format, byte_offset, byte_length):
+        """Add a buffer of signed 32 bit v, vt and vn index triplets collected in topology mode"""
+        self._corner_buffers.append({
+            "material": material,
+            "vertex_format": vertex_format,
+            "byte_offset": byte_offset,
+            "byte_length": byte_length,
+        })
+
+    def add_attribute_buffer(self, name, width, byte_offset, byte_length):
+        """Add a buffer of float rows such as vertices, normals or texture coordinates"""
+        self._attribute_buffers.append({
+            "name": name,
+            "width": width,
+            "byte_offset": byte_offset,
+            "byte_length": byte_length,
+        })
+
+    def add_mesh(self, name, materials, faces=None, lines=None, points=None, groups=(), smoothing_groups=(),
+                 polygon_indices=None, polygon_offsets=None):
+        """
+        Add a mesh
+
+        :param name: Name of the mesh
+        :param materials: List of material names used by the mesh
+        :param faces: byte_offset and byte_length of the triangle index buffer if faces are collected
+        :param lines: byte_offset and byte_length of the line segment index buffer
+        :param points: byte_offset and byte_length of the point index buffer
+        :param groups: Group names of the faces
+        :param smoothing_groups: Smoothing groups of the faces
+        :param polygon_indices: byte_offset and byte_length of the int32 polygon vertex indices
+        :param polygon_offsets: byte_offset and byte_length of the int32 polygon offsets
+        """
+        self._meshes.append({
+            "name": name,
+            "materials": materials,
+            "faces": faces,
+            "lines": lines,
+            "points": points,
+            "groups": list(groups),
+            "smoothing_groups": list(smoothing_groups),
+            "polygon_indices": polygon_indices,
+            "polygon_offsets": polygon_offsets,
+        })
+
     @classmethod
     def from_file(cls, path):
         with open(str(path), 'r') as fd:
             data = json.loads(fd.read())
 
+        # Files without a version are from an unknown format
+        data.setdefault('version', None)
         return cls(**data)
 
     def write(self, path):
@@ -203,6 +622,12 @@ class Meta:
                     "version": self._version,
                     "mtllibs": self._mtllibs,
                     "vertex_buffers": self._vertex_buffers,
+                    "cache_format": self._cache_format,
+                    "parse_options": self._parse_options,
+                    "index_buffers": self._index_buffers,
+                    "corner_buffers": self._corner_buffers,
+                    "attribute_buffers": self._attribute_buffers,
+                    "meshes": self._meshes,
                 },
                 indent=2,
             ))
@@ -219,6 +644,30 @@ class Meta:
     def vertex_buffers(self):
         return self._vertex_buffers
     
+    @property
+    def index_buffers(self):
+        return self._index_buffers
+
+    @property
+    def corner_buffers(self):
+        return self._corner_buffers
+
+    @property
+    def cache_format(self):
+        return self._cache_format
+
+    @property
+    def attribute_buffers(self):
+        return self._attribute_buffers
+
+    @property
+    def meshes(self):
+        return self._meshes
+
+    @property
+    def parse_options(self):
+        return self._parse_options
+
     @property
     def mtllibs(self):
         return self._mtllibs
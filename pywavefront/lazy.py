@@ -0,0 +1,417 @@
+# ----------------------------------------------------------------------------
+# PyWavefront
+# Copyright (c) 2018 Kurt Yoder
+# All rights reserved.
+#
+# Redistribution and use in source and binary forms, with or without
+# modification, are permitted provided that the following conditions
+# are met:
+#
+#  * Redistributions of source code must retain the above copyright
+#    notice, this list of conditions and the following disclaimer.
+#  * Redistributions in binary form must reproduce the above copyright
+#    notice, this list of conditions and the following disclaimer in
+#    the documentation and/or other materials provided with the
+#    distribution.
+#  * Neither the name of PyWavefront nor the names of its
+#    contributors may be used to endorse or promote products
+#    derived from this software without specific prior written
+#    permission.
+#
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS
+# "AS IS" AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT
+# LIMITED TO, THE IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS
+# FOR A PARTICULAR PURPOSE ARE DISCLAIMED. IN NO EVENT SHALL THE
+# COPYRIGHT OWNER OR CONTRIBUTORS BE LIABLE FOR ANY DIRECT, INDIRECT,
+# INCIDENTAL, SPECIAL, EXEMPLARY, OR CONSEQUENTIAL DAMAGES (INCLUDING,
+# BUT NOT LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS OR SERVICES;
+# LOSS OF USE, DATA, OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER
+# CAUSED AND ON ANY THEORY OF LIABILITY, WHETHER IN CONTRACT, STRICT
+# LIABILITY, OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN
+# ANY WAY OUT OF THE USE OF THIS SOFTWARE, EVEN IF ADVISED OF THE
+# POSSIBILITY OF SUCH DAMAGE.
+# ----------------------------------------------------------------------------
+"""
+Lazy loading of selected meshes using a byte offset index of the obj file.
+
+The index is created by scanning the file once and is stored next to the
+cache files as ``<file>.index.json``. It records the byte offset of every
+``o``, ``g``, ``usemtl`` and ``mtllib`` statement together with the number
+of ``v``, ``vt``, ``vn`` and ``f`` statements before it. With
+``Wavefront(..., lazy=True)`` only the materials are loaded up front and
+a mesh is parsed from its byte range the first time it is accessed
+through ``wavefront.meshes``.
+"""
+import collections.abc
+import gzip
+import json
+import logging
+import os
+import re
+from datetime import datetime
+from pathlib import Path
+
+from pywavefront import bgzf, parallel
+from pywavefront.storage import STORAGE_NUMPY
+
+logger = logging.getLogger("pywavefront")
+
+
+def index_name(path):
+    """Generate the name of the object index file"""
+    return path.with_suffix(path.suffix + '.index.json')
+
+
+def load(parser):
+    """
+    Load the materials of an ``ObjParser`` and replace the meshes
+    of its wavefront with meshes parsed on first access
+
+    :param parser: The ObjParser
+    """
+    index = ObjectIndex.load(parser.file_name, encoding=parser.encoding)
+
+    for mtllib in index.mtllibs:
+        parser.values = ["mtllib", mtllib]
+        parser.parse_mtllib()
+
+    parser.wavefront.meshes = LazyMeshes(parser, index)
+
+
+def load_mesh(parser, index, start, end, section):
+    """
+    Parse a single mesh from its byte range.
+    The materials of the mesh are copies only holding its vertex data.
+
+    :param parser: The ObjParser of the lazy wavefront
+    :param index: The ObjectIndex of the file
+    :param start: Byte offset of the mesh
+    :param end: Byte offset after the mesh
+    :param section: Index entry with the counts and material at the start of the mesh
+    """
+    dtype = "float32" if parser.storage == STORAGE_NUMPY else "float64"
+    scene = type(parser.wavefront)(
+        parser.file_name,
+        strict=parser.strict,
+        encoding=parser.encoding,
+        create_materials=parser.create_materials,
+        collect_faces=parser.collect_faces,
+        parse=False,
+        storage=parser.storage,
+        indexed=parser.indexed,
+    )
+    scene.materials = {name: material.copy() for name, material in parser.wavefront.materials.items()}
+
+    # Restore the material active at the start of the mesh
+    if section["material"] is not None:
+        scene.parser.values = ["usemtl", section["material"]]
+        scene.parser.parse_usemtl()
+
+    chunk = parallel.parse_chunk(parser.file_name, start, end, strict=parser.strict,
+                                 encoding=parser.encoding, dtype=dtype)
+    counts = [section["v"], section["vt"], section["vn"]]
+    parallel.resolve_indices([chunk], counts)
+
+    # Faces can reference elements defined outside the mesh
+    lows, highs = face_index_ranges(chunk)
+    attributes = chunk[:3]
+    if any(low < count or high >= count + len(values)
+           for low, high, count, values in zip(lows, highs, counts, attributes) if high >= 0):
+        start, end, counts = index.attribute_range(lows, highs)
+        attributes = parallel.parse_chunk(parser.file_name, start, end, strict=parser.strict,
+                                          encoding=parser.encoding, dtype=dtype)[:3]
+
+    triangles = parallel.replay(scene.parser, [chunk], has_colors=attributes[0].shape[1] == 6)
+    parallel.build_materials(scene.parser, triangles, attributes, bases=counts)
+
+    return scene.mesh_list[0]
+
+
+def face_index_ranges(chunk):
+    """
+    Smallest and largest (v, vt, vn) index referenced by the faces in a chunk.
+    The largest index is -1 when nothing is referenced.
+    """
+    lows = [float("inf")] * 3
+    highs = [-1] * 3
+
+    for statement, data in chunk.statements:
+        if statement != "f" or len(data[2]) == 0:
+            continue
+
+        has_vt, has_vn, corners, _ = data
+        for column, used in enumerate((True, has_vt, has_vn)):
+            if used:
+                lows[column] = min(lows[column], int(corners[:, column].min()))
+                highs[column] = max(highs[column], int(corners[:, column].max()))
+
+    return lows, highs
+
+
+class LazyMeshes(collections.abc.MutableMapping):
+    """Meshes of a wavefront by name. Each mesh is parsed from the obj file on first access."""
+
+    def __init__(self, parser, index):
+        """
+        :param parser: The ObjParser of the lazy wavefront
+        :param index: The ObjectIndex of the file
+        """
+        self.parser = parser
+        self.index = index
+        # Like a regular parse the last mesh with a name wins
+        self._ranges = {name: (start, end, section) for name, start, end, section in index.objects()}
+        self._meshes = {}
+
+    def is_loaded(self, name):
+        """Has the mesh already been parsed?"""
+        return name in self._meshes
+
+    def __getitem__(self, name):
+        mesh = self._meshes.get(name)
+        if mesh is None:
+            if name not in self._ranges:
+                raise KeyError(name)
+
+            logger.info("%s: Loading mesh %s", self.parser.file_name, name)
+            mesh = self._meshes[name] = load_mesh(self.parser, self.index, *self._ranges[name])
+            self.parser.wavefront.mesh_list.append(mesh)
+
+        return mesh
+
+    def __setitem__(self, name, mesh):
+        self._meshes[name] = mesh
+
+    def __delitem__(self, name):
+        if name not in self._ranges and name not in self._meshes:
+            raise KeyError(name)
+
+        self._ranges.pop(name, None)
+        self._meshes.pop(name, None)
+
+    def __iter__(self):
+        yield from self._ranges
+        yield from (name for name in self._meshes if name not in self._ranges)
+
+    def __len__(self):
+        return len(self._ranges) + sum(1 for name in self._meshes if name not in self._ranges)
+
+
+class ObjectIndex:
+    """
+    Byte offsets of the ``o``, ``g``, ``usemtl`` and ``mtllib`` statements
+    in an obj file with the number of elements defined before each of them
+    """
+    format_version = "0.1"
+    # Number of bytes scanned at a time
+    chunk_size = 1 << 22
+    # Statements starting a new section
+    section_statements = ("o", "g", "usemtl", "usemat", "mtllib")
+    # Statements counted before each section
+    counted_statements = ("v", "vt", "vn", "f")
+
+    def __init__(self, **kwargs):
+        self._sections = kwargs.get('sections') or []
+        self._counts = kwargs.get('counts') or {name: 0 for name in self.counted_statements}
+        self._file_size = kwargs.get('file_size') or 0
+        # Size of the uncompressed data. Same as the file size for uncompressed files
+        self._data_size = kwargs.get('data_size') or self._file_size
+        self._file_mtime = kwargs.get('file_mtime') or 0
+        self._version = kwargs.get('version') or self.format_version
+        self._created_at = kwargs.get('created_at') or datetime.now().isoformat()
+
+    @classmethod
+    def load(cls, file_name, encoding="utf-8"):
+        """
+        Load the index of an obj file creating it if missing or outdated
+
+        :param file_name: Path to the obj file
+        :param encoding: Encoding of the obj file
+        """
+        file_name = Path(file_name)
+        path = index_name(file_name)
+
+        if path.exists():
+            index = cls.from_file(path)
+            if index.is_valid(file_name):
+                return index
+
+            logger.info("%s: Object index is outdated", file_name)
+
+        index = cls.build(file_name, encoding=encoding)
+        try:
+            index.write(path)
+        except IOError as ex:
+            logger.warning("%s: Could not write object index: %s", file_name, ex)
+
+        return index
+
+    @classmethod
+    def build(cls, file_name, encoding="utf-8"):
+        """
+        Scan an obj file for sections
+
+        :param file_name: Path to the obj file
+        :param encoding: Encoding of the obj file
+        """
+        stat = os.stat(str(file_name))
+        index = cls(file_size=stat.st_size, file_mtime=stat.st_mtime_ns)
+        pattern = re.compile(r'^(?:{})[ \t][^\n]*'.format(
+            "|".join(index.section_statements)).encode(), re.MULTILINE)
+
+        material = None
+        offset = 0
+        tail = b""
+
+        # Block compressed files are scanned from start to end with a regular gzip reader
+        opener = gzip.open if bgzf.is_block_gzip(file_name) else open
+
+        with opener(str(file_name), mode='rb') as fd:
+            while True:
+                data = fd.read(cls.chunk_size)
+                if not data:
+                    data, tail = tail, b""
+                    if not data:
+                        break
+                else:
+                    data = tail + data
+                    # Only scan complete lines
+                    end = data.rfind(b"\n") + 1
+                    data, tail = data[:end], data[end:]
+
+                position = 0
+                for match in pattern.finditer(data):
+                    index._count(data[position:match.start()])
+                    position = match.start()
+
+                    values = match.group().decode(encoding).split()
+                    if len(values) < 2:
+                        continue
+
+                    statement = values[0]
+                    name = values[1] if statement == "o" else " ".join(values[1:])
+                    index.add_section(statement, name, offset + position, material)
+
+                    if statement in ("usemtl", "usemat"):
+                        material = name
+
+                index._count(data[position:])
+                offset += len(data)
+
+        index._data_size = offset
+        return index
+
+    def _count(self, data):
+        """Count the statements in a range of complete lines"""
+        data = b"\n" + data
+        for statement in self.counted_statements:
+            key = b"\n" + statement.encode()
+            self._counts[statement] += data.count(key + b" ") + data.count(key + b"\t")
+
+    def add_section(self, statement, name, byte_offset, material):
+        """
+        Add a section using the current element counts
+
+        :param statement: The statement starting the section
+        :param name: The name or value of the statement
+        :param byte_offset: Position of the statement in the file
+        :param material: Name of the active material
+        """
+        section = {
+            "statement": statement,
+            "name": name,
+            "byte_offset": byte_offset,
+            "material": material,
+        }
+        section.update(self._counts)
+        self._sections.append(section)
+
+    def is_valid(self, file_name):
+        """Was this index created from the current version of the file?"""
+        stat = os.stat(str(file_name))
+        return (self._version == self.format_version
+                and self._file_size == stat.st_size
+                and self._file_mtime == stat.st_mtime_ns)
+
+    def objects(self):
+        """
+        Byte ranges of the meshes in the file as ``(name, start, end, section)`` tuples
+        where ``section`` is the index entry of the ``o`` statement.
+        Faces before the first ``o`` statement belong to an anonymous mesh.
+        """
+        objects = [section for section in self._sections if section["statement"] == "o"]
+        ranges = []
+
+        first = objects[0] if objects else dict(self._counts, byte_offset=self._data_size)
+        if first["f"] > 0:
+            start = {"statement": None, "name": None, "byte_offset": 0, "material": None}
+            start.update({name: 0 for name in self.counted_statements})
+            ranges.append((None, 0, first["byte_offset"], start))
+
+        for section, following in zip(objects, objects[1:] + [None]):
+            end = following["byte_offset"] if following else self._data_size
+            ranges.append((section["name"], section["byte_offset"], end, section))
+
+        return ranges
+
+    def attribute_range(self, lows, highs):
+        """
+        Find a byte range defining all the elements between the given indices
+
+        :param lows: Smallest (v, vt, vn) index needed
+        :param highs: Largest (v, vt, vn) index needed or -1 when not needed
+        :return: start and end offset and the (v, vt, vn) counts before the start
+        """
+        keys = ("v", "vt", "vn")
+        start = dict({key: 0 for key in keys}, byte_offset=0)
+        end = self._data_size
+
+        for section in self._sections:
+            if all(section[key] <= low for key, low in zip(keys, lows)):
+                start = section
+
+            if all(section[key] > high for key, high in zip(keys, highs)):
+                end = section["byte_offset"]
+                break
+
+        return start["byte_offset"], end, [start[key] for key in keys]
+
+    @classmethod
+    def from_file(cls, path):
+        with open(str(path), 'r') as fd:
+            data = json.loads(fd.read())
+
+        return cls(**data)
+
+    def write(self, path):
+        """Save the index as json"""
+        with open(str(path), 'w') as fd:
+            fd.write(json.dumps(
+                {
+                    "created_at": self._created_at,
+                    "version": self._version,
+                    "file_size": self._file_size,
+                    "file_mtime": self._file_mtime,
+                    "data_size": self._data_size,
+                    "counts": self._counts,
+                    "sections": self._sections,
+                },
+                indent=2,
+            ))
+
+    @property
+    def version(self):
+        return self._version
+
+    @property
+    def sections(self):
+        return self._sections
+
+    @property
+    def counts(self):
+        """Number of v, vt, vn and f statements in the file"""
+        return self._counts
+
+    @property
+    def mtllibs(self):
+        """The material libraries in the order they are referenced"""
+        return [section["name"] for section in self._sections if section["statement"] == "mtllib"]
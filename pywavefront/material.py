@@ -31,7 +31,11 @@
 # ANY WAY OUT OF THE USE OF THIS SOFTWARE, EVEN IF ADVISED OF THE
 # POSSIBILITY OF SUCH DAMAGE.
 # ----------------------------------------------------------------------------
+import collections
+import copy
 import logging
+import os
+import threading
 from pathlib import Path
 
 from pywavefront.parser import Parser, auto_consume
@@ -42,6 +46,15 @@ logger = logging.getLogger("pywavefront")
 
 class Material:
     texture_cls = Texture
+    # Attributes holding Texture instances
+    texture_attributes = (
+        "texture",
+        "texture_ambient",
+        "texture_specular_color",
+        "texture_specular_highlight",
+        "texture_alpha",
+        "texture_bump",
+    )
 
     def __init__(self, name, is_default=False, has_faces=False):
         """
@@ -83,8 +96,14 @@ class Material:
         # Interleaved array of floats in GL_T2F_N3F_V3F format
         self.vertex_format = ""
         self.vertices = []
+        # Triangle indices into the vertices above when parsed with indexed=True
+        self.indices = []
+        # Flat v, vt and vn index triplets of every triangle corner when parsed with topology=True.
+        # Missing texture coordinates and normals are -1. See :meth:`ObjParser.build_vertices`
+        self.corner_indices = []
 
         self.gl_floats = None
+        self.gl_indices = None
 
     @property
     def has_normals(self):
@@ -98,6 +117,11 @@ class Material:
     def has_colors(self):
         return "C3F" in self.vertex_format
 
+    @property
+    def is_indexed(self):
+        """Is the vertex data indexed by an index buffer?"""
+        return len(self.indices) > 0
+
     @property
     def vertex_size(self):
         """How many float each vertex contains in the interleaved data"""
@@ -153,6 +177,126 @@ class Material:
     def unset_texture(self):
         self.texture = None
 
+    def copy(self):
+        """
+        Copy the material definition. Lighting values, textures and texture options
+        are copied so the copy can be modified independently.
+        Vertex data is not copied.
+        """
+        # Faster than copy.copy() for libraries with thousands of materials
+        material = self.__class__.__new__(self.__class__)
+        material.__dict__.update(self.__dict__)
+        material.diffuse = list(self.diffuse)
+        material.ambient = list(self.ambient)
+        material.specular = list(self.specular)
+        material.emissive = list(self.emissive)
+        material.vertices = []
+        material.indices = []
+        material.corner_indices = []
+        material.gl_floats = None
+        material.gl_indices = None
+
+        for name in self.texture_attributes:
+            texture = getattr(self, name)
+            if texture is not None:
+                texture_copy = texture.__class__.__new__(texture.__class__)
+                texture_copy.__dict__.update(texture.__dict__)
+                texture_copy._options = copy.copy(texture._options)
+                setattr(material, name, texture_copy)
+
+        return material
+
+
+class MaterialLibraryCache:
+    """
+    Shares parsed material libraries between obj parsers.
+    Every parser gets its own copies of the materials.
+
+    Libraries are parsed again when the size or modification time of
+    the mtl file changes. The least recently used libraries are removed
+    when more than ``max_libraries`` are cached.
+    """
+
+    def __init__(self, max_libraries=64):
+        """
+        :param max_libraries: Maximum number of parsed libraries to keep
+        """
+        if not isinstance(max_libraries, int) or max_libraries < 1:
+            raise ValueError("max_libraries must be a positive integer, got {}".format(max_libraries))
+
+        self.max_libraries = max_libraries
+        self._libraries = collections.OrderedDict()
+        self._lock = threading.Lock()
+
+    def load(self, file_name, parser_cls=None, **kwargs):
+        """
+        Get copies of the materials in a material library
+
+        :param file_name: Path to the mtl file
+        :param parser_cls: The material parser class
+        :param kwargs: Arguments for the material parser
+        :return: Dictionary of materials by name
+        """
+        parser_cls = parser_cls or MaterialParser
+        path = Path(file_name).resolve()
+        stat = os.stat(str(path))
+        version = (stat.st_mtime_ns, stat.st_size)
+        key = (str(path), parser_cls, tuple(sorted(kwargs.items())))
+
+        with self._lock:
+            entry = self._libraries.get(key)
+            if entry is not None and entry[0] == version:
+                self._libraries.move_to_end(key)
+                materials = entry[1]
+            else:
+                materials = None
+
+        # Parsed outside the lock so other libraries can be loaded in the meantime
+        if materials is None:
+            materials = parser_cls(file_name, **kwargs).materials
+
+            with self._lock:
+                self._libraries[key] = version, materials
+                self._libraries.move_to_end(key)
+                while len(self._libraries) > self.max_libraries:
+                    self._libraries.popitem(last=False)
+
+        return {name: material.copy() for name, material in materials.items()}
+
+    def clear(self):
+        """Remove all cached material libraries"""
+        with self._lock:
+            self._libraries.clear()
+
+    def __len__(self):
+        return len(self._libraries)
+
+
+# Material libraries shared by all parsers in the process
+default_library_cache = MaterialLibraryCache()
+
+
+def load_library(file_name, parser_cls=None, material_cache=None, **kwargs):
+    """
+    Parse a material library or get it from a material library cache
+
+    :param file_name: Path to the mtl file
+    :param parser_cls: The material parser class
+    :param material_cache: A ``MaterialLibraryCache``. None uses ``default_library_cache``
+                           and False always parses the file
+    :param kwargs: Arguments for the material parser
+    :return: Dictionary of materials by name
+    """
+    parser_cls = parser_cls or MaterialParser
+
+    if material_cache is False:
+        return parser_cls(file_name, **kwargs).materials
+
+    if material_cache is None:
+        material_cache = default_library_cache
+
+    return material_cache.load(file_name, parser_cls, **kwargs)
+
 
 class MaterialParser(Parser):
     """Object to parse lines of a materials definition file."""
@@ -31,13 +31,14 @@
 # ANY WAY OUT OF THE USE OF THIS SOFTWARE, EVEN IF ADVISED OF THE
 # POSSIBILITY OF SUCH DAMAGE.
 # ----------------------------------------------------------------------------
+from pywavefront.polygons import Polygons
 
 
 class Mesh:
     """This is a basic mesh for drawing using OpenGL. Interestingly, it does
     not contain its own vertices. These are instead drawn via materials."""
 
-    def __init__(self, name=None, has_faces=False):
+    def __init__(self, name=None, has_faces=False, has_polygons=False):
         self.name = name
         self.materials = []
 
@@ -50,13 +51,37 @@ class Mesh:
         # algorithm.
         self.faces = []
 
+        # If has_polygons, the faces without triangulation in CSR layout. See :class:`Polygons`
+        self.polygons = Polygons() if has_polygons else None
+
+        # Group names (``g`` statements) and smoothing groups (``s`` statements) of the faces
+        # in the order they are first used. Smoothing group 0 means smoothing is off
+        self.groups = []
+        self.smoothing_groups = []
+        self._group_names = set()
+
+        # Zero based vertex indices of line segment pairs (``l`` statements) and points (``p`` statements)
+        self.lines = []
+        self.points = []
+
+    @property
+    def materials(self):
+        """list: Materials used by the mesh in the order they were added"""
+        return self._materials
+
+    @materials.setter
+    def materials(self, value):
+        self._materials = value
+        # Names of the materials for fast lookups
+        self._material_names = {material.name for material in value}
+
     def has_material(self, new_material):
         """Determine whether we already have a material of this name."""
-        for material in self.materials:
-            if material.name == new_material.name:
-                return True
+        if len(self._material_names) != len(self.materials):
+            # The material list was modified directly
+            self._material_names = {material.name for material in self.materials}
 
-        return False
+        return new_material.name in self._material_names
 
     def add_material(self, material):
         """Add a material to the mesh, IF it's not already present."""
@@ -64,3 +89,17 @@ class Mesh:
             return
 
         self.materials.append(material)
+        self._material_names.add(material.name)
+
+    def add_group(self, name):
+        """Add a group name to the mesh, IF it's not already present."""
+        if name in self._group_names:
+            return
+
+        self._group_names.add(name)
+        self.groups.append(name)
+
+    def add_smoothing_group(self, value):
+        """Add a smoothing group to the mesh, IF it's not already present."""
+        if value not in self.smoothing_groups:
+            self.smoothing_groups.append(value)
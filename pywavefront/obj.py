@@ -31,27 +31,85 @@
 # ANY WAY OUT OF THE USE OF THIS SOFTWARE, EVEN IF ADVISED OF THE
 # POSSIBILITY OF SUCH DAMAGE.
 # ----------------------------------------------------------------------------
-from collections import namedtuple
+import copy
+import io
 import logging
 import time
+import warnings
 
 from pywavefront.exceptions import PywavefrontException
 from pywavefront.parser import Parser, auto_consume
-from pywavefront.material import Material, MaterialParser
+from pywavefront.bgzf import supports_ranges
+from pywavefront.material import Material, MaterialParser, load_library
 from pywavefront.mesh import Mesh
-from pywavefront.cache import Meta, CacheWriter, CacheLoader
+from pywavefront.polygons import triangle_fans
+from pywavefront.stats import ParseStats, timer
+from pywavefront.cache import Meta, CacheWriter, CacheLoader, cache_name, validate_cache_format
+from pywavefront import storage as storage_types
+from pywavefront.storage import numpy
 
 logger = logging.getLogger("pywavefront")
 
+# Vertex attributes that can be selected with the ``attributes`` parser option
+ATTRIBUTE_POSITION = "position"
+ATTRIBUTE_TEXCOORD = "texcoord"
+ATTRIBUTE_NORMAL = "normal"
+ATTRIBUTE_COLOR = "color"
+ATTRIBUTES = (ATTRIBUTE_POSITION, ATTRIBUTE_TEXCOORD, ATTRIBUTE_NORMAL, ATTRIBUTE_COLOR)
+
+
+def validate_attributes(attributes):
+    """
+    Ensure the attribute names are known and include positions
+
+    :param attributes: Iterable of attribute names or None for all attributes
+    :return: frozenset of the attribute names
+    """
+    if attributes is None:
+        return frozenset(ATTRIBUTES)
+
+    if isinstance(attributes, str):
+        attributes = (attributes,)
+
+    attributes = frozenset(attributes)
+    unknown = attributes.difference(ATTRIBUTES)
+    if unknown:
+        raise ValueError("Unknown vertex attributes {}. Supported attributes: {}".format(
+            ", ".join(sorted(unknown)), ", ".join(ATTRIBUTES)))
+    if ATTRIBUTE_POSITION not in attributes:
+        raise ValueError("Vertex attributes must include '{}'".format(ATTRIBUTE_POSITION))
+
+    return attributes
+
+
+def line_segments(indices):
+    """Split a polyline into the vertex index pairs of its segments, as drawn with GL_LINES"""
+    return [index for segment in zip(indices, indices[1:]) for index in segment]
+
+
+def strip_comment(values):
+    """The values of a statement before a trailing ``#`` comment"""
+    for i, value in enumerate(values):
+        if value.startswith('#'):
+            return values[:i]
+
+    return values
+
 
 class ObjParser(Parser):
     """This parser parses lines from .obj files."""
+    bulk_statements = ("v", "vt", "vn")
     material_parser_cls = MaterialParser
     cache_loader_cls = CacheLoader
     cache_writer_cls = CacheWriter
+    # Maximum number of consecutive faces consumed at a time. None consumes all of them
+    face_batch_size = None
 
     def __init__(self, wavefront, file_name, strict=False, encoding="utf-8",
-                 create_materials=False, collect_faces=False, parse=True, cache=False):
+                 create_materials=False, collect_faces=False, parse=True, cache=False,
+                 storage="list", indexed=False, cache_format="gzip", workers=1,
+                 lazy=False, material_cache=None, stats=False, stats_hook=None, collect_polygons=False,
+                 topology=False, attributes=None):
         """
         Create a new obj parser
         :param wavefront: The wavefront object
@@ -60,8 +118,56 @@ class ObjParser(Parser):
         :param encoding: Encoding to read the text files
         :param create_materials: Create materials if they don't exist
         :param cache: Cache the loaded obj files in binary format
+        :param cache_format: "gzip" compressed or memory mappable "raw" cache files
         :param parse: Should parse be called immediately or manually called later?
+        :param storage: How parsed geometry is stored: "list", "numpy" or "array"
+        :param indexed: Deduplicate vertices per material and collect an index buffer
+        :param workers: Number of processes parsing the file
+        :param lazy: Index the file and only parse meshes when accessed
+        :param material_cache: MaterialLibraryCache sharing parsed mtl files between parsers.
+                               None uses the process wide cache and False disables caching
+        :param stats: Record a ParseStats in ``wavefront.parse_stats``
+        :param stats_hook: Function called with the ParseStats when parsing is done. Enables ``stats``
+        :param collect_polygons: Collect the faces of every mesh without triangulation in ``mesh.polygons``
+        :param topology: Collect the v, vt and vn index triplets of the faces in ``material.corner_indices``
+                         instead of interleaved vertex data. See :meth:`build_vertices`
+        :param attributes: Vertex attributes to parse: "position", "texcoord", "normal" and "color".
+                           Texture coordinate and normal statements are skipped and the interleaved
+                           vertex data only contains the selected attributes. None parses all of them
         """
+        storage_types.validate_storage(storage)
+        validate_cache_format(cache_format)
+        attributes = validate_attributes(attributes)
+        if not isinstance(workers, int) or workers < 1:
+            raise ValueError("workers must be a positive integer, got {}".format(workers))
+        if lazy:
+            if cache or workers > 1:
+                raise ValueError("lazy loading can not be combined with cache or workers")
+            if not supports_ranges(file_name):
+                raise ValueError("lazy loading is only supported for uncompressed or block compressed gzip files")
+        if collect_polygons and (workers > 1 or lazy):
+            raise ValueError("collect_polygons can not be combined with workers or lazy loading")
+        if topology and (indexed or workers > 1 or lazy):
+            raise ValueError("topology mode can not be combined with indexed, workers or lazy loading")
+        if len(attributes) < len(ATTRIBUTES) and (workers > 1 or lazy):
+            raise ValueError("attributes can not be combined with workers or lazy loading")
+        if (stats or stats_hook is not None) and (workers > 1 or lazy):
+            raise ValueError("stats can not be combined with workers or lazy loading")
+        if workers > 1:
+            storage_types.require_numpy("workers > 1")
+        if lazy:
+            storage_types.require_numpy("lazy=True")
+
+        if topology and numpy is not None:
+            # Consecutive faces are converted as blocks. See ``consume_face_indices``
+            self.bulk_statements = self.bulk_statements + ("f",)
+
+        # Blocks of unused attributes are dropped while reading the file
+        self.skip_statements = tuple(statement for statement, attribute in (
+            ("vt", ATTRIBUTE_TEXCOORD),
+            ("vn", ATTRIBUTE_NORMAL),
+        ) if attribute not in attributes)
+
         super(ObjParser, self).__init__(file_name, strict=strict, encoding=encoding)
         self.wavefront = wavefront
 
@@ -69,155 +175,393 @@ class ObjParser(Parser):
         self.material = None
         self.create_materials = create_materials
         self.collect_faces = collect_faces
+        self.collect_polygons = collect_polygons
+        self.topology = topology
+        self.attributes = attributes
         self.cache = cache
+        self.cache_format = cache_format
         self.cache_loaded = None
+        self.storage = storage
+        self.indexed = indexed
+        self.workers = workers
+        self.lazy = lazy
+        self.material_cache = material_cache
+        self.stats_hook = stats_hook
+        if stats or stats_hook is not None:
+            self.stats = ParseStats(self.file_name)
+        # Maps (v, vt, vn) index tuples to the vertex index in each material when indexed
+        self.index_maps = {}
+        # Resolved face corners for each vertex format shared by consecutive runs of faces
+        self.corner_caches = {}
+
+        # Active group names (``g``) and smoothing group (``s``) registered on meshes with faces
+        self.group = None
+        self.smoothing_group = None
 
         # Stores normals and texcoords for the entire file
         self.normals = []
         self.tex_coords = []
 
+        # With numpy storage the geometry is collected as float32 blocks
+        self.use_arrays = storage == storage_types.STORAGE_NUMPY
+        # With array storage the interleaved data of every corner is packed as float32 bytes once
+        self.pack_vertices = storage == storage_types.STORAGE_ARRAY and not topology
+        if self.use_arrays:
+            self.text_prefixes = ("v ", "vt ", "vn ")
+        self.vertex_builder = storage_types.ArrayBuilder(3)
+        self.normal_builder = storage_types.ArrayBuilder(3)
+        self.tex_coord_builder = storage_types.ArrayBuilder(2)
+
         if parse:
             self.parse()
 
+    def __getstate__(self):
+        """The material cache is local to the process"""
+        state = super(ObjParser, self).__getstate__()
+        if state['material_cache'] is not False:
+            state['material_cache'] = None
+        return state
+
     def parse(self):
         """Trigger cache load or call superclass parse()"""
         start = time.time()
+        if self.stats is not None:
+            self.stats.begin()
 
         if self.cache:
             self.load_cache()
 
-        if not self.cache_loaded:
-            super(ObjParser, self).parse()
+        if self.lazy:
+            self.parse_lazy()
+        elif not self.cache_loaded:
+            if self.workers > 1 and supports_ranges(self.file_name):
+                self.parse_parallel()
+            else:
+                super(ObjParser, self).parse()
+
+            if self.stats is not None:
+                self.stats.add_file(self.file_name)
+
+        self.finish_parse()
 
         logger.info("%s: Load time: %s", self.file_name, time.time() - start)
 
+    def finish_parse(self):
+        """Release the parse state and convert the geometry to the configured storage"""
+        # The lookup tables are only needed while parsing
+        self.index_maps = {}
+        self.corner_caches = {}
+
+        if self.storage == storage_types.STORAGE_NUMPY:
+            with timer(self.stats, 'convert_time'):
+                self.convert_storage()
+        elif self.storage == storage_types.STORAGE_ARRAY and not self.cache_loaded:
+            with timer(self.stats, 'convert_time'):
+                self.convert_buffers()
+
+        if self.stats is not None:
+            self.stats.end()
+            if self.stats_hook is not None:
+                self.stats_hook(self.stats)
+
+    def parse_parallel(self):
+        """Parse the file with multiple processes. See :py:mod:`pywavefront.parallel`"""
+        # Imported here since the parallel parser extends this class
+        from pywavefront import parallel
+
+        parallel.parse(self, self.workers)
+
+        if self.auto_post_parse:
+            self.post_parse()
+
+    def parse_lazy(self):
+        """Load the materials and parse meshes on first access. See :py:mod:`pywavefront.lazy`"""
+        # Imported here since the lazy loader uses the parallel parser extending this class
+        from pywavefront import lazy
+
+        lazy.load(self)
+
+    def iter_meshes(self):
+        """
+        Parse the file yielding every mesh as soon as all its faces are parsed.
+        A mesh is complete when the next ``o`` statement or the end of the file is reached.
+
+        Yielded meshes are removed from the wavefront and their materials are
+        copies only holding the vertex data of that mesh, so the memory used
+        is bounded by the largest mesh. Positions, normals and texture
+        coordinates are kept since faces can reference them from any mesh.
+        """
+        mesh = None
+
+        for _ in self.iter_parse():
+            if self.mesh is not mesh:
+                if mesh is not None:
+                    yield self.detach_mesh(mesh)
+                mesh = self.mesh
+
+        # ``parse_f`` reads past the end of the file without reaching a yield,
+        # so a mesh created by the last faces of the file is only seen here
+        if self.mesh is not mesh and mesh is not None:
+            yield self.detach_mesh(mesh)
+
+        if self.mesh is not None:
+            yield self.detach_mesh(self.mesh)
+
+    def detach_mesh(self, mesh):
+        """Remove a completed mesh from the wavefront moving its vertex data to material copies"""
+        if self.wavefront.meshes.get(mesh.name) is mesh:
+            del self.wavefront.meshes[mesh.name]
+        self.wavefront.mesh_list.remove(mesh)
+
+        self.corner_caches = {}
+        materials = []
+        for material in mesh.materials:
+            detached = copy.copy(material)
+            material.vertices = []
+            material.indices = []
+            material.corner_indices = []
+            self.index_maps.pop(material.name, None)
+
+            if self.storage == storage_types.STORAGE_NUMPY:
+                detached.vertices = storage_types.as_float_array(detached.vertices)
+                detached.indices = storage_types.as_index_array(detached.indices)
+                if self.topology:
+                    detached.corner_indices = storage_types.as_int_array(detached.corner_indices)
+            elif self.storage == storage_types.STORAGE_ARRAY:
+                detached.vertices = storage_types.as_float_buffer(detached.vertices)
+                detached.indices = storage_types.as_index_buffer(detached.indices)
+
+            materials.append(detached)
+
+        mesh.materials = materials
+        if mesh.polygons is not None and self.storage == storage_types.STORAGE_NUMPY:
+            mesh.polygons = mesh.polygons.as_numpy()
+        return mesh
+
     def load_cache(self):
         """Loads the file using cached data"""
-        self.cache_loaded = self.cache_loader_cls(
+        loader = self.cache_loader_cls(
             self.file_name,
             self.wavefront,
             strict=self.strict,
             create_materials=self.create_materials,
             encoding=self.encoding,
             parse=self.parse,
-        ).parse()
+            storage=self.storage,
+            parse_options=self.parse_options(),
+            material_cache=self.material_cache,
+        )
+        with timer(self.stats, 'cache_load_time'):
+            self.cache_loaded = loader.parse()
+
+        if self.cache_loaded:
+            self.normals = loader.normals
+            self.tex_coords = loader.tex_coords
+
+            if self.stats is not None:
+                self.stats.cache_loaded = True
+                self.stats.add_file(cache_name(self.file_name))
+
+    def parse_options(self):
+        """Options changing the parse result. A cache is only used if created with the same options."""
+        return {
+            "collect_faces": self.collect_faces,
+            "indexed": self.indexed,
+            "collect_polygons": self.collect_polygons,
+            "topology": self.topology,
+            "attributes": sorted(self.attributes),
+        }
+
+    def convert_storage(self):
+        """
+        Convert the collected geometry to contiguous float32 numpy arrays.
+        Vertices become a (n, 3) or (n, 6) array depending on vertex colors,
+        normals (n, 3), texture coordinates (n, 2) and every material's
+        interleaved data a flat array.
+        """
+        if self.vertex_builder.blocks or self.normal_builder.blocks or self.tex_coord_builder.blocks:
+            self.wavefront.vertices = self.vertex_builder.array()
+            self.normals = self.normal_builder.array()
+            self.tex_coords = self.tex_coord_builder.array()
+        else:
+            self.wavefront.vertices = storage_types.as_float_matrix(self.wavefront.vertices, 3)
+            self.normals = storage_types.as_float_matrix(self.normals, 3)
+            self.tex_coords = storage_types.as_float_matrix(self.tex_coords, 2)
+
+        for material in self.wavefront.materials.values():
+            material.vertices = storage_types.as_float_array(material.vertices)
+            material.indices = storage_types.as_index_array(material.indices)
+            if self.topology:
+                material.corner_indices = storage_types.as_int_array(material.corner_indices)
+
+        for mesh in self.wavefront.mesh_list:
+            if mesh.polygons is not None:
+                mesh.polygons = mesh.polygons.as_numpy()
+
+    def convert_buffers(self):
+        """
+        Store the interleaved data and indices of every material in
+        float32 and uint32 ``array.array`` objects supporting the buffer protocol
+        """
+        for material in self.wavefront.materials.values():
+            material.vertices = storage_types.as_float_buffer(material.vertices)
+            material.indices = storage_types.as_index_buffer(material.indices)
+
+    def build_vertices(self, materials=None):
+        """
+        Build the interleaved vertex data of every material parsed with ``topology=True``
+        from its corner indices. The result is the same as parsing without topology mode.
+
+        :param materials: Materials to build instead of all materials, such as the materials of a mesh
+                          yielded by :meth:`iter_meshes`
+        """
+        if materials is None:
+            materials = self.wavefront.materials.values()
+
+        sources = self.wavefront.vertices, self.tex_coords, self.normals
+        for material in materials:
+            if len(material.corner_indices) == 0:
+                continue
+
+            if self.storage == storage_types.STORAGE_NUMPY:
+                vertices = self.gather_vertices(material, material.corner_indices, sources)
+                if vertices is not None:
+                    material.vertices = vertices
+                    continue
+
+            vertices = self.interleave_vertices(material, material.corner_indices, sources)
+            if self.storage == storage_types.STORAGE_NUMPY:
+                vertices = storage_types.as_float_array(vertices)
+            elif self.storage == storage_types.STORAGE_ARRAY:
+                vertices = storage_types.as_float_buffer(vertices)
+            material.vertices = vertices
+
+    def interleave_vertices(self, material, corner_indices, sources):
+        """
+        List of the interleaved vertex data of flat v, vt and vn index triplets in the material's vertex format
+
+        :param material: The material the corners belong to
+        :param corner_indices: Flat zero based v, vt, vn index triplets
+        :param sources: The positions, texture coordinates and normals the indices refer to
+        """
+        vertex_data = self.vertex_data_builder(material.has_uvs, material.has_colors, material.has_normals, sources)
+        corners = {}
+        vertices = []
+        for corner in zip(*[iter(corner_indices)] * 3):
+            data = corners.get(corner)
+            if data is None:
+                data = corners[corner] = vertex_data(*corner)
+            vertices.extend(data)
+
+        return vertices
+
+    def gather_vertices(self, material, corner_indices, sources):
+        """
+        Interleave the numpy attribute rows of flat v, vt and vn index triplets as a flat float32 array.
+        Returns None if corners reference missing texture coordinates or normals,
+        since these are left out of the vertex like when parsing.
+
+        :param material: The material the corners belong to
+        :param corner_indices: Flat zero based v, vt, vn index triplets
+        :param sources: The positions, texture coordinates and normals as numpy arrays or array builders
+        """
+        vertices, tex_coords, normals = sources
+        corners = storage_types.as_int_array(corner_indices).reshape(-1, 3)
+        if (material.has_uvs and (corners[:, 1] >= len(tex_coords)).any()) or \
+                (material.has_normals and (corners[:, 2] >= len(normals)).any()):
+            return None
+
+        positions = vertices[corners[:, 0]]
+
+        columns = []
+        if material.has_uvs:
+            columns.append(tex_coords[corners[:, 1]])
+        if material.has_colors:
+            columns.append(positions[:, 3:])
+        if material.has_normals:
+            columns.append(normals[corners[:, 2]])
+        columns.append(positions[:, :3])
+
+        return storage_types.as_float_array(numpy.hstack(columns).reshape(-1))
 
     def post_parse(self):
         """Called after parsing is done"""
         if self.cache and not self.cache_loaded:
-            self.cache_writer_cls(self.file_name, self.wavefront).write()
+            # The cache is written from the geometry collected by the array builders
+            if self.use_arrays:
+                self.wavefront.vertices = self.vertex_builder.array()
+                self.normals = self.normal_builder.array()
+                self.tex_coords = self.tex_coord_builder.array()
+
+            with timer(self.stats, 'cache_write_time'):
+                self.cache_writer_cls(
+                    self.file_name,
+                    self.wavefront,
+                    cache_format=self.cache_format,
+                    parse_options=self.parse_options(),
+                    normals=self.normals,
+                    tex_coords=self.tex_coords,
+                ).write()
 
     # methods for parsing types of wavefront lines
+    @auto_consume
     def parse_v(self):
-        self.wavefront.vertices += list(self.consume_vertices())
+        if self.use_arrays:
+            self.vertex_builder.append(self.consume_vertices())
+        else:
+            self.wavefront.vertices += self.consume_vertices()
 
     def consume_vertices(self):
         """
-        Consumes all consecutive vertices.
+        Consumes the current block of consecutive vertices.
         NOTE: There is no guarantee this will consume all vertices since other
         statements can also occur in the vertex list
         """
-        while True:
-            # Vertex color
-            if len(self.values) == 7:
-                yield (
-                    float(self.values[1]),
-                    float(self.values[2]),
-                    float(self.values[3]),
-                    float(self.values[4]),
-                    float(self.values[5]),
-                    float(self.values[6]),
-                )
-            # Positions only
-            else:
-                yield (
-                    float(self.values[1]),
-                    float(self.values[2]),
-                    float(self.values[3]),
-                )
-
-            try:
-                self.next_line()
-            except StopIteration:
-                self.line = None
-                self.values = None
-                break
-
-            if not self.values:
-                break
-
-            if self.values[0] != "v":
-                break
+        # Vertex color or positions only
+        colors = ATTRIBUTE_COLOR in self.attributes
+        return self.consume_float_block(lambda size: 6 if size == 6 and colors else 3, as_array=self.use_arrays)
 
+    @auto_consume
     def parse_vn(self):
-        self.normals += list(self.consume_normals())
+        # Normals are usually dropped by the block generator. See ``skip_statements``
+        if ATTRIBUTE_NORMAL not in self.attributes:
+            return
 
-        # Since list() also consumes StopIteration we need to sanity check the line
-        # to make sure the parser advances
-        if self.values and self.values[0] == "vn":
-            self.next_line()
+        if self.use_arrays:
+            self.normal_builder.append(self.consume_normals())
+        else:
+            self.normals += self.consume_normals()
 
     def consume_normals(self):
-        """Consumes all consecutive texture coordinate lines"""
-        # The first iteration processes the current/first vn statement.
-        # The loop continues until there are no more vn-statements or StopIteration is raised by generator
-        while True:
-            yield (
-                float(self.values[1]),
-                float(self.values[2]),
-                float(self.values[3]),
-            )
-
-            try:
-                self.next_line()
-            except StopIteration:
-                break
-
-            if not self.values:
-                break
-
-            if self.values[0] != "vn":
-                break
+        """Consumes the current block of consecutive normals"""
+        return self.consume_float_block(lambda size: 3, as_array=self.use_arrays)
 
+    @auto_consume
     def parse_vt(self):
-        self.tex_coords += list(self.consume_texture_coordinates())
+        if ATTRIBUTE_TEXCOORD not in self.attributes:
+            return
 
-        # Since list() also consumes StopIteration we need to sanity check the line
-        # to make sure the parser advances
-        if self.values and self.values[0] == "vt":
-            self.next_line()
+        if self.use_arrays:
+            self.tex_coord_builder.append(self.consume_texture_coordinates())
+        else:
+            self.tex_coords += self.consume_texture_coordinates()
 
     def consume_texture_coordinates(self):
-        """Consume all consecutive texture coordinates"""
-        # The first iteration processes the current/first vt statement.
-        # The loop continues until there are no more vt-statements or StopIteration is raised by generator
-        while True:
-            yield (
-                float(self.values[1]),
-                float(self.values[2]),
-            )
-
-            try:
-                self.next_line()
-            except StopIteration:
-                break
-
-            if not self.values:
-                break
-
-            if self.values[0] != "vt":
-                break
+        """Consume the current block of consecutive texture coordinates"""
+        return self.consume_float_block(lambda size: 2, as_array=self.use_arrays)
 
     @auto_consume
     def parse_mtllib(self):
         mtllib = " ".join(self.values[1:])
         try:
-            materials = self.material_parser_cls(
+            materials = load_library(
                 self.dir / mtllib,
+                self.material_parser_cls,
+                material_cache=self.material_cache,
                 encoding=self.encoding,
                 strict=self.strict,
                 collect_faces=self.collect_faces
-            ).materials
+            )
             self.wavefront.mtllibs.append(mtllib)
         except IOError:
             if self.create_materials:
@@ -248,10 +592,206 @@ class ObjParser(Parser):
 
     @auto_consume
     def parse_o(self):
-        self.mesh = Mesh(self.values[1], has_faces=self.collect_faces)
+        self.mesh = Mesh(self.values[1], has_faces=self.collect_faces, has_polygons=self.collect_polygons)
         self.wavefront.add_mesh(self.mesh)
 
+    @auto_consume
+    def parse_g(self):
+        self.group = self.values[1:]
+
+    @auto_consume
+    def parse_s(self):
+        # Smoothing group 0 and "off" both turn smoothing off
+        value = self.values[1]
+        if value == "off":
+            self.smoothing_group = 0
+            return
+
+        try:
+            self.smoothing_group = int(value)
+        except ValueError:
+            # Other values such as "on" are kept as they are
+            self.smoothing_group = value
+
+    @auto_consume
+    def parse_l(self):
+        self.prepare_mesh().lines += line_segments(self.element_indices())
+
+    @auto_consume
+    def parse_p(self):
+        self.prepare_mesh().points += self.element_indices()
+
+    def element_indices(self):
+        """
+        Zero based vertex indices of the current ``l`` or ``p`` statement.
+        Texture coordinate indices of line vertices are ignored.
+        """
+        count = self.vertex_count()
+        indices = [int(value.split('/')[0]) for value in strip_comment(self.values[1:])]
+        return [index - 1 if index > 0 else index + count for index in indices]
+
     def parse_f(self):
+        self.prepare_faces()
+
+        if self.topology:
+            # The interleaved vertex data is built from the index triplets by ``build_vertices``
+            self.material.corner_indices = storage_types.as_int_buffer(self.material.corner_indices)
+            if numpy is not None:
+                self.consume_face_indices()
+                self.consume_line()
+                return
+        elif self.storage == storage_types.STORAGE_ARRAY:
+            # Collect the vertex data as float32 values instead of python floats
+            self.material.vertices = storage_types.as_float_buffer(self.material.vertices)
+            self.material.indices = storage_types.as_index_buffer(self.material.indices)
+        elif self.use_arrays:
+            self.material.vertices = storage_types.as_float_buffer(self.material.vertices)
+
+        collected_faces = []
+        output = self.consume_faces(collected_faces if self.collect_faces else None, self.mesh.polygons)
+        if self.topology:
+            self.material.corner_indices.extend(output)
+        elif self.use_arrays:
+            # Faces resolve to index triplets. Their rows are gathered from the array builders at once
+            sources = self.attribute_sources()
+            vertices = self.gather_vertices(self.material, output, sources)
+            if vertices is None:
+                vertices = storage_types.as_float_array(self.interleave_vertices(self.material, output, sources))
+            self.material.vertices.frombytes(vertices.tobytes())
+        elif self.pack_vertices:
+            self.material.vertices.frombytes(output)
+        else:
+            self.material.vertices.extend(output)
+
+        if self.collect_faces:
+            self.mesh.faces += collected_faces
+
+        # consume_faces() also consumes StopIteration so we need to sanity check the line
+        # to make sure the parser advances
+        if self.values and self.values[0] == "f":
+            self.next_line()
+
+    def consume_face_indices(self):
+        """
+        Convert the current line or block of faces to v, vt and vn index triplets
+        in a few array operations. This is the topology mode parser when numpy is
+        installed. Faces are collected the same way as :meth:`consume_faces`.
+        """
+        # NOTE: Order is always v/vt/vn where v is mandatory and vt and vn is optional
+        parts = self.values[1].split('/')
+        has_vt = len(parts) == 2 or (len(parts) == 3 and parts[1] != '')
+        has_vn = len(parts) == 3
+
+        block = self.face_block_corners(has_vt, has_vn)
+        if block is not None:
+            sizes = [block.shape[1]] * len(block)
+            corners = block.reshape(-1, 3)
+        else:
+            faces = self.face_line_corners(has_vt, has_vn)
+            sizes = [len(face) for face in faces]
+            corners = numpy.array([corner for face in faces for corner in face], dtype=numpy.int64).reshape(-1, 3)
+
+        # Resolve negative indices against the number of elements parsed so far
+        corners -= 1
+        counts = numpy.array([len(values) for values in self.attribute_sources()])
+        corners += (corners < 0) * (counts + 1)
+
+        # Texture coordinates and normals that are not parsed are left out
+        has_vt = has_vt and ATTRIBUTE_TEXCOORD in self.attributes
+        has_vn = has_vn and ATTRIBUTE_NORMAL in self.attributes
+        if not has_vt:
+            corners[:, 1] = -1
+        if not has_vn:
+            corners[:, 2] = -1
+
+        # Are we referencing vertex with color info?
+        first = int(corners[0, 0])
+        vertex = self.vertex_builder.row(first) if self.use_arrays else self.wavefront.vertices[first]
+        self.set_vertex_format(has_vt, len(vertex) == 6, has_vn)
+
+        offsets = numpy.concatenate([[0], numpy.cumsum(sizes)])
+        triangles = corners[triangle_fans(offsets).reshape(-1)]
+        self.material.corner_indices.frombytes(triangles.astype(numpy.int32).tobytes())
+
+        if self.collect_faces:
+            self.mesh.faces += triangles[:, 0].reshape(-1, 3).tolist()
+        if self.mesh.polygons is not None:
+            self.mesh.polygons.extend(corners[:, 0].tolist(), sizes)
+
+    def face_block_corners(self, has_vt, has_vn):
+        """
+        Convert a block of faces with the same number of corners and the
+        same index format in a single pass. Requires numpy.
+
+        :return: (faces, corners, 3) array of 1 based (v, vt, vn) indices or None if the block is irregular.
+                 Missing texture coordinate and normal indices are 1
+        """
+        count = self.line.count("\n") + (not self.line.endswith("\n"))
+        stride = len(self.values) // count
+
+        if stride < 4 or len(self.values) != count * stride or self.values[::stride].count("f") != count:
+            return None
+
+        values = self.values
+        del values[::stride]
+        text = " ".join(values)
+
+        # Every corner must use the same index format
+        slashes = 2 if has_vn else int(has_vt)
+        empty = 0 if has_vt else int(has_vn)
+        if text.count("/") != slashes * len(values) or text.count("//") != empty * len(values):
+            return None
+
+        fields = 1 + has_vt + has_vn
+        with warnings.catch_warnings():
+            # Reports data that is not an integer. We fall back to the line parser then
+            warnings.simplefilter("ignore", DeprecationWarning)
+            indices = numpy.fromstring(text.replace("//", " ").replace("/", " "), dtype=numpy.int64, sep=" ")
+
+        if len(indices) != fields * len(values):
+            return None
+
+        indices = indices.reshape(count, stride - 1, fields)
+        corners = numpy.ones((count, stride - 1, 3), dtype=numpy.int64)
+        corners[:, :, 0] = indices[:, :, 0]
+        if has_vt:
+            corners[:, :, 1] = indices[:, :, 1]
+        if has_vn:
+            corners[:, :, 2] = indices[:, :, -1]
+
+        return corners
+
+    def face_line_corners(self, has_vt, has_vn):
+        """
+        Convert the faces in the current line or block one line at a time
+
+        :return: List of faces with a tuple of 1 based (v, vt, vn) indices for every corner.
+                 Missing texture coordinate and normal indices are 1
+        """
+        faces = []
+
+        for line in io.StringIO(self.line):
+            face = []
+            for v in strip_comment(line.split()[1:]):
+                parts = v.split('/')
+                # uv field might be blank
+                try:
+                    t_index = int(parts[1]) if has_vt else 1
+                except ValueError:
+                    t_index = 1
+                try:
+                    n_index = int(parts[2]) if has_vn else 1
+                except ValueError:
+                    n_index = 1
+
+                face.append((int(parts[0]), t_index, n_index))
+
+            faces.append(face)
+
+        return faces
+
+    def prepare_faces(self):
+        """Make sure a material and a mesh are active before faces are added"""
         # Add default material if not created
         if self.material is None:
             self.material = Material(
@@ -261,27 +801,43 @@ class ObjParser(Parser):
             )
             self.wavefront.materials[self.material.name] = self.material
 
-        # Support objects without `o` statement
+        mesh = self.prepare_mesh()
+        mesh.add_material(self.material)
+
+        if self.group is not None:
+            for name in self.group:
+                mesh.add_group(name)
+
+        if self.smoothing_group is not None:
+            mesh.add_smoothing_group(self.smoothing_group)
+
+    def prepare_mesh(self):
+        """Return the active mesh. Creates a mesh for files without `o` statement"""
         if self.mesh is None:
-            self.mesh = Mesh(has_faces=self.collect_faces)
+            self.mesh = Mesh(has_faces=self.collect_faces, has_polygons=self.collect_polygons)
             self.wavefront.add_mesh(self.mesh)
-            self.mesh.add_material(self.material)
 
-        self.mesh.add_material(self.material)
+        return self.mesh
 
-        collected_faces = []
-        consumed_vertices = self.consume_faces(collected_faces if self.collect_faces else None)
-        self.material.vertices += list(consumed_vertices)
+    def set_vertex_format(self, has_vt, has_colors, has_vn):
+        """Set the vertex format of the current material from the present attributes"""
+        vertex_format = "_".join(e[0] for e in [
+            ("T2F", has_vt),
+            ("C3F", has_colors),
+            ("N3F", has_vn),
+            ("V3F", True)
+        ] if e[1])
 
-        if self.collect_faces:
-            self.mesh.faces += list(collected_faces)
+        # If the material already have vertex data, ensure the same format is used
+        if self.material.vertex_format and self.material.vertex_format != vertex_format:
+            raise ValueError((
+                "Trying to merge vertex data with different format: {}. "
+                "Material {} has vertex format {}"
+            ).format(vertex_format, self.material.name, self.material.vertex_format))
 
-        # Since list() also consumes StopIteration we need to sanity check the line
-        # to make sure the parser advances
-        if self.values and self.values[0] == "f":
-            self.next_line()
+        self.material.vertex_format = vertex_format
 
-    def consume_faces(self, collected_faces = None):
+    def consume_faces(self, collected_faces = None, collected_polygons=None):
         """
         Consume all consecutive faces
 
@@ -305,25 +861,13 @@ class ObjParser(Parser):
                                     of triples of the corresponding absolute vertex IDs. These IDs index the list
                                     self.wavefront.vertices.
                                     Specify None to prevent consuming faces (and thus saving memory usage).
+            :param collected_polygons: :class:`Polygons` the faces are added to without triangulation.
+                                       Specify None to skip collecting polygons.
+            :return: List of the interleaved vertex data. In topology mode and with numpy storage
+                     the v, vt and vn index triplets. With array storage the float32 bytes
+                     of the interleaved vertex data
         """
 
-        # Helper tuple and function
-        Vertex = namedtuple('Vertex', 'idx pos color uv normal')
-        def emit_vertex(vertex):
-            # Just yield all the values except for the index
-            for v in vertex.uv:
-                yield v
-
-            for v in vertex.color:
-                yield v
-
-            for v in vertex.normal:
-                yield v
-
-            for v in vertex.pos:
-                yield v
-
-
         # Figure out the format of the first vertex
         # We raise an exception if any following vertex has a different format
         # NOTE: Order is always v/vt/vn where v is mandatory and vt and vn is optional
@@ -343,93 +887,90 @@ class ObjParser(Parser):
                 has_vt = True
             has_vn = True
 
+        # Texture coordinates and normals that are not parsed are left out
+        has_vt = has_vt and ATTRIBUTE_TEXCOORD in self.attributes
+        has_vn = has_vn and ATTRIBUTE_NORMAL in self.attributes
+
         # Are we referencing vertex with color info?
         vindex = int(parts[0])
         if vindex < 0:
-            vindex += len(self.wavefront.vertices)
+            vindex += self.vertex_count()
         else:
             vindex -= 1
 
-        vertex = self.wavefront.vertices[vindex]
+        if self.use_arrays:
+            vertex = self.vertex_builder.row(vindex)
+        else:
+            vertex = self.wavefront.vertices[vindex]
         has_colors = len(vertex) == 6
 
-        # Prepare vertex format string
-        vertex_format = "_".join(e[0] for e in [
-            ("T2F", has_vt),
-            ("C3F", has_colors),
-            ("N3F", has_vn),
-            ("V3F", True)
-        ] if e[1])
+        self.set_vertex_format(has_vt, has_colors, has_vn)
 
-        # If the material already have vertex data, ensure the same format is used
-        if self.material.vertex_format and self.material.vertex_format != vertex_format:
-            raise ValueError((
-                "Trying to merge vertex data with different format: {}. "
-                "Material {} has vertex format {}"
-            ).format(vertex_format, self.material.name, self.material.vertex_format))
+        # Corners are usually shared by several faces, also across material switches,
+        # so each corner string is only resolved once
+        resolve, corners = self.corner_cache(has_vt, has_colors, has_vn)
+        output = bytearray() if self.pack_vertices else []
+        emit = output.extend
 
-        self.material.vertex_format = vertex_format
+        # In indexed mode each unique (v, vt, vn) combination is only emitted once
+        indexed = self.indexed
+        index_map = self.index_maps.setdefault(self.material.name, {})
+        indices = self.material.indices
+        add_index = indices.append
 
         # The first iteration processes the current/first f statement.
         # The loop continues until there are no more f-statements or StopIteration is raised by generator
+        faces = 0
         while True:
-            # The very first vertex, the last encountered and the current one
-            v1, vlast, vcurrent = None, None, None
-
-            for i, v in enumerate(self.values[1:]):
-                parts = v.split('/')
-                v_index = (int(parts[0]) - 1)
-                # uv field might be blank
-                try:
-                    t_index = (int(parts[1]) - 1) if has_vt else None
-                except ValueError:
-                    t_index = 0
-                try:
-                    n_index = (int(parts[2]) - 1) if has_vn else None
-                except ValueError:
-                    n_index = 0
-
-                # Resolve negative index lookups
-                if v_index < 0:
-                    v_index += len(self.wavefront.vertices) + 1
-
-                if has_vt and t_index < 0:
-                    t_index += len(self.tex_coords) + 1
-
-                if has_vn and n_index < 0:
-                    n_index += len(self.normals) + 1
-
-                vlast = vcurrent
-                vcurrent = Vertex(
-                    idx = v_index,
-                    pos = self.wavefront.vertices[v_index][0:3] if has_colors else self.wavefront.vertices[v_index],
-                    color = self.wavefront.vertices[v_index][3:] if has_colors else (),
-                    uv = self.tex_coords[t_index] if has_vt and t_index < len(self.tex_coords) else (),
-                    normal = self.normals[n_index] if has_vn and n_index < len(self.normals) else ()
-                )
-
-                yield from emit_vertex(vcurrent)
-
-                # Triangulation when more than 3 elements are present
-                if i >= 3:
-                    # The current vertex has already been emitted.
-                    # Now just emit the first and the third vertices from the face
-                    yield from emit_vertex(v1)
-                    yield from emit_vertex(vlast)
-
-                if i == 0:
-                    # Store the first vertex
-                    v1 = vcurrent
+            # The very first corner and the last encountered
+            first, last = None, None
+
+            names = self.values[1:]
+            if '#' in self.line:
+                names = strip_comment(names)
+
+            for i, name in enumerate(names):
+                # A corner is a tuple (vertex index, (v, vt, vn) key, interleaved vertex data)
+                corner = corners.get(name)
+                if corner is None:
+                    corner = corners[name] = resolve(name)
+
+                if indexed:
+                    # Triangulation when more than 3 elements are present
+                    # emits the current, the first and the last corner
+                    for c in ((corner, first, last) if i >= 3 else (corner,)):
+                        index = index_map.get(c[1])
+                        if index is None:
+                            index = index_map[c[1]] = len(index_map)
+                            emit(c[2])
+                        add_index(index)
+                else:
+                    emit(corner[2])
+                    if i >= 3:
+                        emit(first[2])
+                        emit(last[2])
 
-                if (collected_faces is not None) and (i >= 2):
+                if collected_faces is not None:
                     if i == 2:
                         # Append the first triangle face in usual order (i.e. as specified in the Wavefront file)
-                        collected_faces.append([v1.idx, vlast.idx, vcurrent.idx])
-                    if i >= 3:
+                        collected_faces.append([first[0], last[0], corner[0]])
+                    elif i >= 3:
                         # Triangulate the remaining part of the face by putting the current, the first
                         # and the last parsed vertex in that order as a new face.
-                        # This order coincides deliberately with the order from vertex yielding above.
-                        collected_faces.append([vcurrent.idx, v1.idx, vlast.idx])
+                        # This order coincides deliberately with the order from vertex emitting above.
+                        collected_faces.append([corner[0], first[0], last[0]])
+
+                if i == 0:
+                    first = corner
+                last = corner
+
+            if collected_polygons is not None:
+                collected_polygons.add([corners[name][0] for name in names])
+
+            # Stop after a batch of faces. ``parse_f`` moves to the next line leaving it for the next dispatch
+            faces += 1
+            if faces == self.face_batch_size:
+                break
 
             # Break out of the loop when there are no more f statements
 
@@ -443,3 +984,124 @@ class ObjParser(Parser):
 
             if self.values[0] != "f":
                 break
+
+        return output
+
+    def corner_cache(self, has_vt, has_colors, has_vn):
+        """
+        The corner resolver for a vertex format and the corners it resolved so far.
+        Corners are reused by following runs of faces until positions, texture coordinates
+        or normals are added, since negative indices depend on the number of elements.
+
+        :return: Tuple of the resolver and a dictionary of resolved corners by corner string
+        """
+        key = (has_vt, has_colors, has_vn)
+        state = tuple((id(values), len(values)) for values in self.attribute_sources())
+
+        cache = self.corner_caches.get(key)
+        if cache is None or cache[0] != state:
+            if self.topology or self.use_arrays:
+                resolver = self.index_resolver(has_vt, has_vn)
+            else:
+                resolver = self.corner_resolver(has_vt, has_colors, has_vn, packed=self.pack_vertices)
+            cache = self.corner_caches[key] = (state, resolver, {})
+
+        return cache[1], cache[2]
+
+    def vertex_count(self):
+        """Number of positions parsed so far"""
+        return len(self.vertex_builder) if self.use_arrays else len(self.wavefront.vertices)
+
+    def attribute_sources(self):
+        """
+        The positions, texture coordinates and normals parsed so far.
+        With numpy storage the array builders are returned. Their
+        rows are only merged into arrays when parsing is done.
+        """
+        if self.use_arrays:
+            return self.vertex_builder, self.tex_coord_builder, self.normal_builder
+
+        return self.wavefront.vertices, self.tex_coords, self.normals
+
+    def index_resolver(self, has_vt, has_vn):
+        """
+        Create a function resolving a face corner such as ``1/2/3`` to a tuple of
+        the vertex index, the (v, vt, vn) index key and a zero based v, vt, vn index
+        triplet where missing texture coordinates and normals are -1.
+        """
+        vertices, tex_coords, normals = self.attribute_sources()
+
+        def resolve(name):
+            parts = name.split('/')
+            v_index = (int(parts[0]) - 1)
+            # uv field might be blank
+            try:
+                t_index = (int(parts[1]) - 1) if has_vt else None
+            except ValueError:
+                t_index = 0
+            try:
+                n_index = (int(parts[2]) - 1) if has_vn else None
+            except ValueError:
+                n_index = 0
+
+            # Resolve negative index lookups
+            if v_index < 0:
+                v_index += len(vertices) + 1
+
+            if has_vt and t_index < 0:
+                t_index += len(tex_coords) + 1
+
+            if has_vn and n_index < 0:
+                n_index += len(normals) + 1
+
+            key = (v_index, t_index, n_index)
+            return v_index, key, (v_index, -1 if t_index is None else t_index, -1 if n_index is None else n_index)
+
+        return resolve
+
+    def corner_resolver(self, has_vt, has_colors, has_vn, packed=False):
+        """
+        Create a function resolving a face corner such as ``1/2/3`` to a tuple of
+        the vertex index, the (v, vt, vn) index key and the interleaved vertex data
+        in the material's vertex format. Missing texture coordinates and normals are left out.
+
+        :param packed: Return the interleaved vertex data as float32 bytes
+        """
+        resolve_indices = self.index_resolver(has_vt, has_vn)
+        vertex_data = self.vertex_data_builder(has_vt, has_colors, has_vn)
+
+        if packed:
+            def resolve(name):
+                v_index, key, _ = resolve_indices(name)
+                return v_index, key, storage_types.as_float_buffer(vertex_data(*key)).tobytes()
+        else:
+            def resolve(name):
+                v_index, key, _ = resolve_indices(name)
+                return v_index, key, vertex_data(*key)
+
+        return resolve
+
+    def vertex_data_builder(self, has_vt, has_colors, has_vn, sources=None):
+        """
+        Create a function returning the interleaved vertex data of zero
+        based v, vt and vn indices in the material's vertex format
+
+        :param sources: The positions, texture coordinates and normals to look up.
+                        Defaults to the ones of the wavefront
+        """
+        vertices, tex_coords, normals = sources or (self.wavefront.vertices, self.tex_coords, self.normals)
+
+        def vertex_data(v_index, t_index, n_index):
+            vertex = vertices[v_index]
+            data = ()
+            if has_vt and t_index < len(tex_coords):
+                data += tuple(tex_coords[t_index])
+            if has_colors:
+                data += tuple(vertex[3:])
+            if has_vn and n_index < len(normals):
+                data += tuple(normals[n_index])
+            data += tuple(vertex[0:3] if has_colors else vertex)
+
+            return data
+
+        return vertex_data
@@ -0,0 +1,447 @@
+# ----------------------------------------------------------------------------
+# PyWavefront
+# Copyright (c) 2018 Kurt Yoder
+# All rights reserved.
+#
+# Redistribution and use in source and binary forms, with or without
+# modification, are permitted provided that the following conditions
+# are met:
+#
+#  * Redistributions of source code must retain the above copyright
+#    notice, this list of conditions and the following disclaimer.
+#  * Redistributions in binary form must reproduce the above copyright
+#    notice, this list of conditions and the following disclaimer in
+#    the documentation and/or other materials provided with the
+#    distribution.
+#  * Neither the name of PyWavefront nor the names of its
+#    contributors may be used to endorse or promote products
+#    derived from this software without specific prior written
+#    permission.
+#
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS
+# "AS IS" AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT
+# LIMITED TO, THE IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS
+# FOR A PARTICULAR PURPOSE ARE DISCLAIMED. IN NO EVENT SHALL THE
+# COPYRIGHT OWNER OR CONTRIBUTORS BE LIABLE FOR ANY DIRECT, INDIRECT,
+# INCIDENTAL, SPECIAL, EXEMPLARY, OR CONSEQUENTIAL DAMAGES (INCLUDING,
+# BUT NOT LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS OR SERVICES;
+# LOSS OF USE, DATA, OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER
+# CAUSED AND ON ANY THEORY OF LIABILITY, WHETHER IN CONTRACT, STRICT
+# LIABILITY, OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN
+# ANY WAY OUT OF THE USE OF THIS SOFTWARE, EVEN IF ADVISED OF THE
+# POSSIBILITY OF SUCH DAMAGE.
+# ----------------------------------------------------------------------------
+"""
+Parse a single obj file using multiple processes.
+
+The file is split into byte ranges ending at line boundaries. Every worker
+parses the positions, normals and texture coordinates in its range into
+arrays and reduces the faces to triangulated ``(v, vt, vn)`` index triplets.
+The main process replays the chunks in file order, resolving negative indices
+against the number of elements in the previous chunks, and builds the
+interleaved vertex data of every material with numpy indexing.
+"""
+from collections import namedtuple
+import concurrent.futures
+import functools
+import io
+
+from pywavefront import bgzf
+from pywavefront.exceptions import PywavefrontException
+from pywavefront.obj import ObjParser, line_segments, strip_comment
+from pywavefront.parser import Parser, auto_consume
+from pywavefront.storage import numpy, as_float_buffer, as_index_buffer, ArrayBuilder, STORAGE_ARRAY, STORAGE_NUMPY
+
+# The parse result of a byte range
+Chunk = namedtuple('Chunk', 'vertices tex_coords normals statements')
+
+# Number of bytes read at a time when looking for the end of a line
+LINE_SEARCH_SIZE = 1 << 12
+
+
+def split_file(file_name, parts):
+    """
+    Split a file into at most ``parts`` byte ranges of about the same size.
+    Every range starts at the beginning of a line.
+
+    :param file_name: Path to the file
+    :param parts: Number of ranges to create
+    :return: List of ``(start, end)`` byte offsets
+    """
+    offsets = [0]
+
+    with bgzf.open_ranges(file_name) as fd:
+        size = fd.size
+        for i in range(1, parts):
+            position = size * i // parts
+            if position <= offsets[-1]:
+                continue
+
+            # Move to the start of the next line unless we are already there
+            position = next_line(fd, position - 1, size)
+
+            if position >= size:
+                break
+
+            if position > offsets[-1]:
+                offsets.append(position)
+
+    offsets.append(size)
+    return list(zip(offsets[:-1], offsets[1:]))
+
+
+def next_line(fd, position, size):
+    """
+    Find the start of the line following the one containing ``position``
+
+    :param fd: ``bgzf.BlockGzipFile`` or ``bgzf.RawFile``
+    :param position: Byte offset in the line
+    :param size: Size of the data
+    :return: Byte offset of the next line or ``size``
+    """
+    while position < size:
+        data = fd.read(position, position + LINE_SEARCH_SIZE)
+        newline = data.find(b"\n")
+        if newline >= 0:
+            return position + newline + 1
+
+        position += len(data)
+
+    return size
+
+
+def triangle_corners(count):
+    """
+    Order of the corners emitted for a face with ``count`` corners.
+    This is the triangulation described in ``ObjParser.consume_faces``.
+    """
+    return [0, 1, 2] + [corner for j in range(3, count) for corner in (j, 0, j - 1)]
+
+
+def parse_chunk(file_name, start, end, strict=False, encoding="utf-8", dtype="float32"):
+    """Parse a byte range of an obj file. This runs in the worker processes."""
+    return ChunkParser(file_name, start, end, strict=strict, encoding=encoding, dtype=dtype).parse()
+
+
+def parse(parser, workers):
+    """
+    Parse the obj file of an ``ObjParser`` with multiple processes
+    and store the result in its wavefront like a regular parse would.
+
+    All face indices must reference existing elements and faces
+    with less than three corners are ignored.
+
+    :param parser: The ObjParser
+    :param workers: Number of worker processes
+    """
+    numpy_storage = parser.storage == STORAGE_NUMPY
+    dtype = "float32" if numpy_storage else "float64"
+    ranges = split_file(parser.file_name, workers)
+
+    with concurrent.futures.ProcessPoolExecutor(max_workers=len(ranges)) as executor:
+        chunks = list(executor.map(
+            functools.partial(parse_chunk, parser.file_name, strict=parser.strict,
+                              encoding=parser.encoding, dtype=dtype),
+            *zip(*ranges)
+        ))
+
+    if numpy_storage:
+        builders = parser.vertex_builder, parser.tex_coord_builder, parser.normal_builder
+    else:
+        builders = ArrayBuilder(3, dtype), ArrayBuilder(2, dtype), ArrayBuilder(3, dtype)
+
+    for chunk in chunks:
+        for builder, block in zip(builders, chunk[:3]):
+            # Empty blocks don't know if the vertices have colors
+            if len(block):
+                builder.append(block)
+
+    vertices, tex_coords, normals = (builder.array() for builder in builders)
+
+    resolve_indices(chunks)
+    triangles = replay(parser, chunks, has_colors=vertices.shape[1] == 6)
+    build_materials(parser, triangles, (vertices, tex_coords, normals))
+
+    if not numpy_storage:
+        parser.wavefront.vertices = list(map(tuple, vertices.tolist()))
+        parser.tex_coords = list(map(tuple, tex_coords.tolist()))
+        parser.normals = list(map(tuple, normals.tolist()))
+
+
+def resolve_indices(chunks, counts=(0, 0, 0)):
+    """
+    Add the number of elements defined before each chunk to its relative face indices
+
+    :param chunks: Consecutive chunks in file order
+    :param counts: Number of vertices, texture coordinates and normals before the first chunk
+    """
+    offsets = numpy.array(counts, dtype=numpy.int64)
+
+    for chunk in chunks:
+        for statement, data in chunk.statements:
+            if statement == "f":
+                _, _, corners, relative = data
+                corners += relative * offsets
+            elif statement in ("l", "p"):
+                indices, relative = data
+                indices += relative * offsets[0]
+
+        offsets += [len(chunk.vertices), len(chunk.tex_coords), len(chunk.normals)]
+
+
+def replay(parser, chunks, has_colors):
+    """
+    Replay the statements of the chunks in file order creating
+    meshes and materials like a regular parse would
+
+    :return: Dictionary of the face corner arrays added to each material
+    """
+    triangles = {}
+
+    for chunk in chunks:
+        for statement, data in chunk.statements:
+            if statement == "f":
+                has_vt, has_vn, corners, _ = data
+
+                parser.prepare_faces()
+                parser.set_vertex_format(has_vt, has_colors, has_vn)
+                triangles.setdefault(parser.material.name, []).append(corners)
+
+                if parser.collect_faces:
+                    parser.mesh.faces += corners[:, 0].reshape(-1, 3).tolist()
+            elif statement == "l":
+                parser.prepare_mesh().lines += data[0].tolist()
+            elif statement == "p":
+                parser.prepare_mesh().points += data[0].tolist()
+            else:
+                parser.values = data
+                parser.dispatcher[statement]()
+
+    return triangles
+
+
+def build_materials(parser, triangles, attributes, bases=(0, 0, 0)):
+    """
+    Create the interleaved vertex data of the materials
+
+    :param triangles: Dictionary of face corner arrays for each material
+    :param attributes: Tuple of the vertex, texture coordinate and normal arrays
+    :param bases: Global index of the first row in each of the attribute arrays
+    """
+    numpy_storage = parser.storage == STORAGE_NUMPY
+
+    for name, blocks in triangles.items():
+        material = parser.wavefront.materials[name]
+        corners = numpy.concatenate(blocks)
+
+        if parser.indexed:
+            corners, indices = unique_corners(corners)
+            if parser.storage == STORAGE_ARRAY:
+                material.indices = as_index_buffer(indices)
+            else:
+                material.indices = indices if numpy_storage else indices.tolist()
+
+        corners = corners - numpy.array(bases, dtype=numpy.int64)
+        data = interleave(material.vertex_format, corners, *attributes)
+        if parser.storage == STORAGE_ARRAY:
+            material.vertices = as_float_buffer(data)
+        else:
+            material.vertices = data if numpy_storage else data.tolist()
+
+
+def unique_corners(corners):
+    """
+    Deduplicate face corners keeping the order they first appear in.
+
+    :param corners: (n, 3) array of (v, vt, vn) indices
+    :return: The unique corners and the index of each corner in them
+    """
+    _, first, inverse = numpy.unique(corners, axis=0, return_index=True, return_inverse=True)
+    order = numpy.argsort(first)
+    rank = numpy.empty_like(order)
+    rank[order] = numpy.arange(len(order))
+    return corners[first[order]], rank[inverse.reshape(-1)].astype(numpy.uint32)
+
+
+def interleave(vertex_format, corners, vertices, tex_coords, normals):
+    """
+    Build the flat interleaved vertex data for face corners.
+    Texture coordinates and normals that don't exist are left out of the
+    vertex of that corner like :meth:`ObjParser.vertex_data_builder` does.
+
+    :param vertex_format: The vertex format of the material
+    :param corners: (n, 3) array of (v, vt, vn) indices
+    """
+    columns = []
+    # Columns of the corners referencing elements that don't exist
+    absent = []
+
+    if "T2F" in vertex_format:
+        rows, missing = optional_lookup(tex_coords, corners[:, 1], 2)
+        columns.append(rows)
+        absent.append(missing)
+
+    positions = lookup(vertices, corners[:, 0], "vertex")
+
+    if "C3F" in vertex_format:
+        columns.append(positions[:, 3:6])
+        absent.append(None)
+
+    if "N3F" in vertex_format:
+        rows, missing = optional_lookup(normals, corners[:, 2], 3)
+        columns.append(rows)
+        absent.append(missing)
+
+    columns.append(positions[:, 0:3])
+    data = numpy.hstack(columns)
+
+    if all(missing is None for missing in absent):
+        return data.reshape(-1)
+
+    keep = numpy.ones(data.shape, dtype=bool)
+    start = 0
+    for column, missing in zip(columns, absent):
+        if missing is not None:
+            keep[missing, start:start + column.shape[1]] = False
+        start += column.shape[1]
+
+    return data[keep]
+
+
+def lookup(values, indices, name):
+    """Select rows by index making sure all of them exist"""
+    if len(indices) and (indices.min() < 0 or indices.max() >= len(values)):
+        raise PywavefrontException("Face references a {} that does not exist".format(name))
+
+    return values[indices]
+
+
+def optional_lookup(values, indices, width):
+    """
+    Select rows by index. Rows that don't exist are zero.
+
+    :return: The (n, width) rows and a mask of the indices that don't exist or None if all of them exist
+    """
+    missing = indices >= len(values)
+    if not missing.any():
+        return values[indices], None
+
+    rows = numpy.zeros((len(indices), width), dtype=values.dtype)
+    rows[~missing] = values[indices[~missing]]
+    return rows, missing
+
+
+class ChunkParser(ObjParser):
+    """Parses a byte range of an obj file into attribute arrays and face corner indices"""
+    bulk_statements = ("v", "vt", "vn", "f")
+
+    def __init__(self, file_name, start, end, strict=False, encoding="utf-8", dtype="float32"):
+        """
+        Create a new chunk parser
+        :param file_name: file name and path of obj file to read
+        :param start: Byte offset of the first line to parse
+        :param end: Byte offset after the last line to parse
+        :param strict: Enable strict mode
+        :param encoding: Encoding to read the text files
+        :param dtype: Float type of the parsed attributes
+        """
+        self.start = start
+        self.end = end
+        super(ChunkParser, self).__init__(None, file_name, strict=strict, encoding=encoding,
+                                          parse=False, storage=STORAGE_NUMPY)
+        self.array_dtype = dtype
+        self.vertex_builder = ArrayBuilder(3, dtype)
+        self.normal_builder = ArrayBuilder(3, dtype)
+        self.tex_coord_builder = ArrayBuilder(2, dtype)
+
+        # Statements replayed by the main process as (statement, data) tuples.
+        # Face data is (has_vt, has_vn, corners, relative) where corners are the
+        # triangulated (v, vt, vn) indices and relative marks the indices
+        # that still need the element counts of the previous chunks added
+        self.statements = []
+
+    def create_line_generator(self):
+        with bgzf.open_ranges(self.file_name) as fd:
+            data = fd.read(self.start, self.end)
+
+        yield from self.create_block_generator(io.StringIO(data.decode(self.encoding)))
+
+    def parse(self):
+        """Parse the byte range returning a ``Chunk``"""
+        Parser.parse(self)
+
+        return Chunk(
+            self.vertex_builder.array(),
+            self.tex_coord_builder.array(),
+            self.normal_builder.array(),
+            self.statements,
+        )
+
+    @auto_consume
+    def parse_mtllib(self):
+        self.statements.append(("mtllib", self.values))
+
+    @auto_consume
+    def parse_usemtl(self):
+        self.statements.append(("usemtl", self.values))
+
+    @auto_consume
+    def parse_o(self):
+        self.statements.append(("o", self.values))
+
+    @auto_consume
+    def parse_g(self):
+        self.statements.append(("g", self.values))
+
+    @auto_consume
+    def parse_s(self):
+        self.statements.append(("s", self.values))
+
+    @auto_consume
+    def parse_l(self):
+        self.statements.append(("l", self.consume_elements(segments=True)))
+
+    @auto_consume
+    def parse_p(self):
+        self.statements.append(("p", self.consume_elements()))
+
+    def consume_elements(self, segments=False):
+        """
+        Vertex indices of the current ``l`` or ``p`` statement resolved like face indices
+
+        :param segments: Split the polyline into the index pairs of its segments
+        :return: Tuple of the zero based indices and the indices still relative to the previous chunks
+        """
+        values = strip_comment(self.values[1:])
+        indices = numpy.array([int(value.split('/')[0]) for value in values], dtype=numpy.int64)
+        if segments:
+            indices = indices[line_segments(list(range(len(indices))))]
+
+        indices -= 1
+        relative = indices < 0
+        indices += relative * (len(self.vertex_builder) + 1)
+        return indices, relative
+
+    @auto_consume
+    def parse_f(self):
+        # NOTE: Order is always v/vt/vn where v is mandatory and vt and vn is optional
+        parts = self.values[1].split('/')
+        has_vt = len(parts) == 2 or (len(parts) == 3 and parts[1] != '')
+        has_vn = len(parts) == 3
+
+        block = self.face_block_corners(has_vt, has_vn)
+        if block is not None:
+            corners = block[:, triangle_corners(block.shape[1])].reshape(-1, 3)
+        else:
+            corners = [face[i] for face in self.face_line_corners(has_vt, has_vn)
+                       if len(face) >= 3 for i in triangle_corners(len(face))]
+            corners = numpy.array(corners, dtype=numpy.int64).reshape(-1, 3)
+
+        # Resolve indices the same way as ``ObjParser.consume_faces``.
+        # Negative indices are relative to the number of elements parsed so far.
+        corners -= 1
+        relative = corners < 0
+        counts = [len(self.vertex_builder), len(self.tex_coord_builder), len(self.normal_builder)]
+        corners += relative * (numpy.array(counts) + 1)
+
+        self.statements.append(("f", (has_vt, has_vn, corners, relative)))
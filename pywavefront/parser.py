@@ -31,15 +31,43 @@
 # ANY WAY OUT OF THE USE OF THIS SOFTWARE, EVEN IF ADVISED OF THE
 # POSSIBILITY OF SUCH DAMAGE.
 # ----------------------------------------------------------------------------
+import bz2
 import codecs
+import functools
 import gzip
+import io
 import logging
+import re
 from pathlib import Path
 
+try:
+    import lzma
+except ImportError:  # Python built without liblzma
+    lzma = None
+
+try:
+    from compression import zstd  # Python 3.14+
+except ImportError:
+    zstd = None
+
 from pywavefront.exceptions import PywavefrontException
+from pywavefront.stats import UNKNOWN
+from pywavefront.storage import numpy, as_float_matrix
 
 logger = logging.getLogger("pywavefront")
 
+# Functions opening compressed files by file suffix
+COMPRESSED_FORMATS = {".gz": gzip.open, ".bz2": bz2.open}
+if lzma is not None:
+    COMPRESSED_FORMATS[".xz"] = lzma.open
+if zstd is not None:
+    COMPRESSED_FORMATS[".zst"] = zstd.open
+
+
+def is_compressed(file_name):
+    """bool: Is the file read through a decompressor"""
+    return Path(file_name).suffix in COMPRESSED_FORMATS
+
 
 def auto_consume(func):
     """Decorator for auto consuming lines when leaving the function"""
@@ -53,6 +81,21 @@ class Parser:
     """This defines a generalized parse dispatcher; all parse functions
     reside in subclasses."""
     auto_post_parse = True
+    # Consecutive lines with one of these statements are read as a single block
+    bulk_statements = ()
+    # Bulk statements dropped by the block generator without being split or dispatched
+    skip_statements = ()
+    # Number of characters read at a time when collecting bulk statements
+    chunk_size = 1 << 20
+    # Parse method names for each parser class. See ``_build_dispatch_map``
+    _dispatch_names = {}
+    # Float type of the arrays returned by ``consume_float_block``
+    array_dtype = "float32"
+    # Line prefixes of statements converted from the text of the line by ``consume_float_block``.
+    # Only the statement is split from these lines
+    text_prefixes = ()
+    # ParseStats recording the statements when instrumentation is enabled
+    stats = None
 
     def __init__(self, file_name, strict=False, encoding="utf-8"):
         """
@@ -71,33 +114,104 @@ class Parser:
         self.line = None
         self.values = None
 
+        # Unknown statements with the number of occurrences and the first line they appear on.
+        # Reported once per statement when the file is parsed
+        self.unknown_statements = {}
+
     def create_line_generator(self):
         """
         Creates a generator function yielding lines in the file
         Should only yield non-empty lines
         """
+        with self.open_file() as fd:
+            if self.bulk_statements:
+                yield from self.create_block_generator(fd)
+            else:
+                yield from fd
+
+    def open_file(self):
+        """
+        Open the file in text mode. Compressed files (see ``COMPRESSED_FORMATS``)
+        are decompressed while reading so only the lines being parsed are kept in memory.
+        """
+        # FIXME: Converting to str for now for py34 compatibility
+        opener = COMPRESSED_FORMATS.get(self.file_name.suffix, open)
+        return opener(str(self.file_name), mode='rt', encoding=self.encoding)
 
-        if self.file_name.suffix == ".gz":
-            # FIXME: Converting to str for now for py34 compatibility
-            gz = gzip.open(str(self.file_name), mode='rt', encoding=self.encoding)
+    def create_block_generator(self, fd):
+        """
+        Reads the file in large chunks yielding lines like the line generator,
+        except consecutive lines starting with the same statement from
+        ``bulk_statements`` are yielded as a single multi-line block.
+        Blocks of ``skip_statements`` are left out.
 
-            for line in gz.readlines():
-                yield line
+        :param fd: Text file object to read from
+        """
+        yield from self.split_chunks(iter(functools.partial(fd.read, self.chunk_size), ""))
 
-            gz.close()
-        else:
-            # FIXME: Converting to str for now for py34 compatibility
-            file = open(str(self.file_name), mode='r', encoding=self.encoding)
+    def split_chunks(self, chunks):
+        """
+        Yield the lines and statement blocks of text read in chunks.
+        See ``create_block_generator``.
+
+        :param chunks: Iterable of text chunks that don't have to end on a line break
+        """
+        # Match from the newline ending the previous line so the regex engine can
+        # skip ahead to candidate lines instead of testing every position
+        pattern = re.compile(r'\n(?:{})'.format("|".join(
+            r'{0} .*(?:\n{0} .*)*'.format(re.escape(statement))
+            for statement in sorted(self.bulk_statements, key=len, reverse=True)
+        )))
+        skip = tuple("{} ".format(statement) for statement in self.skip_statements)
+        tail = ""
+
+        for data in chunks:
+            data = tail + data
+            end = data.rfind("\n") + 1
+            if end == 0:
+                tail = data
+                continue
 
-            for line in file:
-                yield line
+            tail = data[end:]
+            yield from self._keep_blocks(self._split_blocks(pattern, data[:end]), skip)
 
-            file.close()
+        if tail:
+            yield from self._keep_blocks(self._split_blocks(pattern, tail), skip)
+
+    def _keep_blocks(self, blocks, skip):
+        """Leave out the blocks starting with a skipped statement"""
+        if not skip:
+            return blocks
+
+        if self.stats is not None:
+            return self.stats.skip_lines(blocks, skip)
+
+        return (block for block in blocks if not block.startswith(skip))
+
+    @staticmethod
+    def _split_blocks(pattern, text):
+        """Split a chunk of complete lines into lines and statement blocks"""
+        text = "\n" + text
+        pos = 1
+
+        for match in pattern.finditer(text):
+            start, end = match.start() + 1, match.end() + 1
+            if start > pos:
+                yield from io.StringIO(text[pos:start])
+
+            yield text[start:end]
+            pos = end
+
+        if pos < len(text):
+            yield from io.StringIO(text[pos:])
 
     def next_line(self):
         """Read the next line from the line generator and split it"""
         self.line = next(self.lines)  # Will raise StopIteration when there are no more lines
-        self.values = self.line.split()
+        if self.text_prefixes and self.line.startswith(self.text_prefixes):
+            self.values = self.line.split(None, 1)
+        else:
+            self.values = self.line.split()
 
     def consume_line(self):
         """
@@ -107,11 +221,110 @@ class Parser:
         self.line = None
         self.values = None
 
+    def consume_float_block(self, width, as_array=False):
+        """
+        Convert the current line or block of lines (see ``bulk_statements``)
+        in a single pass instead of line by line.
+        Irregular blocks where the lines don't have the same number
+        of values fall back to converting each line separately.
+
+        :param width: Function returning how many values to keep on a line
+                      from the number of values on that line
+        :param as_array: Return a numpy array of ``array_dtype`` instead of a list of tuples
+        :return: List of float tuples or a (n, width) numpy array
+        """
+        if as_array:
+            block = self._text_float_block(width)
+            if block is not None:
+                return block
+
+        if self.line.startswith(self.text_prefixes):
+            # Only the statement was split from the line. See ``next_line``
+            self.values = self.line.split()
+
+        statement = self.values[0]
+        count = self.line.count("\n") + (not self.line.endswith("\n"))
+        stride = len(self.values) // count
+
+        if len(self.values) != count * stride or self.values[::stride].count(statement) != count:
+            rows = []
+            for line in io.StringIO(self.line):
+                values = line.split()
+                keep = self._block_width(statement, width, len(values) - 1)
+                rows.append(tuple(float(v) for v in values[1:keep + 1]))
+
+            return as_float_matrix(rows, 0, dtype=self.array_dtype) if as_array else rows
+
+        size = stride - 1
+        keep = self._block_width(statement, width, size)
+        values = self.values
+        del values[::stride]
+
+        if keep < size:
+            # Extra values such as trailing comments are dropped before converting
+            columns = [values[i::size] for i in range(keep)]
+            if as_array:
+                return numpy.array(columns, dtype=numpy.float64).T.astype(self.array_dtype, order='C')
+
+            return list(zip(*(map(float, column) for column in columns)))
+
+        if as_array:
+            return numpy.array(values, dtype=numpy.float64).reshape(count, size).astype(self.array_dtype)
+
+        it = map(float, values)
+        return list(zip(*[it] * size))
+
+    def _text_float_block(self, width):
+        """
+        Convert the text of a block from ``text_prefixes`` in a single numpy call
+
+        :return: (n, width) numpy array or None if the block has to be converted from its values
+        """
+        prefix = self.values[0] + " "
+        if prefix not in self.text_prefixes or not self.line.startswith(prefix):
+            return None
+
+        text = self.line[len(prefix):].replace("\n" + prefix, "\n")
+        try:
+            block = numpy.loadtxt(io.StringIO(text), dtype=numpy.float64, comments=None, ndmin=2)
+        except ValueError:
+            # Lines with a different number of values, trailing comments or values that are not numbers
+            return None
+
+        keep = self._block_width(self.values[0], width, block.shape[1])
+        return block[:, :keep].astype(self.array_dtype)
+
+    @staticmethod
+    def _block_width(statement, width, size):
+        """Number of values to keep from a line with ``size`` values"""
+        keep = width(size)
+        if size < keep:
+            raise PywavefrontException("Expected at least {} values in '{}' statement, got {}".format(
+                keep, statement, size))
+
+        return keep
+
     def parse(self):
         """
         Parse all the lines in the obj file
         Determines what type of line we are and dispatch appropriately.
         """
+        for _ in self.iter_parse():
+            pass
+
+        if self.auto_post_parse:
+            self.post_parse()
+
+    def iter_parse(self):
+        """
+        Generator parsing the file one statement at a time.
+        Yields after every dispatched statement so the caller can
+        inspect the parser state while the file is being parsed.
+        """
+        stats = self.stats
+        if stats is not None:
+            self.lines = stats.track_lines(self.lines, self.dispatcher)
+
         try:
             # Continues until `next_line()` raises StopIteration
             # This can trigger here or in parse functions in the subclass
@@ -126,12 +339,19 @@ class Parser:
                     self.consume_line()
                     continue
 
-                self.dispatcher.get(self.values[0], self.parse_fallback)()
+                if stats is None:
+                    self.dispatcher.get(self.values[0], self.parse_fallback)()
+                else:
+                    name = self.values[0]
+                    if name in self.dispatcher:
+                        stats.dispatch(name, self.dispatcher[name])
+                    else:
+                        stats.dispatch(UNKNOWN, self.parse_fallback)
+                yield
         except StopIteration:
             pass
 
-        if self.auto_post_parse:
-            self.post_parse()
+        self.report_unknown_statements()
 
     def post_parse(self):
         """Override to trigger operations after parsing is complete"""
@@ -143,9 +363,19 @@ class Parser:
         if self.strict:
             raise PywavefrontException("Unimplemented OBJ format statement '%s' on line '%s'"
                                        % (self.values[0], self.line.rstrip()))
+
+        # Logging every line is slow for files with many unknown statements
+        unknown = self.unknown_statements.get(self.values[0])
+        if unknown is None:
+            self.unknown_statements[self.values[0]] = [1, self.line.rstrip()]
         else:
-            logger.warning("Unimplemented OBJ format statement '%s' on line '%s'"
-                            % (self.values[0], self.line.rstrip()))
+            unknown[0] += 1
+
+    def report_unknown_statements(self):
+        """Log a warning for every unknown statement type found while parsing"""
+        for statement, (count, line) in self.unknown_statements.items():
+            logger.warning("%s: Unimplemented OBJ format statement '%s' found %d time(s). First on line '%s'",
+                           self.file_name, statement, count, line)
 
     def _build_dispatch_map(self):
         """
@@ -155,7 +385,28 @@ class Parser:
         Parse methods must start with `parse_` to be registered.
         The suffix should be the name of the obj statement
         such as `parse_v` for vertex statements.
+
+        The method names are only looked up once for each parser class.
         """
-        return {"_".join(a.split("_")[1:]): getattr(self, a)
-                for a in dir(self)
-                if a.startswith("parse_")}
+        cls = type(self)
+        names = Parser._dispatch_names.get(cls)
+        if names is None:
+            names = Parser._dispatch_names[cls] = {
+                "_".join(a.split("_")[1:]): a
+                for a in dir(cls)
+                if a.startswith("parse_")
+            }
+
+        return {statement: getattr(self, name) for statement, name in names.items()}
+
+    def __getstate__(self):
+        """Parsers are pickled without the line generator and bound parse methods"""
+        state = self.__dict__.copy()
+        del state['lines']
+        del state['dispatcher']
+        return state
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        self.dispatcher = self._build_dispatch_map()
+        self.lines = self.create_line_generator()
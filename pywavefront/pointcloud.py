@@ -0,0 +1,242 @@
+# ----------------------------------------------------------------------------
+# PyWavefront
+# Copyright (c) 2018 Kurt Yoder
+# All rights reserved.
+#
+# Redistribution and use in source and binary forms, with or without
+# modification, are permitted provided that the following conditions
+# are met:
+#
+#  * Redistributions of source code must retain the above copyright
+#    notice, this list of conditions and the following disclaimer.
+#  * Redistributions in binary form must reproduce the above copyright
+#    notice, this list of conditions and the following disclaimer in
+#    the documentation and/or other materials provided with the
+#    distribution.
+#  * Neither the name of PyWavefront nor the names of its
+#    contributors may be used to endorse or promote products
+#    derived from this software without specific prior written
+#    permission.
+#
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS
+# "AS IS" AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT
+# LIMITED TO, THE IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS
+# FOR A PARTICULAR PURPOSE ARE DISCLAIMED. IN NO EVENT SHALL THE
+# COPYRIGHT OWNER OR CONTRIBUTORS BE LIABLE FOR ANY DIRECT, INDIRECT,
+# INCIDENTAL, SPECIAL, EXEMPLARY, OR CONSEQUENTIAL DAMAGES (INCLUDING,
+# BUT NOT LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS OR SERVICES;
+# LOSS OF USE, DATA, OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER
+# CAUSED AND ON ANY THEORY OF LIABILITY, WHETHER IN CONTRACT, STRICT
+# LIABILITY, OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN
+# ANY WAY OUT OF THE USE OF THIS SOFTWARE, EVEN IF ADVISED OF THE
+# POSSIBILITY OF SUCH DAMAGE.
+# ----------------------------------------------------------------------------
+"""
+Fast loading of point clouds stored as obj files.
+
+Point cloud exports such as LiDAR scans are obj files with millions of
+``v x y z`` or ``v x y z r g b`` statements and no faces. ``load_point_cloud``
+reads these files as bytes in large chunks and converts every chunk with
+``numpy.loadtxt`` instead of parsing the vertices line by line, returning
+a ``(n, 3)`` or ``(n, 6)`` float32 array like ``Wavefront(storage="numpy").vertices``.
+"""
+import io
+import logging
+import re
+import time
+from pathlib import Path
+
+from pywavefront.cache import CacheLoader, CacheWriter, CACHE_GZIP, validate_cache_format
+from pywavefront.exceptions import PywavefrontException
+from pywavefront.parser import COMPRESSED_FORMATS
+from pywavefront.storage import numpy, ArrayBuilder, STORAGE_NUMPY, as_float_matrix, require_numpy
+from pywavefront.wavefront import Wavefront
+
+logger = logging.getLogger("pywavefront")
+
+# Statements without geometry that are allowed in point clouds
+IGNORED_STATEMENTS = (b"o", b"g", b"s", b"mtllib", b"usemtl")
+# Comment and empty lines removed before a chunk is converted again
+SKIPPED_LINES = re.compile(rb"^(?:#.*)?\r?\n", re.MULTILINE)
+
+
+class PointCloudParser:
+    """Reads the vertices of an obj file only containing ``v`` statements"""
+    # Number of bytes read and converted at a time
+    chunk_size = 1 << 22
+    cache_loader_cls = CacheLoader
+    cache_writer_cls = CacheWriter
+
+    def __init__(self, file_name, cache=False, cache_format=CACHE_GZIP):
+        """
+        :param file_name: Name and path of the obj file
+        :param cache: Cache the points in a binary file. See :py:mod:`pywavefront.cache`
+        :param cache_format: "gzip" compressed or memory mappable "raw" cache files
+        """
+        require_numpy("load_point_cloud()")
+        validate_cache_format(cache_format)
+
+        self.file_name = Path(file_name).resolve()
+        self.cache = cache
+        self.cache_format = cache_format
+        self.cache_loaded = None
+        # Values per point. Set by the first vertex: 6 with vertex colors, otherwise 3
+        self.width = None
+
+    def parse(self):
+        """
+        Load the points from the cache or the obj file
+
+        :return: (n, 3) or (n, 6) float32 array
+        """
+        start = time.time()
+
+        points = self.load_cache() if self.cache else None
+        self.cache_loaded = points is not None
+
+        if not self.cache_loaded:
+            points = self.read_points()
+            if self.cache:
+                self.write_cache(points)
+
+        logger.info("%s: Load time: %s", self.file_name, time.time() - start)
+        return points
+
+    def parse_options(self):
+        """Options stored in the cache. Caches of other parse results are not loaded"""
+        return {"point_cloud": True}
+
+    def load_cache(self):
+        """The cached points or None if there is no usable cache"""
+        wavefront = Wavefront(self.file_name, parse=False, storage=STORAGE_NUMPY)
+        loader = self.cache_loader_cls(
+            self.file_name,
+            wavefront,
+            storage=STORAGE_NUMPY,
+            parse_options=self.parse_options(),
+        )
+        if not loader.parse():
+            return None
+
+        return as_float_matrix(wavefront.vertices, 3)
+
+    def write_cache(self, points):
+        """Write the points as the vertices of an otherwise empty wavefront"""
+        wavefront = Wavefront(self.file_name, parse=False, storage=STORAGE_NUMPY)
+        wavefront.vertices = points
+        self.cache_writer_cls(
+            self.file_name,
+            wavefront,
+            cache_format=self.cache_format,
+            parse_options=self.parse_options(),
+        ).write()
+
+    def read_points(self):
+        """Convert the points in the file chunk by chunk"""
+        builder = ArrayBuilder(3)
+        for data in self.read_chunks():
+            points = self.convert_chunk(data)
+            if len(points):
+                builder.append(points)
+
+        return builder.array()
+
+    def read_chunks(self):
+        """Read the file in chunks of complete lines. Compressed files are decompressed while reading"""
+        opener = COMPRESSED_FORMATS.get(self.file_name.suffix, open)
+        tail = b""
+
+        with opener(str(self.file_name), mode='rb') as fd:
+            while True:
+                data = fd.read(self.chunk_size)
+                if not data:
+                    break
+
+                data = tail + data
+                end = data.rfind(b"\n") + 1
+                tail = data[end:]
+                if end:
+                    yield data[:end]
+
+        if tail:
+            yield tail + b"\n"
+
+    def convert_chunk(self, data):
+        """
+        Convert a chunk of complete lines to a (n, width) float32 array.
+        Chunks only containing vertex statements are converted in a single pass.
+        Comment and empty lines are removed first if needed, and anything else
+        falls back to converting line by line.
+        """
+        points = self.convert_block(data)
+        if points is None:
+            stripped = SKIPPED_LINES.sub(b"", data)
+            if stripped:
+                points = self.convert_block(stripped)
+        if points is None:
+            points = self.convert_lines(data)
+
+        return points
+
+    def convert_block(self, data):
+        """
+        Convert lines that all start with ``v`` in one numpy call.
+        The number of values to keep is decided by the first line.
+
+        :return: (n, width) float32 array or None if the lines are irregular
+        """
+        count = data.count(b"\n")
+        if not data.startswith(b"v ") or data.count(b"\nv ") != count - 1:
+            return None
+
+        width = self.point_width(len(data[:data.index(b"\n")].split()) - 1)
+        try:
+            return numpy.loadtxt(io.BytesIO(data), dtype=numpy.float32, usecols=range(1, width + 1),
+                                 comments=None, ndmin=2)
+        except ValueError:
+            # Lines with less values or values that are not numbers
+            return None
+
+    def convert_lines(self, data):
+        """Convert a chunk one line at a time. Raises an exception for statements other than vertices"""
+        rows = []
+
+        for line in data.splitlines():
+            values = line.split()
+            if not values or values[0].startswith(b"#") or values[0] in IGNORED_STATEMENTS:
+                continue
+
+            if values[0] != b"v":
+                raise PywavefrontException("{} is not a point cloud. Found '{}' statement on line '{}'".format(
+                    self.file_name, values[0].decode(errors="replace"), line.decode(errors="replace").rstrip()))
+
+            width = self.point_width(len(values) - 1)
+            rows.append([float(v) for v in values[1:width + 1]])
+
+        return as_float_matrix(rows, self.width or 3)
+
+    def point_width(self, size):
+        """Number of values to keep from a vertex with ``size`` values"""
+        if self.width is None:
+            self.width = 6 if size == 6 else 3
+
+        if size < self.width:
+            raise PywavefrontException("Expected at least {} values in 'v' statement, got {}".format(
+                self.width, size))
+
+        return self.width
+
+
+def load_point_cloud(file_name, cache=False, cache_format=CACHE_GZIP):
+    """
+    Load the vertices of an obj file only containing ``v`` statements, such as
+    a LiDAR scan, as a float32 array. Requires numpy.
+    Comments and the ``o``, ``g``, ``s``, ``mtllib`` and ``usemtl`` statements
+    are ignored. Any other statement raises a ``PywavefrontException``.
+
+    :param file_name: Name and path of the obj file. Can be compressed
+    :param cache: Cache the points in a binary file for faster loading
+    :param cache_format: "gzip" (default) or "raw" for uncompressed memory mapped cache files
+    :return: (n, 3) array of positions or (n, 6) array of positions and vertex colors
+    """
+    return PointCloudParser(file_name, cache=cache, cache_format=cache_format).parse()
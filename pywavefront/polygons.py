@@ -0,0 +1,163 @@
+# ----------------------------------------------------------------------------
+# PyWavefront
+# Copyright (c) 2018 Kurt Yoder
+# All rights reserved.
+#
+# Redistribution and use in source and binary forms, with or without
+# modification, are permitted provided that the following conditions
+# are met:
+#
+#  * Redistributions of source code must retain the above copyright
+#    notice, this list of conditions and the following disclaimer.
+#  * Redistributions in binary form must reproduce the above copyright
+#    notice, this list of conditions and the following disclaimer in
+#    the documentation and/or other materials provided with the
+#    distribution.
+#  * Neither the name of PyWavefront nor the names of its
+#    contributors may be used to endorse or promote products
+#    derived from this software without specific prior written
+#    permission.
+#
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS
+# "AS IS" AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT
+# LIMITED TO, THE IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS
+# FOR A PARTICULAR PURPOSE ARE DISCLAIMED. IN NO EVENT SHALL THE
+# COPYRIGHT OWNER OR CONTRIBUTORS BE LIABLE FOR ANY DIRECT, INDIRECT,
+# INCIDENTAL, SPECIAL, EXEMPLARY, OR CONSEQUENTIAL DAMAGES (INCLUDING,
+# BUT NOT LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS OR SERVICES;
+# LOSS OF USE, DATA, OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER
+# CAUSED AND ON ANY THEORY OF LIABILITY, WHETHER IN CONTRACT, STRICT
+# LIABILITY, OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN
+# ANY WAY OUT OF THE USE OF THIS SOFTWARE, EVEN IF ADVISED OF THE
+# POSSIBILITY OF SUCH DAMAGE.
+# ----------------------------------------------------------------------------
+"""
+Polygon faces stored without triangulation.
+
+The faces of a mesh are kept in a compressed sparse row (CSR) layout:
+``indices`` holds the vertex indices of every face one after the other
+and ``offsets`` where each face starts followed by the total number of
+indices. The vertices of face ``i`` are ``indices[offsets[i]:offsets[i + 1]]``.
+Both are int32 arrays, so a quad takes 20 bytes instead of two
+triangles stored as python lists.
+"""
+import array
+
+from pywavefront.storage import numpy
+
+
+def triangle_fans(offsets):
+    """
+    Positions of the fan triangulated corners in the flat index array of CSR faces.
+    Faces are triangulated the same way as :meth:`ObjParser.consume_faces`:
+    ``(v_1, v_2, v_3)`` followed by ``(v_j, v_1, v_{j - 1})`` for each vertex ``v_j``, j > 3.
+    Faces with less than three vertices are skipped. Requires numpy.
+
+    :param offsets: Start of every face followed by the total number of indices
+    :return: (n, 3) int64 array of positions
+    """
+    offsets = numpy.asarray(offsets, dtype=numpy.int64)
+    counts = numpy.maximum(offsets[1:] - offsets[:-1] - 2, 0)
+    total = int(counts.sum())
+
+    # The face start of every triangle and its position k within the face
+    starts = numpy.repeat(offsets[:-1], counts)
+    k = numpy.arange(total, dtype=numpy.int64) - numpy.repeat(numpy.cumsum(counts) - counts, counts)
+
+    corners = numpy.empty((total, 3), dtype=numpy.int64)
+    corners[:, 0] = starts + k + 2
+    corners[:, 1] = starts
+    corners[:, 2] = starts + k + 1
+
+    # The first triangle of a face keeps the original vertex order
+    first = k == 0
+    corners[first] = starts[first, None] + numpy.arange(3)
+
+    return corners
+
+
+class Polygons:
+    """Polygon faces of a mesh in CSR layout"""
+
+    def __init__(self, indices=None, offsets=None):
+        """
+        :param indices: Flat vertex indices of all faces
+        :param offsets: Start of every face in ``indices`` followed by the number of indices
+        """
+        self.indices = array.array('i') if indices is None else indices
+        self.offsets = array.array('i', [0]) if offsets is None else offsets
+
+    def __len__(self):
+        return len(self.offsets) - 1
+
+    def __getitem__(self, index):
+        """List of the vertex indices of a face"""
+        if index < 0:
+            index += len(self)
+        if not 0 <= index < len(self):
+            raise IndexError("face index out of range")
+
+        return [int(value) for value in self.indices[self.offsets[index]:self.offsets[index + 1]]]
+
+    def __iter__(self):
+        for index in range(len(self)):
+            yield self[index]
+
+    def add(self, face):
+        """Add a face from a sequence of vertex indices"""
+        self.indices.extend(face)
+        self.offsets.append(len(self.indices))
+
+    def extend(self, indices, sizes):
+        """
+        Add several faces at once
+
+        :param indices: Flat vertex indices of the faces
+        :param sizes: Number of vertices of every face
+        """
+        end = len(self.indices)
+        self.indices.extend(indices)
+        for size in sizes:
+            end += size
+            self.offsets.append(end)
+
+    def sizes(self):
+        """List with the number of vertices of every face"""
+        offsets = self.offsets
+        return [int(offsets[i + 1] - offsets[i]) for i in range(len(self))]
+
+    def triangle_count(self):
+        """Number of triangles produced by ``triangles``"""
+        return sum(max(size - 2, 0) for size in self.sizes())
+
+    def as_numpy(self):
+        """Polygons with int32 numpy arrays. The arrays are not copied if already int32"""
+        return Polygons(
+            numpy.asarray(self.indices, dtype=numpy.int32),
+            numpy.asarray(self.offsets, dtype=numpy.int32),
+        )
+
+    def triangles(self):
+        """
+        Fan triangulate the faces the same way as :meth:`ObjParser.consume_faces`.
+        See :func:`triangle_fans`.
+
+        :return: (n, 3) int32 numpy array when numpy is installed,
+                 otherwise a list of vertex index triples like ``Mesh.faces``
+        """
+        if numpy is None:
+            return self._triangles_list()
+
+        return numpy.asarray(self.indices, dtype=numpy.int32)[triangle_fans(self.offsets)]
+
+    def _triangles_list(self):
+        """Pure python version of ``triangles``"""
+        triangles = []
+        for face in self:
+            for j in range(2, len(face)):
+                if j == 2:
+                    triangles.append(face[0:3])
+                else:
+                    triangles.append([face[j], face[0], face[j - 1]])
+
+        return triangles
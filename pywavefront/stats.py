@@ -0,0 +1,206 @@
+# ----------------------------------------------------------------------------
+# PyWavefront
+# Copyright (c) 2018 Kurt Yoder
+# All rights reserved.
+#
+# Redistribution and use in source and binary forms, with or without
+# modification, are permitted provided that the following conditions
+# are met:
+#
+#  * Redistributions of source code must retain the above copyright
+#    notice, this list of conditions and the following disclaimer.
+#  * Redistributions in binary form must reproduce the above copyright
+#    notice, this list of conditions and the following disclaimer in
+#    the documentation and/or other materials provided with the
+#    distribution.
+#  * Neither the name of PyWavefront nor the names of its
+#    contributors may be used to endorse or promote products
+#    derived from this software without specific prior written
+#    permission.
+#
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS
+# "AS IS" AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT
+# LIMITED TO, THE IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS
+# FOR A PARTICULAR PURPOSE ARE DISCLAIMED. IN NO EVENT SHALL THE
+# COPYRIGHT OWNER OR CONTRIBUTORS BE LIABLE FOR ANY DIRECT, INDIRECT,
+# INCIDENTAL, SPECIAL, EXEMPLARY, OR CONSEQUENTIAL DAMAGES (INCLUDING,
+# BUT NOT LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS OR SERVICES;
+# LOSS OF USE, DATA, OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER
+# CAUSED AND ON ANY THEORY OF LIABILITY, WHETHER IN CONTRACT, STRICT
+# LIABILITY, OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN
+# ANY WAY OUT OF THE USE OF THIS SOFTWARE, EVEN IF ADVISED OF THE
+# POSSIBILITY OF SUCH DAMAGE.
+# ----------------------------------------------------------------------------
+"""
+Optional parse instrumentation.
+
+``Wavefront(file_name, stats=True)`` records the number of lines and the
+time spent on each statement type, the time spent reading the file, loading
+and writing the cache and converting the storage in ``wavefront.parse_stats``.
+"""
+import contextlib
+import os
+import time
+
+# Statements without a parse method are recorded under this name
+UNKNOWN = "unknown"
+
+
+class StatementStats:
+    """Number of lines and cumulative parse time of a statement type"""
+    __slots__ = ('lines', 'time')
+
+    def __init__(self):
+        self.lines = 0
+        self.time = 0.0
+
+    def as_dict(self):
+        return {"lines": self.lines, "time": self.time}
+
+    def __repr__(self):
+        return "<StatementStats lines={} time={:.6f}>".format(self.lines, self.time)
+
+
+class ParseStats:
+    """
+    Statistics collected while parsing a file.
+    Times are wall clock seconds. The time reading lines from the file is recorded
+    in ``io_time`` and not included in the time of the statements.
+    """
+
+    def __init__(self, file_name):
+        self.file_name = str(file_name)
+        # StatementStats by statement name
+        self.statements = {}
+        # Size of the obj file, or the cache file when the cache was loaded
+        self.bytes_read = 0
+        self.total_time = 0.0
+        self.io_time = 0.0
+        self.parse_time = 0.0
+        self.cache_load_time = 0.0
+        self.cache_write_time = 0.0
+        self.convert_time = 0.0
+        self.cache_loaded = False
+        self._start = None
+
+    def statement(self, name):
+        """Get the StatementStats for a statement"""
+        stats = self.statements.get(name)
+        if stats is None:
+            stats = self.statements[name] = StatementStats()
+        return stats
+
+    def begin(self):
+        """Start measuring the total time"""
+        self._start = time.perf_counter()
+
+    def end(self):
+        """Stop measuring the total time"""
+        if self._start is not None:
+            self.total_time += time.perf_counter() - self._start
+            self._start = None
+
+    @contextlib.contextmanager
+    def timer(self, field):
+        """Context manager adding the elapsed time to ``field``"""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            setattr(self, field, getattr(self, field) + time.perf_counter() - start)
+
+    def add_file(self, file_name):
+        """Record reading an entire file"""
+        try:
+            self.bytes_read += os.path.getsize(str(file_name))
+        except OSError:
+            pass
+
+    def track_lines(self, lines, known):
+        """
+        Wrap a line generator counting the lines of every statement
+        and the time spent reading them
+
+        :param lines: The line generator
+        :param known: Statements that have a parse method
+        """
+        lines = iter(lines)
+        clock = time.perf_counter
+
+        while True:
+            start = clock()
+            try:
+                line = next(lines)
+            except StopIteration:
+                self.io_time += clock() - start
+                return
+
+            self.io_time += clock() - start
+
+            values = line.split(None, 1)
+            if values and values[0][0] != '#':
+                name = values[0] if values[0] in known else UNKNOWN
+                self.statement(name).lines += line.count("\n") or 1
+
+            yield line
+
+    def skip_lines(self, lines, skip):
+        """
+        Leave out lines and blocks starting with a skipped statement.
+        Their lines are counted without being parsed.
+
+        :param lines: Lines and statement blocks
+        :param skip: Tuple of the skipped statements followed by a space
+        """
+        for line in lines:
+            if line.startswith(skip):
+                self.statement(line[:line.index(" ")]).lines += line.count("\n") or 1
+            else:
+                yield line
+
+    def dispatch(self, name, func):
+        """
+        Call a parse method recording its time
+
+        :param name: The statement name or ``UNKNOWN``
+        :param func: The parse method
+        """
+        io_time = self.io_time
+        start = time.perf_counter()
+        try:
+            func()
+        finally:
+            # Lines read by the parse method are recorded as io time
+            elapsed = time.perf_counter() - start - (self.io_time - io_time)
+            self.statement(name).time += elapsed
+            self.parse_time += elapsed
+
+    def as_dict(self):
+        """Statistics as a dictionary of plain values for logging and metrics"""
+        return {
+            "file_name": self.file_name,
+            "bytes_read": self.bytes_read,
+            "total_time": self.total_time,
+            "io_time": self.io_time,
+            "parse_time": self.parse_time,
+            "cache_load_time": self.cache_load_time,
+            "cache_write_time": self.cache_write_time,
+            "convert_time": self.convert_time,
+            "cache_loaded": self.cache_loaded,
+            "statements": {name: stats.as_dict() for name, stats in self.statements.items()},
+        }
+
+    def __repr__(self):
+        return "<ParseStats {} total={:.3f}s io={:.3f}s parse={:.3f}s statements={}>".format(
+            self.file_name, self.total_time, self.io_time, self.parse_time,
+            {name: stats.lines for name, stats in sorted(self.statements.items())})
+
+
+@contextlib.contextmanager
+def timer(stats, field):
+    """``ParseStats.timer`` doing nothing when ``stats`` is None"""
+    if stats is None:
+        yield
+    else:
+        with stats.timer(field):
+            yield
@@ -0,0 +1,278 @@
+# ----------------------------------------------------------------------------
+# PyWavefront
+# Copyright (c) 2018 Kurt Yoder
+# All rights reserved.
+#
+# Redistribution and use in source and binary forms, with or without
+# modification, are permitted provided that the following conditions
+# are met:
+#
+#  * Redistributions of source code must retain the above copyright
+#    notice, this list of conditions and the following disclaimer.
+#  * Redistributions in binary form must reproduce the above copyright
+#    notice, this list of conditions and the following disclaimer in
+#    the documentation and/or other materials provided with the
+#    distribution.
+#  * Neither the name of PyWavefront nor the names of its
+#    contributors may be used to endorse or promote products
+#    derived from this software without specific prior written
+#    permission.
+#
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS
+# "AS IS" AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT
+# LIMITED TO, THE IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS
+# FOR A PARTICULAR PURPOSE ARE DISCLAIMED. IN NO EVENT SHALL THE
+# COPYRIGHT OWNER OR CONTRIBUTORS BE LIABLE FOR ANY DIRECT, INDIRECT,
+# INCIDENTAL, SPECIAL, EXEMPLARY, OR CONSEQUENTIAL DAMAGES (INCLUDING,
+# BUT NOT LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS OR SERVICES;
+# LOSS OF USE, DATA, OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER
+# CAUSED AND ON ANY THEORY OF LIABILITY, WHETHER IN CONTRACT, STRICT
+# LIABILITY, OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN
+# ANY WAY OUT OF THE USE OF THIS SOFTWARE, EVEN IF ADVISED OF THE
+# POSSIBILITY OF SUCH DAMAGE.
+# ----------------------------------------------------------------------------
+"""
+Helpers for storing parsed geometry in compact array types.
+
+``numpy`` is an optional dependency and is only required when
+``storage="numpy"`` is used. ``storage="array"`` stores the material
+vertex data in ``array.array`` objects from the standard library.
+"""
+import array
+import bisect
+
+from pywavefront.exceptions import PywavefrontException
+
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
+STORAGE_LIST = "list"
+STORAGE_NUMPY = "numpy"
+STORAGE_ARRAY = "array"
+STORAGE_TYPES = (STORAGE_LIST, STORAGE_NUMPY, STORAGE_ARRAY)
+
+
+def validate_storage(storage):
+    """Ensure the storage type is known and its dependencies are installed"""
+    if storage not in STORAGE_TYPES:
+        raise ValueError("Unknown storage type '{}'. Supported types: {}".format(
+            storage, ", ".join(STORAGE_TYPES)))
+
+    if storage == STORAGE_NUMPY:
+        require_numpy("storage='numpy'")
+
+
+def require_numpy(feature):
+    """Raise an exception if numpy is not installed"""
+    if numpy is None:
+        raise PywavefrontException("numpy is required to use {}".format(feature))
+
+
+def is_array(value):
+    """Is the value a numpy array?"""
+    return numpy is not None and isinstance(value, numpy.ndarray)
+
+
+def as_float_array(values):
+    """Convert a flat sequence of floats to a contiguous float32 array"""
+    if is_array(values) and values.dtype == numpy.float32:
+        return numpy.ascontiguousarray(values)
+
+    return numpy.asarray(values, dtype=numpy.float32).reshape(-1)
+
+
+def as_index_array(values):
+    """Convert a flat sequence of indices to a contiguous uint32 array"""
+    if is_array(values) and values.dtype == numpy.uint32:
+        return numpy.ascontiguousarray(values)
+
+    return numpy.asarray(values, dtype=numpy.uint32).reshape(-1)
+
+
+def as_int_array(values):
+    """Convert a flat sequence of signed indices to a contiguous int32 array"""
+    if is_array(values) and values.dtype == numpy.int32:
+        return numpy.ascontiguousarray(values)
+
+    return numpy.asarray(values, dtype=numpy.int32).reshape(-1)
+
+
+def as_float_buffer(values):
+    """Convert a flat sequence of floats to a float32 ``array.array``"""
+    if isinstance(values, array.array) and values.typecode == 'f':
+        return values
+
+    if is_array(values):
+        return array.array('f', values.astype(numpy.float32, copy=False).tobytes())
+
+    return array.array('f', values)
+
+
+def as_index_buffer(values):
+    """Convert a flat sequence of indices to a uint32 ``array.array``"""
+    if isinstance(values, array.array) and values.typecode == 'I':
+        return values
+
+    if is_array(values):
+        return array.array('I', values.astype(numpy.uint32, copy=False).tobytes())
+
+    return array.array('I', values)
+
+
+def as_int_buffer(values):
+    """Convert a flat sequence of signed indices to an int32 ``array.array``"""
+    if isinstance(values, array.array) and values.typecode == 'i':
+        return values
+
+    if is_array(values):
+        return array.array('i', values.astype(numpy.int32, copy=False).tobytes())
+
+    return array.array('i', values)
+
+
+def as_ctypes_array(ctype, typecode, values):
+    """
+    Create a ctypes array of the values, for example to pass them to OpenGL.
+    Writable buffers with the same item type (``array.array``, numpy arrays and
+    cached buffers) are shared without copying. Other sequences are copied.
+
+    :param ctype: The ctypes item type such as ``ctypes.c_float``
+    :param typecode: Buffer format of the item type. ``f`` for float32 or ``I`` for uint32
+    :param values: Flat sequence or buffer of values
+    """
+    try:
+        view = memoryview(values)
+    except TypeError:
+        return (ctype * len(values))(*values)
+
+    if view.format != typecode or not view.c_contiguous:
+        return (ctype * len(values))(*values)
+
+    if view.readonly:
+        return (ctype * len(values)).from_buffer_copy(view)
+
+    return (ctype * len(values)).from_buffer(view)
+
+
+def as_float_matrix(values, width, dtype="float32"):
+    """
+    Convert a sequence of equally sized tuples to a contiguous
+    ``(n, width)`` float32 array.
+
+    :param values: Sequence of float tuples
+    :param width: Row width used when the sequence is empty
+    :param dtype: Use another float type than float32
+    """
+    if is_array(values) and values.dtype == dtype and values.ndim == 2:
+        return numpy.ascontiguousarray(values)
+
+    if len(values) == 0:
+        return numpy.zeros((0, width), dtype=dtype)
+
+    sizes = {len(v) for v in values}
+    if len(sizes) > 1:
+        raise PywavefrontException(
+            "Cannot store rows of mixed sizes {} in a single array".format(sorted(sizes)))
+
+    return numpy.array(values, dtype=dtype)
+
+
+class ArrayBuilder:
+    """
+    Collects blocks of float32 rows while parsing and merges them into
+    a single ``(n, width)`` array when done. Rows can be looked up by index
+    like in a numpy array without merging the blocks.
+    """
+
+    def __init__(self, width, dtype="float32"):
+        """
+        :param width: Row width used when no blocks were added
+        :param dtype: Float type of the blocks
+        """
+        self.width = width
+        self.dtype = dtype
+        self.blocks = []
+        self._length = 0
+        # Index of the first row in each block
+        self._starts = []
+
+    def __len__(self):
+        return self._length
+
+    def __getitem__(self, index):
+        """A single row by index or the rows of an integer index array"""
+        if numpy.ndim(index) == 0:
+            return self.row(int(index))
+
+        return self.take(index)
+
+    def append(self, block):
+        """Add a (n, width) float32 block"""
+        self.blocks.append(block)
+        self._starts.append(self._length)
+        self._length += len(block)
+
+    def row(self, index):
+        """Look up a single row without exposing all rows as python lists"""
+        if index < 0:
+            index += self._length
+        if not 0 <= index < self._length:
+            raise IndexError("row index out of range")
+
+        block = bisect.bisect_right(self._starts, index) - 1
+        return self.blocks[block][index - self._starts[block]]
+
+    def take(self, indices):
+        """
+        Gather the rows of an integer index array from all blocks.
+        Negative indices count from the end like in numpy.
+
+        :param indices: Integer indices of the rows
+        :return: (len(indices), width) array
+        """
+        indices = numpy.asarray(indices, dtype=numpy.int64)
+        indices = numpy.where(indices < 0, indices + self._length, indices)
+        if len(indices) and (indices.min() < 0 or indices.max() >= self._length):
+            raise IndexError("row index out of range")
+
+        if len(self.blocks) == 1:
+            return self.blocks[0][indices]
+        if not len(indices):
+            return numpy.zeros((0, self.width), dtype=self.dtype)
+
+        # Group the indices by block so every block is indexed once
+        blocks = numpy.searchsorted(self._starts, indices, side="right") - 1
+        order = numpy.argsort(blocks, kind="stable")
+        used, counts = numpy.unique(blocks[order], return_counts=True)
+
+        sizes = {self.blocks[block].shape[1] for block in used}
+        if len(sizes) > 1:
+            raise PywavefrontException(
+                "Cannot store rows of mixed sizes {} in a single array".format(sorted(sizes)))
+
+        rows = numpy.empty((len(indices), sizes.pop()), dtype=self.dtype)
+        end = 0
+        for block, count in zip(used.tolist(), counts.tolist()):
+            selected = order[end:end + count]
+            rows[selected] = self.blocks[block][indices[selected] - self._starts[block]]
+            end += count
+
+        return rows
+
+    def array(self):
+        """Merge all blocks into one contiguous array kept as the only block"""
+        if not self.blocks:
+            return numpy.zeros((0, self.width), dtype=self.dtype)
+
+        if len(self.blocks) > 1:
+            sizes = {block.shape[1] for block in self.blocks}
+            if len(sizes) > 1:
+                raise PywavefrontException(
+                    "Cannot store rows of mixed sizes {} in a single array".format(sorted(sizes)))
+
+            self.blocks = [numpy.concatenate(self.blocks)]
+            self._starts = [0]
+
+        return self.blocks[0]
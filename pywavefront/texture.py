@@ -33,7 +33,10 @@
 # ----------------------------------------------------------------------------
 # See: http://paulbourke.net/dataformats/mtl/
 
+import collections
 import pywavefront
+import os
+import threading
 from pathlib import Path, PureWindowsPath
 import re
 
@@ -173,7 +176,139 @@ class TextureOptionsParser:
         self._options.texres = next(self._gen)
 
 
+class TextureIndex:
+    """
+    Index of the files in a directory tree by file name.
+    The tree is walked once and walked again when the modification
+    time of any directory in the tree changes.
+    """
+
+    def __init__(self, root):
+        """
+        :param root: The directory to index
+        """
+        self.root = root
+        self._files = {}
+        self._files_lower = None
+        self._directories = {}
+        self.build()
+
+    def build(self):
+        """Walk the directory tree collecting file paths by name"""
+        files = {}
+        directories = {}
+
+        for directory, _, names in os.walk(self.root):
+            try:
+                directories[directory] = os.stat(directory).st_mtime_ns
+            except OSError:
+                continue
+
+            for name in names:
+                files.setdefault(name, []).append(os.path.join(directory, name))
+
+        self._files = files
+        self._files_lower = None
+        self._directories = directories
+
+    def is_valid(self):
+        """bool: Have no files been added to or removed from the directory tree"""
+        if not os.path.isdir(self.root):
+            return not self._directories
+
+        for directory, mtime in self._directories.items():
+            try:
+                if os.stat(directory).st_mtime_ns != mtime:
+                    return False
+            except OSError:
+                return False
+
+        return True
+
+    def find(self, file_name, case_sensitive=True):
+        """
+        Look up a file by name
+
+        :param file_name: The file name without directories
+        :param case_sensitive: Compare names case sensitive
+        :return: List of paths to files with this name
+        """
+        if case_sensitive:
+            return self._files.get(file_name, [])
+
+        if self._files_lower is None:
+            self._files_lower = {}
+            for name, paths in self._files.items():
+                self._files_lower.setdefault(name.lower(), []).extend(paths)
+
+        return self._files_lower.get(file_name.lower(), [])
+
+
+class TextureResolver:
+    """
+    Finds textures in search paths using a shared ``TextureIndex`` for every search path
+    instead of walking the directory tree for each texture.
+    The least recently used indexes are removed when more than ``max_indexes`` are kept.
+    """
+
+    def __init__(self, max_indexes=64):
+        """
+        :param max_indexes: Maximum number of directory indexes to keep
+        """
+        if not isinstance(max_indexes, int) or max_indexes < 1:
+            raise ValueError("max_indexes must be a positive integer, got {}".format(max_indexes))
+
+        self.max_indexes = max_indexes
+        self._indexes = collections.OrderedDict()
+        self._lock = threading.Lock()
+
+    def find(self, search_path, file_name, case_sensitive=True):
+        """
+        Find a file in a search path including all subdirectories
+
+        :param search_path: The directory to search
+        :param file_name: The file name without directories
+        :param case_sensitive: Compare names case sensitive
+        :return: Path to the file starting with ``search_path`` or None if not found
+        """
+        root = os.path.abspath(str(search_path))
+
+        with self._lock:
+            index = self._indexes.get(root)
+            if index is None:
+                index = self._indexes[root] = TextureIndex(root)
+                while len(self._indexes) > self.max_indexes:
+                    self._indexes.popitem(last=False)
+            self._indexes.move_to_end(root)
+
+            for attempt in range(2):
+                # A stale path or a missing file means the tree may have changed
+                for path in index.find(file_name, case_sensitive=case_sensitive):
+                    if os.path.isfile(path):
+                        return str(Path(search_path, os.path.relpath(path, root)))
+
+                if attempt or index.is_valid():
+                    return None
+
+                index.build()
+
+    def clear(self):
+        """Remove all directory indexes"""
+        with self._lock:
+            self._indexes.clear()
+
+    def __len__(self):
+        return len(self._indexes)
+
+
+# Directory indexes shared by all textures in the process
+default_resolver = TextureResolver()
+
+
 class Texture:
+    # Resolves textures not found at their path. See ``find``
+    resolver = default_resolver
+
     def __init__(self, name, search_path):
         """Create a texture.
 
@@ -204,13 +339,15 @@ class Texture:
         """TextureOptions: Options for this texture"""
         return self._options
 
-    def find(self, path=None):
+    def find(self, path=None, case_sensitive=True):
         """Find the texture in the configured search path
         By default a search will be done in the same directory as
         the obj file including all subdirectories if ``path`` does not exist.
+        The files in the search path are indexed once and shared by all textures.
 
         Args:
             path: Override the search path
+            case_sensitive: Compare file names case sensitive
         Raises:
             FileNotFoundError if not found
         """
@@ -218,15 +355,12 @@ class Texture:
             return self.path
 
         search_path = path or self._search_path
-        locations = Path(search_path).glob('**/{}'.format(self.file_name))
-        # Attempt to look up the first entry of the generator
-        try:
-            first = next(locations)
-        except StopIteration:
+        found = self.resolver.find(search_path, self.file_name, case_sensitive=case_sensitive)
+        if found is None:
             raise FileNotFoundError("Cannot locate texture `{}` in search path: {}".format(
                 self._name, search_path))
 
-        return str(first)
+        return found
 
     @property
     def file_name(self):
@@ -37,6 +37,7 @@ from pyglet.gl import *
 from pywavefront import Wavefront
 from pywavefront.mesh import Mesh
 from pywavefront.material import Material
+from pywavefront.storage import as_ctypes_array
 
 # Mock the _nearest_pow2 method to allow for npot textures
 def same(v):
@@ -80,9 +81,12 @@ def draw_materials(materials, lighting_enabled=True, textures_enabled=True):
 def draw_material(material, face=GL_FRONT_AND_BACK, lighting_enabled=True, textures_enabled=True):
     """Draw a single material"""
     if material.gl_floats is None:
-        material.gl_floats = (GLfloat * len(material.vertices))(*material.vertices)
+        material.gl_floats = as_ctypes_array(GLfloat, 'f', material.vertices)
         material.triangle_count = len(material.vertices) / material.vertex_size
 
+    if material.is_indexed and material.gl_indices is None:
+        material.gl_indices = as_ctypes_array(GLuint, 'I', material.indices)
+
     vertex_format = VERTEX_FORMATS.get(material.vertex_format)
     if not vertex_format:
         raise ValueError("Vertex format {} not supported by pyglet".format(material.vertex_format))
@@ -115,7 +119,10 @@ def draw_material(material, face=GL_FRONT_AND_BACK, lighting_enabled=True, textu
         glColor4f(*material.ambient)
 
     glInterleavedArrays(vertex_format, 0, material.gl_floats)
-    glDrawArrays(GL_TRIANGLES, 0, int(material.triangle_count))
+    if material.is_indexed:
+        glDrawElements(GL_TRIANGLES, len(material.indices), GL_UNSIGNED_INT, material.gl_indices)
+    else:
+        glDrawArrays(GL_TRIANGLES, 0, int(material.triangle_count))
 
     glPopAttrib()
     glPopClientAttrib()
@@ -53,6 +53,17 @@ class Wavefront:
         collect_faces=False,
         parse=True,
         cache=False,
+        storage="list",
+        indexed=False,
+        cache_format="gzip",
+        workers=1,
+        lazy=False,
+        material_cache=None,
+        stats=False,
+        stats_hook=None,
+        collect_polygons=False,
+        topology=False,
+        attributes=None,
     ):
         """
         Create a Wavefront instance
@@ -61,6 +72,23 @@ class Wavefront:
         :param encoding: What text encoding the parser should use
         :param create_materials: Create materials if they don't exist
         :param parse: Should parse be called immediately or manually called later?
+        :param cache: Cache the loaded obj files in binary format
+        :param storage: How parsed geometry is stored: "list" (default), "numpy" (float32 arrays)
+                        or "array" (float32 ``array.array`` material data)
+        :param indexed: Store unique vertices per material with a triangle index buffer
+        :param cache_format: "gzip" (default) or "raw" for uncompressed memory mapped cache files
+        :param workers: Parse the file with this many processes (requires numpy)
+        :param lazy: Only parse meshes when accessed through ``meshes`` (requires numpy)
+        :param material_cache: ``MaterialLibraryCache`` sharing parsed mtl files between loads.
+                               None uses the process wide cache and False disables caching
+        :param stats: Record statement counts and timings in ``parse_stats``
+        :param stats_hook: Function called with the ``ParseStats`` when parsing is done
+        :param collect_polygons: Collect the faces of every mesh without triangulation in ``mesh.polygons``
+        :param topology: Only collect the v, vt and vn indices of the faces in ``material.corner_indices``.
+                         The interleaved vertex data is created by ``build_vertices``
+        :param attributes: Vertex attributes to parse such as ``{"position", "normal"}``.
+                           Supported attributes are "position", "texcoord", "normal" and "color".
+                           None (default) parses all attributes
         """
         self.file_name = file_name
         self.mtllibs = []
@@ -77,12 +105,75 @@ class Wavefront:
             create_materials=create_materials,
             collect_faces=collect_faces,
             parse=parse,
-            cache=cache)
+            cache=cache,
+            storage=storage,
+            indexed=indexed,
+            cache_format=cache_format,
+            workers=workers,
+            lazy=lazy,
+            material_cache=material_cache,
+            stats=stats,
+            stats_hook=stats_hook,
+            collect_polygons=collect_polygons,
+            topology=topology,
+            attributes=attributes)
+
+        # ParseStats when stats or stats_hook is set
+        self.parse_stats = self.parser.stats
 
     def parse(self):
         """Manually call the parser. This is used when parse=False"""
         self.parser.parse()
 
+    def build_vertices(self, materials=None):
+        """Build the interleaved vertex data of the materials when parsed with topology=True"""
+        self.parser.build_vertices(materials)
+
     def add_mesh(self, the_mesh):
         self.mesh_list.append(the_mesh)
         self.meshes[the_mesh.name] = the_mesh
+
+
+def iter_meshes(
+    file_name,
+    strict=False,
+    encoding="utf-8",
+    create_materials=False,
+    collect_faces=False,
+    storage="list",
+    indexed=False,
+    collect_polygons=False,
+    topology=False,
+    attributes=None,
+):
+    """
+    Parse an obj file yielding every mesh as soon as its faces are parsed.
+    Each mesh has its own copy of the materials holding only its vertex data.
+    See :py:meth:`ObjParser.iter_meshes`.
+
+    :param file_name: file name and path of obj file to read
+    :param strict: Enable strict mode
+    :param encoding: What text encoding the parser should use
+    :param create_materials: Create materials if they don't exist
+    :param collect_faces: Collect triangle faces in every mesh
+    :param storage: How parsed geometry is stored: "list" (default), "numpy" (float32 arrays)
+                    or "array" (float32 ``array.array`` material data)
+    :param indexed: Store unique vertices per material with a triangle index buffer
+    :param collect_polygons: Collect the faces of every mesh without triangulation
+    :param topology: Only collect the v, vt and vn indices of the faces in ``material.corner_indices``
+    :param attributes: Vertex attributes to parse. None parses all attributes
+    """
+    wavefront = Wavefront(
+        file_name,
+        strict=strict,
+        encoding=encoding,
+        create_materials=create_materials,
+        collect_faces=collect_faces,
+        parse=False,
+        storage=storage,
+        indexed=indexed,
+        collect_polygons=collect_polygons,
+        topology=topology,
+        attributes=attributes,
+    )
+    yield from wavefront.parser.iter_meshes()
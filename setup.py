@@ -35,5 +35,6 @@ setup(
     python_requires='>=3.4',
     extras_require={
         'visualization': ['pyglet'],
+        'numpy': ['numpy'],
     },
 )
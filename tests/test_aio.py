@@ -0,0 +1,152 @@
+import asyncio
+import concurrent.futures
+import shutil
+import sys
+import tempfile
+import unittest
+from pathlib import Path
+
+import mock
+
+if sys.version_info < (3, 5):
+    raise unittest.SkipTest("async loading requires python 3.5+")
+
+import pywavefront
+from pywavefront import aio
+from utils import fixture
+
+
+def run(coroutine):
+    loop = asyncio.new_event_loop()
+    try:
+        return loop.run_until_complete(coroutine)
+    finally:
+        loop.close()
+
+
+class TestLoadAsync(unittest.TestCase):
+    cooperative = False
+
+    def load(self, file_name, **kwargs):
+        return run(pywavefront.load_async(fixture(file_name), cooperative=self.cooperative, **kwargs))
+
+    def testMatchesWavefront(self):
+        """The result should be the same as a blocking load"""
+        scene = self.load('simple.obj', collect_faces=True)
+        expected = pywavefront.Wavefront(fixture('simple.obj'), collect_faces=True)
+
+        self.assertEqual(scene.vertices, expected.vertices)
+        self.assertEqual(scene.mtllibs, expected.mtllibs)
+        self.assertEqual(list(scene.meshes), list(expected.meshes))
+        self.assertEqual(scene.meshes['Simple'].faces, expected.meshes['Simple'].faces)
+        for name, material in expected.materials.items():
+            self.assertEqual(scene.materials[name].vertices, material.vertices)
+            self.assertEqual(scene.materials[name].texture.name, material.texture.name)
+
+    def testGzip(self):
+        """Gzipped files should load"""
+        scene = self.load('simple.obj.gz')
+        self.assertEqual(len(scene.materials['Material.simple'].vertices), 24)
+
+    def testCache(self):
+        """Cache files should be written and loaded"""
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            for name in ('simple.obj', 'simple.mtl'):
+                shutil.copy(str(fixture(name)), tmp_dir)
+            path = Path(tmp_dir, 'simple.obj')
+
+            first = run(pywavefront.load_async(path, cooperative=self.cooperative, cache=True))
+            self.assertFalse(first.parser.cache_loaded)
+            second = run(pywavefront.load_async(path, cooperative=self.cooperative, cache=True))
+            self.assertTrue(second.parser.cache_loaded)
+
+        self.assertEqual(len(second.materials['Material.simple'].vertices),
+                         len(first.materials['Material.simple'].vertices))
+
+    def testError(self):
+        """Errors should be raised by the coroutine"""
+        with self.assertRaises(IOError):
+            self.load('simple_missing_material.obj')
+
+
+class TestLoadAsyncCooperative(TestLoadAsync):
+    cooperative = True
+
+    def testFaceBatches(self):
+        """Faces parsed in batches should match a single batch"""
+        batch_size = aio.FACE_BATCH_SIZE
+        aio.FACE_BATCH_SIZE = 1
+        try:
+            scene = self.load('simple.obj', collect_faces=True)
+        finally:
+            aio.FACE_BATCH_SIZE = batch_size
+
+        expected = pywavefront.Wavefront(fixture('simple.obj'), collect_faces=True)
+        self.assertEqual(scene.meshes['Simple'].faces, expected.meshes['Simple'].faces)
+        self.assertEqual(scene.materials['Material.simple'].vertices,
+                         expected.materials['Material.simple'].vertices)
+        self.assertIsNone(scene.parser.face_batch_size)
+
+    @mock.patch('pywavefront.parser.Parser.chunk_size', new=16)
+    def testSmallChunks(self):
+        """Chunks read in the executor should be joined into the same statements"""
+        scene = self.load('simple.obj')
+        expected = pywavefront.Wavefront(fixture('simple.obj'))
+        self.assertEqual(scene.materials['Material.simple'].vertices,
+                         expected.materials['Material.simple'].vertices)
+        self.assertEqual(scene.vertices, expected.vertices)
+
+    def testRestoreParser(self):
+        """The parser should be restored when parsing fails"""
+        scene = pywavefront.Wavefront(fixture('simple_missing_material.obj'), parse=False)
+
+        async def parse():
+            await aio.parse_cooperative(scene.parser, asyncio.get_event_loop())
+
+        with self.assertRaises(IOError):
+            run(parse())
+
+        self.assertEqual(scene.parser.dispatcher['mtllib'], scene.parser.parse_mtllib)
+        self.assertIsNone(scene.parser.face_batch_size)
+
+    def testProcessExecutor(self):
+        """Cooperative loading can not use a process pool"""
+        with concurrent.futures.ProcessPoolExecutor(max_workers=1) as executor:
+            with self.assertRaises(ValueError):
+                self.load('simple.obj', executor=executor)
+
+
+class TestLoadManyAsync(unittest.TestCase):
+
+    def testResults(self):
+        """Every path should have a result in the same order"""
+        paths = [fixture('simple.obj'), fixture('simple_missing_material.obj'), fixture('simple_colors.obj')]
+        results = run(pywavefront.load_many_async(paths, concurrency=2))
+
+        self.assertEqual([result.path for result in results], paths)
+        self.assertIsNone(results[0].error)
+        self.assertIsNone(results[1].wavefront)
+        self.assertIsInstance(results[1].error, IOError)
+        self.assertEqual(len(results[2].wavefront.vertices), 8)
+
+    def testConcurrency(self):
+        """No more than ``concurrency`` files should load at the same time"""
+        active = []
+        peak = []
+
+        class SlowWavefront(pywavefront.Wavefront):
+            def __init__(self, *args, **kwargs):
+                active.append(1)
+                peak.append(len(active))
+                super(SlowWavefront, self).__init__(*args, **kwargs)
+                active.pop()
+
+        paths = [fixture('simple.obj')] * 6
+        results = run(pywavefront.load_many_async(paths, concurrency=2, wavefront_cls=SlowWavefront))
+
+        self.assertTrue(all(result.error is None for result in results))
+        self.assertLessEqual(max(peak), 2)
+
+    def testInvalidConcurrency(self):
+        with self.assertRaises(ValueError):
+            run(pywavefront.load_many_async([fixture('simple.obj')], concurrency=0))
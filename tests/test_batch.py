@@ -0,0 +1,83 @@
+import pickle
+import unittest
+
+import pywavefront
+from pywavefront import batch
+from pywavefront.material import MaterialLibraryCache
+from utils import fixture
+
+
+class UnpicklableWavefront(pywavefront.Wavefront):
+    """Wavefront that can not be sent back from a worker process"""
+
+    def __getstate__(self):
+        if self.file_name.name == 'simple.obj':
+            raise pickle.PicklingError("{} can not be pickled".format(self.file_name))
+        return self.__dict__
+
+
+class TestLoadMany(unittest.TestCase):
+    executor = batch.EXECUTOR_THREAD
+
+    def setUp(self):
+        self.paths = [fixture('simple.obj'), fixture('simple_missing_material.obj'), fixture('simple_colors.obj')]
+        self.results = pywavefront.load_many(self.paths, workers=2, executor=self.executor)
+
+    def testOrder(self):
+        """Results should be in the same order as the paths"""
+        self.assertEqual([result.path for result in self.results], self.paths)
+
+    def testLoaded(self):
+        """Files should be loaded like a single Wavefront"""
+        result = self.results[0]
+        self.assertIsNone(result.error)
+        self.assertEqual(len(result.wavefront.vertices), 8)
+        self.assertEqual(len(result.wavefront.materials['Material.simple'].vertices), 24)
+
+    def testFailure(self):
+        """A failing file should be reported without affecting the other files"""
+        result = self.results[1]
+        self.assertIsNone(result.wavefront)
+        self.assertIsInstance(result.error, IOError)
+        self.assertIsNone(self.results[2].error)
+
+
+class TestLoadManyProcess(TestLoadMany):
+    executor = batch.EXECUTOR_PROCESS
+
+
+class TestLoadManyTransportError(unittest.TestCase):
+
+    def testPicklingError(self):
+        """Failing to send a result back should only fail that path"""
+        paths = [fixture('simple.obj'), fixture('simple_colors.obj')]
+        results = pywavefront.load_many(paths, workers=2, wavefront_cls=UnpicklableWavefront)
+
+        self.assertEqual([result.path for result in results], paths)
+        self.assertIsNone(results[0].wavefront)
+        self.assertIsNotNone(results[0].error)
+        self.assertIsNone(results[1].error)
+        self.assertEqual(len(results[1].wavefront.vertices), 8)
+
+
+class TestLoadManyInline(TestLoadMany):
+
+    def setUp(self):
+        self.paths = [fixture('simple.obj'), fixture('simple_missing_material.obj'), fixture('simple_colors.obj')]
+        self.results = pywavefront.load_many(self.paths, workers=1)
+
+
+class TestLoadManyArguments(unittest.TestCase):
+
+    def testUnknownExecutor(self):
+        """Unknown executors should raise ValueError"""
+        with self.assertRaises(ValueError):
+            pywavefront.load_many([fixture('simple.obj')], executor="fiber")
+
+    def testPickle(self):
+        """Wavefronts should survive being sent between processes"""
+        scene = pywavefront.Wavefront(fixture('simple.obj'), material_cache=MaterialLibraryCache())
+        copy = pickle.loads(pickle.dumps(scene))
+        self.assertEqual(copy.vertices, scene.vertices)
+        self.assertEqual(copy.materials['Material.simple'].vertices,
+                         scene.materials['Material.simple'].vertices)
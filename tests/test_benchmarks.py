@@ -0,0 +1,75 @@
+import json
+import tempfile
+import unittest
+
+import pywavefront
+from benchmarks import corpus, runner
+
+
+class TestCorpus(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp_dir = tempfile.TemporaryDirectory()
+
+    def tearDown(self):
+        self.tmp_dir.cleanup()
+
+    def testCounts(self):
+        """The corpus should contain the requested geometry"""
+        spec = corpus.CorpusSpec(vertices=100, faces=90, objects=3, materials=5, quad_ratio=0.5, ngon_ratio=0.2)
+        scene = pywavefront.Wavefront(corpus.generate(self.tmp_dir.name, spec), collect_faces=True)
+
+        self.assertEqual(len(scene.vertices), 100)
+        self.assertEqual([mesh.name for mesh in scene.mesh_list], ['object0', 'object1', 'object2'])
+        self.assertEqual(len(scene.materials), 5)
+        # Quads and ngons are triangulated into more than one triangle
+        self.assertGreater(sum(len(mesh.faces) for mesh in scene.mesh_list), 90)
+
+    def testMaterialRun(self):
+        """Materials should be switched every few faces"""
+        spec = corpus.CorpusSpec(vertices=100, faces=90, materials=4, material_run=3)
+        with open(corpus.generate(self.tmp_dir.name, spec)) as fd:
+            switches = [line.split()[1] for line in fd if line.startswith("usemtl")]
+
+        self.assertEqual(len(switches), 30)
+        self.assertEqual(switches[:5], ['material0', 'material1', 'material2', 'material3', 'material0'])
+
+    def testColorsGzip(self):
+        spec = corpus.CorpusSpec(vertices=30, colors=True, normals=False, tex_coords=False, gzip=True)
+        file_name = corpus.generate(self.tmp_dir.name, spec)
+        scene = pywavefront.Wavefront(file_name)
+
+        self.assertTrue(file_name.endswith(".obj.gz"))
+        self.assertEqual(len(scene.vertices[0]), 6)
+        self.assertEqual(scene.materials['material0'].vertex_format, "C3F_V3F")
+
+    def testSeed(self):
+        """Corpora with the same spec should be identical"""
+        first = corpus.generate(self.tmp_dir.name, corpus.CorpusSpec(vertices=50), name="first")
+        second = corpus.generate(self.tmp_dir.name, corpus.CorpusSpec(vertices=50), name="second")
+        with open(first) as a, open(second) as b:
+            self.assertEqual(a.read().replace("first", "second"), b.read())
+
+    def testInvalidRatio(self):
+        with self.assertRaises(ValueError):
+            corpus.generate(self.tmp_dir.name, corpus.CorpusSpec(quad_ratio=0.8, ngon_ratio=0.5))
+
+
+class TestRunner(unittest.TestCase):
+
+    def testRun(self):
+        """Results should contain every measurement and be serializable"""
+        options = [{"storage": "list", "indexed": False, "collect_faces": True}]
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            report = runner.run(corpus.CorpusSpec(vertices=200, objects=2), tmp_dir, options, repeat=1)
+
+        report = json.loads(json.dumps(report))
+        result = report["results"][0]
+
+        self.assertEqual(result["options"], options[0])
+        self.assertEqual(result["vertices"], 200)
+        self.assertGreater(result["peak_memory"], 0)
+        self.assertEqual(sorted(result["cache"]), ["gzip", "raw"])
+        self.assertGreater(result["cache"]["raw"]["bytes"], 0)
+        self.assertGreaterEqual(result["cache"]["gzip"]["draw_time"], 0)
+        self.assertIn("1.00x", runner.compare(report, report)[1])
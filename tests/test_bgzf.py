@@ -0,0 +1,91 @@
+import gzip
+import os
+import shutil
+import tempfile
+import unittest
+from pathlib import Path
+
+import pywavefront
+from pywavefront import bgzf
+from pywavefront.storage import numpy
+
+from utils import fixture
+
+
+class TestBlockGzip(unittest.TestCase):
+    """Block compressed files should be readable as gzip and by byte range"""
+
+    def setUp(self):
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        for name in ('simple.obj', 'simple.mtl'):
+            shutil.copy(str(fixture(name)), self.tmp_dir.name)
+        self.data = Path(self.tmp_dir.name, 'simple.obj').read_bytes()
+        # Small blocks so the file spans many of them
+        self.path = bgzf.compress(Path(self.tmp_dir.name, 'simple.obj'), block_size=64)
+
+    def tearDown(self):
+        self.tmp_dir.cleanup()
+
+    def test_gzip_compatible(self):
+        with gzip.open(str(self.path), 'rb') as fd:
+            self.assertEqual(fd.read(), self.data)
+
+    def test_is_block_gzip(self):
+        self.assertTrue(bgzf.is_block_gzip(self.path))
+        self.assertFalse(bgzf.is_block_gzip(fixture('simple.obj.gz')))
+        self.assertFalse(bgzf.is_block_gzip(fixture('simple.obj')))
+        self.assertTrue(bgzf.supports_ranges(self.path))
+        self.assertFalse(bgzf.supports_ranges(fixture('simple.obj.gz')))
+
+    def test_index(self):
+        index = bgzf.BlockIndex.load(self.path)
+        scanned = bgzf.BlockIndex.scan(self.path)
+        self.assertEqual(index.offsets, scanned.offsets)
+        self.assertEqual(len(index.offsets), (len(self.data) + 63) // 64)
+        self.assertEqual(index.size, len(self.data))
+        self.assertEqual(scanned.size, len(self.data))
+
+    def test_missing_index(self):
+        """The index should be built from the block headers when the .gzi file is missing"""
+        os.remove(str(bgzf.index_name(self.path)))
+        with bgzf.BlockGzipFile(self.path) as fd:
+            self.assertEqual(fd.size, len(self.data))
+            self.assertEqual(fd.read(100, 200), self.data[100:200])
+
+    def test_read_ranges(self):
+        with bgzf.BlockGzipFile(self.path) as fd:
+            for start, end in ((0, 1), (0, 64), (63, 65), (100, 300), (10, len(self.data) + 10), (50, 40)):
+                self.assertEqual(fd.read(start, end), self.data[start:end])
+
+    def test_block_size(self):
+        with self.assertRaises(ValueError):
+            bgzf.compress(Path(self.tmp_dir.name, 'simple.obj'), block_size=0)
+
+    def test_serial(self):
+        scene = pywavefront.Wavefront(self.path)
+        expected = pywavefront.Wavefront(Path(self.tmp_dir.name, 'simple.obj'))
+        self.assertEqual(scene.materials['Material.simple'].vertices,
+                         expected.materials['Material.simple'].vertices)
+
+    @unittest.skipIf(numpy is None, "numpy is not installed")
+    def test_parallel(self):
+        """Block compressed files should be split between the workers"""
+        scene = pywavefront.Wavefront(self.path, workers=3)
+        expected = pywavefront.Wavefront(Path(self.tmp_dir.name, 'simple.obj'))
+        self.assertEqual(list(scene.meshes), list(expected.meshes))
+        for name, material in expected.materials.items():
+            self.assertEqual(scene.materials[name].vertices, material.vertices)
+
+    @unittest.skipIf(numpy is None, "numpy is not installed")
+    def test_lazy(self):
+        scene = pywavefront.Wavefront(self.path, lazy=True)
+        expected = pywavefront.Wavefront(Path(self.tmp_dir.name, 'simple.obj'))
+        self.assertEqual(list(scene.meshes), ['Simple', 'SimpleB'])
+        for name in ('SimpleB', 'Simple'):
+            self.assertEqual(list(scene.meshes[name].materials[0].vertices),
+                             list(expected.meshes[name].materials[0].vertices))
+
+    def test_lazy_gzip(self):
+        """Regular gzip files can not be read by byte range"""
+        with self.assertRaises(ValueError):
+            pywavefront.Wavefront(fixture('simple.obj.gz'), lazy=True)
@@ -1,6 +1,10 @@
+import array
 import json
 import os
+import pickle
 import mock
+import shutil
+import tempfile
 import unittest
 from pathlib import Path
 
@@ -10,7 +14,8 @@ from io import BytesIO
 from pywavefront import ObjParser, Wavefront
 from pywavefront.parser import Parser
 from pywavefront.exceptions import PywavefrontException
-from pywavefront.cache import cache_name, meta_name
+from pywavefront.cache import cache_name, meta_name, Meta, CacheWriter
+from pywavefront.storage import numpy
 
 from utils import fixture
 
@@ -21,6 +26,12 @@ class CacheTest(unittest.TestCase):
     maxDiff = None
     obj_file = fixture('simple.obj')
     create_materials = False
+    storage = "list"
+    indexed = False
+    collect_faces = False
+    collect_polygons = False
+    topology = False
+    attributes = None
 
     def load_obj(self, filename, fake_io=None):
         """Helper method loading files with proper mocks"""
@@ -28,13 +39,19 @@ class CacheTest(unittest.TestCase):
             self.fake_io = FakeIO()
 
         if not fake_io:
-            scene = Wavefront(filename, cache=True, create_materials=self.create_materials)
+            scene = Wavefront(filename, cache=True, create_materials=self.create_materials,
+                              storage=self.storage, indexed=self.indexed,
+                              collect_faces=self.collect_faces, collect_polygons=self.collect_polygons,
+                              topology=self.topology, attributes=self.attributes)
 
         with mock.patch("pywavefront.cache.gzip.open", new=self.fake_io):
             with mock.patch("pywavefront.cache.open", new=self.fake_io):
                 with mock.patch("pywavefront.cache.os.path.exists", new=self.fake_io.exisis):
                     if fake_io:
-                        scene = Wavefront(filename, cache=True, create_materials=self.create_materials)
+                        scene = Wavefront(filename, cache=True, create_materials=self.create_materials,
+                                          storage=self.storage, indexed=self.indexed,
+                                          collect_faces=self.collect_faces, collect_polygons=self.collect_polygons,
+                                          topology=self.topology, attributes=self.attributes)
                     scene.parser.post_parse()
 
         self.meta_file = self.obj_file.with_suffix(self.obj_file.suffix + '.json')
@@ -55,7 +72,13 @@ class CacheTest(unittest.TestCase):
         # Sanity check cache data
         self.assertTrue(self.meta.get('version'), msg="Missing version info in meta file: {}".format(self.meta))
         self.assertEqual(self.meta['mtllibs'], scene.mtllibs)
-        self.assertEqual(self.cache.size, sum(len(m.vertices) for m in scene.materials.values()) * 4)
+        buffers = self.meta['vertex_buffers'] + self.meta['index_buffers'] + self.meta['attribute_buffers']
+        buffers += self.meta['corner_buffers']
+        buffers += [m[name] for m in self.meta['meshes']
+                    for name in ('faces', 'lines', 'points', 'polygon_indices', 'polygon_offsets') if m[name]]
+        self.assertEqual(self.cache.size, sum(b['byte_length'] for b in buffers))
+        self.assertEqual(sum(b['byte_length'] for b in self.meta['vertex_buffers']),
+                         sum(len(m.vertices) for m in scene.materials.values()) * 4)
 
     def test_load(self):
         # Load the file creating a cache
@@ -74,9 +97,49 @@ class CacheTest(unittest.TestCase):
             self.assertEqual(len(pre_mat.vertices), len(post_mat.vertices))
             for a, b in zip(pre_mat.vertices, post_mat.vertices):
                 self.assertAlmostEqual(a, b, msg="{} != {}".format(pre_mat.vertices, post_mat.vertices))
+            self.assertEqual(list(pre_mat.indices), list(post_mat.indices))
+            self.assertEqual(list(pre_mat.corner_indices), list(post_mat.corner_indices))
             self.assertEqual(pre_mat.vertex_format, post_mat.vertex_format)
             self.assertEqual(pre_mat.name, post_mat.name)
 
+        self.assert_same_scene(scene_pre, scene_post)
+
+    def test_pickle(self):
+        scene_pre = self.load_obj(self.obj_file)
+        scene_post = pickle.loads(pickle.dumps(self.load_obj(self.obj_file, self.fake_io)))
+
+        for name, pre_mat in scene_pre.materials.items():
+            self.assertEqual(list(pre_mat.indices), list(scene_post.materials[name].indices))
+        self.assert_same_scene(scene_pre, scene_post)
+
+    def assert_same_scene(self, scene_pre, scene_post):
+        """Compare meshes, faces and raw attributes"""
+        self.assertEqual([m.name for m in scene_pre.mesh_list], [m.name for m in scene_post.mesh_list])
+        self.assertEqual(sorted(scene_pre.meshes.keys(), key=str), sorted(scene_post.meshes.keys(), key=str))
+        for pre_mesh, post_mesh in zip(scene_pre.mesh_list, scene_post.mesh_list):
+            self.assertEqual([m.name for m in pre_mesh.materials], [m.name for m in post_mesh.materials])
+            for material in post_mesh.materials:
+                self.assertIs(material, scene_post.materials[material.name])
+            self.assertEqual(pre_mesh.has_faces, post_mesh.has_faces)
+            self.assertEqual([list(f) for f in pre_mesh.faces], [list(f) for f in post_mesh.faces])
+            self.assertEqual(pre_mesh.groups, post_mesh.groups)
+            self.assertEqual(pre_mesh.smoothing_groups, post_mesh.smoothing_groups)
+            self.assertEqual(pre_mesh.lines, post_mesh.lines)
+            self.assertEqual(pre_mesh.points, post_mesh.points)
+            if pre_mesh.polygons is None:
+                self.assertIsNone(post_mesh.polygons)
+            else:
+                self.assertEqual(list(pre_mesh.polygons), list(post_mesh.polygons))
+
+        for pre, post in [(scene_pre.vertices, scene_post.vertices),
+                          (scene_pre.parser.normals, scene_post.parser.normals),
+                          (scene_pre.parser.tex_coords, scene_post.parser.tex_coords)]:
+            self.assertEqual(len(pre), len(post))
+            for pre_row, post_row in zip(pre, post):
+                self.assertEqual(len(pre_row), len(post_row))
+                for a, b in zip(pre_row, post_row):
+                    self.assertAlmostEqual(a, b, places=6)
+
     def test_missing_meta(self):
         # Load the file creating a cache
         scene_pre = self.load_obj(self.obj_file)
@@ -117,6 +180,131 @@ class CacheTestUnknownMtl(CacheTest):
     create_materials = True
 
 
+@unittest.skipIf(numpy is None, "numpy is not installed")
+@mock.patch('pywavefront.parser.Parser.auto_post_parse', new=False)
+class CacheTestNumpyStorage(CacheTest):
+    storage = "numpy"
+
+    def test_load_arrays(self):
+        self.load_obj(self.obj_file)
+        scene_post = self.load_obj(self.obj_file, self.fake_io)
+
+        for material in scene_post.materials.values():
+            self.assertIsInstance(material.vertices, numpy.ndarray)
+            self.assertEqual(material.vertices.dtype, numpy.float32)
+
+
+@mock.patch('pywavefront.parser.Parser.auto_post_parse', new=False)
+class CacheTestArrayStorage(CacheTest):
+    obj_file = fixture('arbitrary-faces.obj')
+    create_materials = True
+    indexed = True
+    storage = "array"
+
+    def test_load_arrays(self):
+        self.load_obj(self.obj_file)
+        scene_post = self.load_obj(self.obj_file, self.fake_io)
+
+        for material in scene_post.materials.values():
+            self.assertIsInstance(material.vertices, array.array)
+            self.assertEqual(material.vertices.typecode, 'f')
+            self.assertIsInstance(material.indices, array.array)
+
+
+@mock.patch('pywavefront.parser.Parser.auto_post_parse', new=False)
+class CacheTestElements(CacheTest):
+    obj_file = fixture('simple_elements.obj')
+    create_materials = True
+
+
+@mock.patch('pywavefront.parser.Parser.auto_post_parse', new=False)
+class CacheTestCollectFaces(CacheTest):
+    obj_file = fixture('arbitrary-faces.obj')
+    create_materials = True
+    collect_faces = True
+
+    def test_options_mismatch(self):
+        """A cache created with different parse options should not be loaded"""
+        self.load_obj(self.obj_file)
+        self.collect_faces = False
+        scene_post = self.load_obj(self.obj_file, self.fake_io)
+        self.assertFalse(scene_post.parser.cache_loaded)
+
+
+@mock.patch('pywavefront.parser.Parser.auto_post_parse', new=False)
+class CacheTestCollectPolygons(CacheTest):
+    obj_file = fixture('arbitrary-faces.obj')
+    create_materials = True
+    collect_polygons = True
+
+    def test_options_mismatch(self):
+        """A cache created without polygons should not be loaded when polygons are requested"""
+        self.collect_polygons = False
+        self.load_obj(self.obj_file)
+        self.collect_polygons = True
+        scene_post = self.load_obj(self.obj_file, self.fake_io)
+        self.assertFalse(scene_post.parser.cache_loaded)
+
+
+@mock.patch('pywavefront.parser.Parser.auto_post_parse', new=False)
+class CacheTestTopology(CacheTest):
+    obj_file = fixture('arbitrary-faces.obj')
+    create_materials = True
+    collect_faces = True
+    topology = True
+
+    def test_build_vertices(self):
+        """Vertex data should be built from cached corner indices"""
+        scene_pre = self.load_obj(self.obj_file)
+        scene_post = self.load_obj(self.obj_file, self.fake_io)
+        self.assertTrue(scene_post.parser.cache_loaded)
+
+        scene_pre.build_vertices()
+        scene_post.build_vertices()
+        for name, material in scene_pre.materials.items():
+            post_vertices = scene_post.materials[name].vertices
+            self.assertEqual(len(material.vertices), len(post_vertices))
+            for a, b in zip(material.vertices, post_vertices):
+                self.assertAlmostEqual(a, b, places=6)
+
+
+@mock.patch('pywavefront.parser.Parser.auto_post_parse', new=False)
+class CacheTestTopologyColors(CacheTestTopology):
+    obj_file = fixture('simple_colors.obj')
+
+
+@mock.patch('pywavefront.parser.Parser.auto_post_parse', new=False)
+class CacheTestAttributes(CacheTest):
+    obj_file = fixture('simple_colors.obj')
+    attributes = {"position", "normal"}
+
+    def test_meta(self):
+        """The selected attributes should be recorded in the meta file"""
+        self.load_obj(self.obj_file)
+        self.assertEqual(self.meta['parse_options']['attributes'], ["normal", "position"])
+
+    def test_attributes_mismatch(self):
+        """A cache created with different attributes should not be loaded"""
+        self.load_obj(self.obj_file)
+        self.attributes = None
+        scene_post = self.load_obj(self.obj_file, self.fake_io)
+        self.assertFalse(scene_post.parser.cache_loaded)
+
+
+@mock.patch('pywavefront.parser.Parser.auto_post_parse', new=False)
+class CacheTestIndexed(CacheTest):
+    obj_file = fixture('arbitrary-faces.obj')
+    create_materials = True
+    indexed = True
+
+    def test_indexed_mismatch(self):
+        """A cache created with different indexing should not be loaded"""
+        self.load_obj(self.obj_file)
+        self.indexed = False
+        scene_post = self.load_obj(self.obj_file, self.fake_io)
+        self.assertFalse(scene_post.parser.cache_loaded)
+
+
 class FakeFileExists:
 
     def __init__(self, fake_io):
@@ -182,6 +370,12 @@ class FakeFile:
         
         return self.data.read(length).decode('utf-8')
 
+    def readinto(self, buffer):
+        return self.data.readinto(buffer)
+
+    def seek(self, offset):
+        self.data.seek(offset)
+
     def write(self, data):
         if 'b' not in self.mode:
             data = data.encode()
@@ -200,3 +394,140 @@ class FakeFile:
     def json(self):
         d = self.contents().decode()
         return json.loads(d)
+
+
+class RawCacheTest(unittest.TestCase):
+    """Uncompressed cache files memory mapped from disk"""
+    obj_file = 'simple.obj'
+    create_materials = False
+    indexed = False
+    storage = "list"
+    collect_polygons = False
+    topology = False
+
+    def setUp(self):
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        for name in (self.obj_file, 'simple.mtl'):
+            shutil.copy(str(fixture(name)), self.tmp_dir.name)
+        self.path = Path(self.tmp_dir.name, self.obj_file)
+
+    def tearDown(self):
+        self.tmp_dir.cleanup()
+
+    def load(self):
+        return Wavefront(self.path, cache=True, cache_format="raw", create_materials=self.create_materials,
+                         indexed=self.indexed, storage=self.storage, collect_faces=True,
+                         collect_polygons=self.collect_polygons, topology=self.topology)
+
+    def test_load(self):
+        scene_pre = self.load()
+        scene_post = self.load()
+
+        self.assertFalse(scene_pre.parser.cache_loaded)
+        self.assertTrue(scene_post.parser.cache_loaded)
+        self.assertEqual(Meta.from_file(meta_name(self.path)).cache_format, "raw")
+
+        for name, pre_mat in scene_pre.materials.items():
+            post_mat = scene_post.materials[name]
+            self.assertEqual(len(pre_mat.vertices), len(post_mat.vertices))
+            for a, b in zip(pre_mat.vertices, post_mat.vertices):
+                self.assertAlmostEqual(a, b, places=6)
+            self.assertEqual(list(pre_mat.indices), list(post_mat.indices))
+
+        CacheTest.assert_same_scene(self, scene_pre, scene_post)
+
+    def test_pickle(self):
+        scene_pre = self.load()
+        scene_post = pickle.loads(pickle.dumps(self.load()))
+
+        CacheTest.assert_same_scene(self, scene_pre, scene_post)
+
+    def test_aligned_buffers(self):
+        self.load()
+        meta = Meta.from_file(meta_name(self.path))
+        for buff in meta.vertex_buffers + meta.index_buffers:
+            self.assertEqual(buff['byte_offset'] % CacheWriter.alignment, 0)
+
+    def test_unknown_format(self):
+        with self.assertRaises(ValueError):
+            Wavefront(self.path, cache=True, cache_format="zip")
+
+    def test_version_mismatch(self):
+        """A cache with another format version should not be loaded"""
+        self.load()
+        path = str(meta_name(self.path))
+        for version in ("0.1", None):
+            with open(path) as fd:
+                data = json.load(fd)
+            data.pop('version')
+            if version is not None:
+                data['version'] = version
+            with open(path, 'w') as fd:
+                json.dump(data, fd)
+
+            self.assertFalse(self.load().parser.cache_loaded)
+
+
+class RawCacheTestElements(RawCacheTest):
+    obj_file = 'simple_elements.obj'
+    create_materials = True
+
+
+class RawCacheTestPolygons(RawCacheTest):
+    obj_file = 'arbitrary-faces.obj'
+    create_materials = True
+    collect_polygons = True
+
+
+class RawCacheTestTopology(RawCacheTest):
+    obj_file = 'arbitrary-faces.obj'
+    create_materials = True
+    topology = True
+
+
+class RawCacheTestIndexed(RawCacheTest):
+    obj_file = 'arbitrary-faces.obj'
+    create_materials = True
+    indexed = True
+
+
+class RawCacheTestArray(RawCacheTestIndexed):
+    storage = "array"
+
+
+@unittest.skipIf(numpy is None, "numpy is not installed")
+class RawCacheTestNumpy(RawCacheTestIndexed):
+    storage = "numpy"
+
+    def test_zero_copy(self):
+        self.load()
+        scene = self.load()
+        for material in scene.materials.values():
+            self.assertIsInstance(material.vertices, numpy.ndarray)
+            self.assertFalse(material.vertices.flags['OWNDATA'])
+            # Copy on write mapping keeps the arrays writable
+            material.vertices[0] = 1.0
+
+    def test_trailing_geometry(self):
+        """Geometry after the last face statement is also cached"""
+        with open(str(self.path), 'a') as fd:
+            fd.write("v 5.0 5.0 5.0\nvn 0.0 0.0 1.0\n")
+
+        scene_pre = self.load()
+        scene_post = self.load()
+        self.assertTrue(scene_post.parser.cache_loaded)
+        self.assertEqual(len(scene_post.vertices), len(scene_pre.vertices))
+        self.assertEqual(scene_post.vertices[-1].tolist(), [5.0, 5.0, 5.0])
+        self.assertEqual(len(scene_post.parser.normals), 1)
+
+
+@unittest.skipIf(numpy is None, "numpy is not installed")
+class RawCacheTestPolygonsNumpy(RawCacheTestPolygons):
+    storage = "numpy"
+
+    def test_polygon_arrays(self):
+        self.load()
+        scene = self.load()
+        polygons = scene.meshes['arbitrary'].polygons
+        self.assertEqual(polygons.indices.dtype, numpy.int32)
+        self.assertEqual(polygons.offsets.tolist(), [0, 4, 9, 15, 18])
@@ -0,0 +1,110 @@
+import shutil
+import tempfile
+import unittest
+from pathlib import Path
+
+import pywavefront
+from pywavefront.lazy import ObjectIndex, index_name
+from pywavefront.storage import numpy
+
+from utils import fixture
+
+
+@unittest.skipIf(numpy is None, "numpy is not installed")
+class LazyTest(unittest.TestCase):
+    """Meshes should be parsed from their byte range on first access"""
+    obj_file = 'simple.obj'
+    storage = "list"
+
+    def setUp(self):
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        for name in (self.obj_file, 'simple.mtl'):
+            shutil.copy(str(fixture(name)), self.tmp_dir.name)
+        self.path = Path(self.tmp_dir.name, self.obj_file)
+
+    def tearDown(self):
+        self.tmp_dir.cleanup()
+
+    def load(self, **kwargs):
+        return pywavefront.Wavefront(self.path, lazy=True, storage=self.storage, **kwargs)
+
+    def test_index(self):
+        self.load()
+        index = ObjectIndex.from_file(index_name(self.path))
+        self.assertTrue(index.is_valid(self.path))
+        self.assertEqual(index.mtllibs, ['simple.mtl'])
+        self.assertEqual(index.counts, {"v": 8, "vt": 8, "vn": 2, "f": 2})
+
+        objects = index.objects()
+        self.assertEqual([name for name, _, _, _ in objects], ['Simple', 'SimpleB'])
+        data = self.path.read_bytes()
+        for name, start, end, section in objects:
+            self.assertTrue(data[start:end].startswith("o {}\n".format(name).encode()))
+
+        self.assertEqual(objects[1][3]["v"], 4)
+        self.assertEqual(objects[1][3]["material"], 'Material.simple')
+
+    def test_lazy_meshes(self):
+        scene = self.load()
+        self.assertEqual(list(scene.materials), ['Material.simple', 'Material2.simple'])
+        self.assertEqual(list(scene.meshes), ['Simple', 'SimpleB'])
+        self.assertEqual(scene.mesh_list, [])
+
+        mesh = scene.meshes['SimpleB']
+        self.assertTrue(scene.meshes.is_loaded('SimpleB'))
+        self.assertFalse(scene.meshes.is_loaded('Simple'))
+        self.assertIs(scene.meshes['SimpleB'], mesh)
+        self.assertEqual(scene.mesh_list, [mesh])
+
+        expected = pywavefront.Wavefront(self.path, storage=self.storage)
+        for name in ('Simple', 'SimpleB'):
+            lazy_material = scene.meshes[name].materials[0]
+            material = expected.meshes[name].materials[0]
+            self.assertEqual(lazy_material.name, material.name)
+            self.assertEqual(lazy_material.vertex_format, material.vertex_format)
+            self.assertEqual(list(lazy_material.vertices), list(material.vertices))
+            # The wavefront materials don't collect vertex data
+            self.assertEqual(len(scene.materials[material.name].vertices), 0)
+
+    def test_outdated_index(self):
+        self.load()
+        with open(str(self.path), 'a') as fd:
+            fd.write("o Extra\nf 1/1/1 2/2/1 3/3/1\n")
+
+        scene = self.load()
+        self.assertEqual(list(scene.meshes), ['Simple', 'SimpleB', 'Extra'])
+        self.assertEqual(len(scene.meshes['Extra'].materials[0].vertices), 3 * 8)
+
+    def test_unknown_mesh(self):
+        with self.assertRaises(KeyError):
+            self.load().meshes['Missing']
+
+    def test_invalid_options(self):
+        with self.assertRaises(ValueError):
+            self.load(cache=True)
+
+
+@unittest.skipIf(numpy is None, "numpy is not installed")
+class LazyTestSharedVertices(LazyTest):
+    """Faces referencing vertices defined in other meshes"""
+    obj_file = 'arbitrary-faces.obj'
+
+    def test_index(self):
+        self.load()
+        index = ObjectIndex.from_file(index_name(self.path))
+        self.assertEqual([name for name, _, _, _ in index.objects()], ['triangleOnly', 'quadOnly', 'arbitrary'])
+
+    def test_lazy_meshes(self):
+        expected = pywavefront.Wavefront(self.path, collect_faces=True, create_materials=True, indexed=True)
+        scene = self.load(collect_faces=True, create_materials=True, indexed=True)
+
+        for name, mesh in expected.meshes.items():
+            self.assertEqual(scene.meshes[name].faces, mesh.faces)
+
+    def test_outdated_index(self):
+        pass
+
+
+@unittest.skipIf(numpy is None, "numpy is not installed")
+class LazyTestNumpy(LazyTest):
+    storage = "numpy"
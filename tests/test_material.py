@@ -1,8 +1,13 @@
 import os
+import shutil
+import tempfile
 import unittest
 from pathlib import Path
 
+from mock import patch
+
 import pywavefront.material
+from pywavefront.material import MaterialLibraryCache, MaterialParser
 from utils import fixture
 
 
@@ -31,7 +36,7 @@ class TestMaterial(unittest.TestCase):
     def testPadLight(self):
         """pad_light should return known values."""
         self.assertEqual(self.material.pad_light([1.]),
-                [1., 0., 0., 0.])
+                         [1., 0., 0., 0.])
 
     def testSetAlpha(self):
         """set_alpha should set known values."""
@@ -72,3 +77,103 @@ class TestInvalidMaterial(unittest.TestCase):
         material = pywavefront.material.Material('material')
         material.set_texture('missing.file.do.not.create', '')
         self.assertFalse(material.texture.exists())
+
+
+class TestMaterialLibraryCache(unittest.TestCase):
+
+    def setUp(self):
+        self.cache = MaterialLibraryCache()
+
+    def parse_count(self, func):
+        """Number of material libraries parsed while running func"""
+        with patch.object(MaterialParser, 'parse', autospec=True, side_effect=MaterialParser.parse) as parse:
+            func()
+        return parse.call_count
+
+    def testParsedOnce(self):
+        """A material library should only be parsed once"""
+        scenes = []
+
+        def load():
+            scenes.append(pywavefront.Wavefront(fixture('simple.obj'), material_cache=self.cache))
+
+        self.assertEqual(self.parse_count(load), 1)
+        self.assertEqual(self.parse_count(load), 0)
+        self.assertEqual(scenes[0].materials['Material.simple'].vertices,
+                         scenes[1].materials['Material.simple'].vertices)
+
+    def testDisabled(self):
+        """material_cache=False should parse the library on every load"""
+        def load():
+            pywavefront.Wavefront(fixture('simple.obj'), material_cache=False)
+
+        self.assertEqual(self.parse_count(load), 1)
+        self.assertEqual(self.parse_count(load), 1)
+
+    def testCopies(self):
+        """Every load should return independent materials"""
+        first = self.cache.load(fixture('simple.mtl'))['Material.simple']
+        second = self.cache.load(fixture('simple.mtl'))['Material.simple']
+
+        self.assertIsNot(first, second)
+        self.assertIsNot(first.texture, second.texture)
+        self.assertEqual(first.texture.path, second.texture.path)
+        self.assertEqual(first.diffuse, second.diffuse)
+
+        first.set_diffuse([0.5, 0.5, 0.5, 1.0])
+        first.vertices.append(1.0)
+        first.corner_indices.append(0)
+        self.assertNotEqual(first.diffuse, second.diffuse)
+        self.assertEqual(second.vertices, [])
+        self.assertEqual(second.corner_indices, [])
+
+    def testTextureOptions(self):
+        """Texture options of a copy should be modified independently"""
+        first = self.cache.load(fixture('simple.mtl'))['Material.simple']
+        second = self.cache.load(fixture('simple.mtl'))['Material.simple']
+
+        self.assertIsNot(first.texture.options, second.texture.options)
+        first.texture.options.clamp = "on"
+        first.texture.options.s = (2.0, 2.0, 1.0)
+        self.assertEqual(second.texture.options.clamp, "off")
+        self.assertEqual(second.texture.options.s, (1.0, 1.0, 1.0))
+
+    def testModified(self):
+        """Libraries should be parsed again when the file changes"""
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            path = Path(tmp_dir, 'simple.mtl')
+            shutil.copy(str(fixture('simple.mtl')), str(path))
+            self.cache.load(path)
+
+            with open(str(path), 'a') as fd:
+                fd.write("\nnewmtl Material3.simple\nKd 1.0 1.0 1.0\n")
+
+            materials = {}
+            self.assertEqual(self.parse_count(lambda: materials.update(self.cache.load(path))), 1)
+
+        self.assertIn('Material3.simple', materials)
+
+    def testEviction(self):
+        """The least recently used library should be removed"""
+        self.cache = MaterialLibraryCache(max_libraries=2)
+        self.cache.load(fixture('simple.mtl'))
+        self.cache.load(fixture('simple_parsetest.mtl'))
+        self.cache.load(fixture('simple.mtl'), strict=True)
+        self.assertEqual(len(self.cache), 2)
+
+        self.assertEqual(self.parse_count(lambda: self.cache.load(fixture('simple.mtl'), strict=True)), 0)
+        self.assertEqual(self.parse_count(lambda: self.cache.load(fixture('simple.mtl'))), 1)
+
+    def testClear(self):
+        """Cleared libraries should be parsed again"""
+        self.cache.load(fixture('simple.mtl'))
+        self.cache.clear()
+        self.assertEqual(self.parse_count(lambda: self.cache.load(fixture('simple.mtl'))), 1)
+
+    def testMissing(self):
+        with self.assertRaises(IOError):
+            self.cache.load(fixture('missing.mtl'))
+
+    def testInvalidSize(self):
+        with self.assertRaises(ValueError):
+            MaterialLibraryCache(max_libraries=0)
@@ -1,6 +1,7 @@
 import unittest
 
 import pywavefront.mesh
+from pywavefront.material import Material
 
 
 class TestMesh(unittest.TestCase):
@@ -9,3 +10,23 @@ class TestMesh(unittest.TestCase):
         "Creating a mesh with a name should set the name."
         my_mesh = pywavefront.mesh.Mesh('qax')
         self.assertEqual(my_mesh.name, 'qax')
+
+    def testAddMaterial(self):
+        """Materials should only be added once and keep their order"""
+        mesh = pywavefront.mesh.Mesh('qax')
+        first, second = Material('first'), Material('second')
+        for material in (first, second, first, Material('first'), second):
+            mesh.add_material(material)
+
+        self.assertEqual(mesh.materials, [first, second])
+        self.assertTrue(mesh.has_material(Material('second')))
+        self.assertFalse(mesh.has_material(Material('third')))
+
+    def testReplaceMaterials(self):
+        """Lookups should follow materials assigned directly"""
+        mesh = pywavefront.mesh.Mesh('qax')
+        mesh.add_material(Material('first'))
+        mesh.materials = [Material('second')]
+
+        self.assertFalse(mesh.has_material(Material('first')))
+        self.assertTrue(mesh.has_material(Material('second')))
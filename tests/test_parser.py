@@ -1,11 +1,15 @@
 import os
 import unittest
 
+import mock
+
 import pywavefront.parser
+from pywavefront import parallel
 from pywavefront.exceptions import PywavefrontException
 from pywavefront.material import MaterialParser
+from pywavefront.storage import numpy
 
-from utils import fixture
+from utils import fixture, FIXTURE_PATH
 
 
 class TestParsers(unittest.TestCase):
@@ -73,6 +77,201 @@ class TestParserCollectFaces(unittest.TestCase):
         ])
 
 
+class TestParserCollectPolygons(unittest.TestCase):
+    """Test collecting faces without triangulation"""
+    storage = "list"
+
+    def setUp(self):
+        self.meshes = pywavefront.Wavefront(fixture('arbitrary-faces.obj'), collect_faces=True,
+                                            collect_polygons=True, storage=self.storage).meshes
+
+    def testPolygons(self):
+        polygons = self.meshes['arbitrary'].polygons
+        self.assertEqual(list(polygons), [[8, 9, 10, 11], [11, 8, 9, 10, 12], [12, 9, 10, 8, 11, 13], [13, 11, 9]])
+        self.assertEqual(list(polygons.offsets), [0, 4, 9, 15, 18])
+        self.assertEqual(list(self.meshes['triangleOnly'].polygons), [[1, 0, 2]])
+
+    def testTriangles(self):
+        """Triangulating the polygons should give the collected faces"""
+        for mesh in self.meshes.values():
+            self.assertEqual([list(face) for face in mesh.polygons.triangles()], mesh.faces)
+
+    def testNotCollected(self):
+        meshes = pywavefront.Wavefront(fixture('arbitrary-faces.obj')).meshes
+        self.assertIsNone(meshes['arbitrary'].polygons)
+
+    def testParallel(self):
+        with self.assertRaises(ValueError):
+            pywavefront.Wavefront(fixture('arbitrary-faces.obj'), collect_polygons=True, workers=2)
+
+
+@unittest.skipIf(numpy is None, "numpy is not installed")
+class TestParserCollectPolygonsNumpy(TestParserCollectPolygons):
+    storage = "numpy"
+
+    def testArrays(self):
+        polygons = self.meshes['quadOnly'].polygons
+        self.assertEqual(polygons.indices.dtype, numpy.int32)
+        self.assertEqual(polygons.offsets.dtype, numpy.int32)
+
+
+class TestParserCollectPolygonsArray(TestParserCollectPolygons):
+    storage = "array"
+
+
+class TestParserTopology(unittest.TestCase):
+    """Topology mode should collect index triplets and build the same vertex data on demand"""
+    storage = "list"
+    obj_file = 'simple.obj'
+
+    def setUp(self):
+        self.scene = pywavefront.Wavefront(fixture(self.obj_file), collect_faces=True, storage=self.storage)
+        self.topology = pywavefront.Wavefront(fixture(self.obj_file), collect_faces=True, storage=self.storage,
+                                              topology=True)
+
+    def testCornerIndices(self):
+        material = self.topology.materials['Material.simple']
+        self.assertEqual(len(material.vertices), 0)
+        self.assertEqual(material.vertex_format, "T2F_N3F_V3F")
+        self.assertEqual(list(material.corner_indices), [1, 2, 0, 0, 1, 0, 2, 0, 0])
+
+    def testFaces(self):
+        for mesh, expected in zip(self.topology.mesh_list, self.scene.mesh_list):
+            self.assertEqual(mesh.faces, expected.faces)
+
+    def testBuildVertices(self):
+        self.topology.build_vertices()
+        for name, material in self.scene.materials.items():
+            self.assertEqual(list(self.topology.materials[name].vertices), list(material.vertices))
+
+    def testInvalidOptions(self):
+        with self.assertRaises(ValueError):
+            pywavefront.Wavefront(fixture(self.obj_file), topology=True, indexed=True)
+
+
+class TestParserTopologyNegativeIndices(TestParserTopology):
+    obj_file = 'simple_negative_indices.obj'
+
+
+class TestParserTopologyTrailingComments(TestParserTopology):
+    obj_file = 'simple_trailing_comments.obj'
+
+
+class TestParserTopologyPositions(TestParserTopology):
+    obj_file = 'simple_positions.obj'
+
+    def testCornerIndices(self):
+        """Missing texture coordinates and normals are -1"""
+        material = self.topology.materials['Material.simple']
+        self.assertEqual(material.vertex_format, "V3F")
+        self.assertEqual(list(material.corner_indices), [1, -1, -1, 0, -1, -1, 2, -1, -1])
+
+
+@unittest.skipIf(numpy is None, "numpy is not installed")
+class TestParserTopologyNumpy(TestParserTopology):
+    storage = "numpy"
+
+    def testArrays(self):
+        material = self.topology.materials['Material.simple']
+        self.assertEqual(material.corner_indices.dtype, numpy.int32)
+        self.topology.build_vertices()
+        self.assertEqual(material.vertices.dtype, numpy.float32)
+
+
+@unittest.skipIf(numpy is None, "numpy is not installed")
+class TestParserTopologyNumpyZeroIndices(TestParserTopologyNumpy):
+    """Corners referencing missing normals are built like when parsing"""
+    obj_file = 'simple_zero_indices.obj'
+
+    def testCornerIndices(self):
+        """Normal index 0 resolves to one past the last normal"""
+        super(TestParserTopologyNumpyZeroIndices, self).testCornerIndices()
+        material = self.topology.materials['Material2.simple']
+        self.assertEqual(material.corner_indices.tolist(), [5, 6, 2, 4, 5, 1, 6, 4, 2])
+
+
+class TestParserTopologyArray(TestParserTopology):
+    storage = "array"
+
+
+class TestParserTopologyLines(TestParserTopology):
+    """Without numpy the faces are resolved one at a time"""
+
+    def setUp(self):
+        with mock.patch('pywavefront.obj.numpy', new=None):
+            super(TestParserTopologyLines, self).setUp()
+
+
+class TestParserTopologyMixedFaces(TestParserTopology):
+    """Blocks of faces with different sizes"""
+    obj_file = 'arbitrary-faces.obj'
+
+    def testCornerIndices(self):
+        material = next(iter(self.topology.materials.values()))
+        self.assertEqual(list(material.corner_indices[:6]), [1, -1, -1, 0, -1, -1])
+        # Three index triplets for every triangle
+        self.assertEqual(len(material.corner_indices), sum(len(mesh.faces) for mesh in self.scene.mesh_list) * 9)
+
+
+class TestParserAttributes(unittest.TestCase):
+    """Only the selected vertex attributes should be parsed"""
+    storage = "list"
+    topology = False
+
+    def load(self, obj_file, attributes):
+        scene = pywavefront.Wavefront(fixture(obj_file), storage=self.storage, topology=self.topology,
+                                      attributes=attributes)
+        if self.topology:
+            scene.build_vertices()
+        return scene
+
+    def setUp(self):
+        self.scene = self.load('simple.obj', None)
+        self.expected = list(self.scene.materials['Material.simple'].vertices)
+
+    def testPositions(self):
+        scene = self.load('simple.obj', {"position"})
+        material = scene.materials['Material.simple']
+        self.assertEqual(material.vertex_format, "V3F")
+        self.assertEqual(list(material.vertices), [v for i, v in enumerate(self.expected) if i % 8 >= 5])
+        # Texture coordinate and normal statements are skipped
+        self.assertEqual(len(scene.parser.normals), 0)
+        self.assertEqual(len(scene.parser.tex_coords), 0)
+
+    def testNormals(self):
+        scene = self.load('simple.obj', ["position", "normal"])
+        material = scene.materials['Material.simple']
+        self.assertEqual(material.vertex_format, "N3F_V3F")
+        self.assertEqual(list(material.vertices), [v for i, v in enumerate(self.expected) if i % 8 >= 2])
+        self.assertEqual(len(scene.parser.tex_coords), 0)
+
+    def testColors(self):
+        """Vertex colors are dropped from the positions"""
+        scene = self.load('simple_colors.obj', {"position", "texcoord", "normal"})
+        material = next(iter(scene.materials.values()))
+        self.assertEqual(material.vertex_format, "T2F_N3F_V3F")
+        self.assertEqual(len(scene.vertices[0]), 3)
+
+    def testInvalidAttributes(self):
+        with self.assertRaises(ValueError):
+            pywavefront.Wavefront(fixture('simple.obj'), attributes={"normal"})
+        with self.assertRaises(ValueError):
+            pywavefront.Wavefront(fixture('simple.obj'), attributes={"position", "tangent"})
+
+
+@unittest.skipIf(numpy is None, "numpy is not installed")
+class TestParserAttributesNumpy(TestParserAttributes):
+    storage = "numpy"
+
+
+class TestParserAttributesArray(TestParserAttributes):
+    storage = "array"
+
+
+class TestParserAttributesTopology(TestParserAttributes):
+    topology = True
+
+
 class NegativeIndices(TestParsers):
     """Run all tests with negative indices"""
     def setUp(self):
@@ -91,6 +290,296 @@ class TestParserGz(TestParsers):
         self.mesh2 = meshes.mesh_list[1]
 
 
+class TestParserBz2(TestParsers):
+    """Run all tests is TestParsers for bzip2 file as well"""
+    def setUp(self):
+        meshes = pywavefront.Wavefront(fixture('simple.obj.bz2'))
+        self.mesh1 = meshes.mesh_list[0]
+        self.mesh2 = meshes.mesh_list[1]
+
+
+@unittest.skipIf(pywavefront.parser.lzma is None, "lzma is not available")
+class TestParserXz(TestParsers):
+    """Run all tests is TestParsers for xz file as well"""
+    def setUp(self):
+        meshes = pywavefront.Wavefront(fixture('simple.obj.xz'))
+        self.mesh1 = meshes.mesh_list[0]
+        self.mesh2 = meshes.mesh_list[1]
+
+
+@mock.patch('pywavefront.parser.Parser.chunk_size', new=16)
+class TestParserSmallChunks(TestParsers):
+    """Run all tests in TestParsers with statement blocks split across chunks"""
+    def setUp(self):
+        meshes = pywavefront.Wavefront(fixture('simple.obj'))
+        self.mesh1 = meshes.mesh_list[0]
+        self.mesh2 = meshes.mesh_list[1]
+
+
+class TestParserIrregularVertices(TestParsers):
+    """Blocks with irregular lines should be parsed line by line"""
+    def setUp(self):
+        meshes = pywavefront.Wavefront(fixture('simple_irregular_vertices.obj'))
+        self.mesh1 = meshes.mesh_list[0]
+        self.mesh2 = meshes.mesh_list[1]
+        self.vertices = meshes.vertices
+
+    def testVertexCount(self):
+        self.assertEqual(len(self.vertices), 8)
+        self.assertEqual(self.vertices[2], (0.07, 0.08, 0.09))
+
+
+class TestParserTrailingComments(TestParsers):
+    """Comments after the values of a statement should be ignored"""
+    def setUp(self):
+        meshes = pywavefront.Wavefront(fixture('simple_trailing_comments.obj'))
+        self.mesh1 = meshes.mesh_list[0]
+        self.mesh2 = meshes.mesh_list[1]
+
+
+@unittest.skipIf(numpy is None, "numpy is not installed")
+class TestParserNumpyStorage(TestParsers):
+    """Run all tests in TestParsers with blocks converted to arrays"""
+    def setUp(self):
+        meshes = pywavefront.Wavefront(fixture('simple.obj'), storage="numpy")
+        self.mesh1 = meshes.mesh_list[0]
+        self.mesh2 = meshes.mesh_list[1]
+
+    def testObjVertices(self):
+        """Vertices are stored as float32"""
+        numpy.testing.assert_allclose(self.mesh1.materials[0].vertices, [
+            14.0, 15.0, 20.0, 21.0, 22.0, 0.04, 0.05, 0.06,
+            12.0, 13.0, 20.0, 21.0, 22.0, 0.01, 0.02, 0.03,
+            10.0, 11.0, 20.0, 21.0, 22.0, 0.07, 0.08, 0.09], rtol=1e-6)
+
+        self.assertEqual(self.mesh2.materials[0].vertex_format, "T2F_N3F_V3F")
+
+    def testIndexArrays(self):
+        """Every material gets an index array, also with no materials or several"""
+        scene = pywavefront.Wavefront(fixture('simple.obj'), storage="numpy")
+        for material in scene.materials.values():
+            self.assertEqual(material.indices.dtype, numpy.uint32)
+
+        pywavefront.Wavefront(fixture('simple_one_vertex.obj'), storage="numpy")
+
+
+class TestParserIndexed(unittest.TestCase):
+    """Indexed mode should only store unique vertices per material"""
+    obj_file = 'arbitrary-faces.obj'
+    storage = "list"
+
+    def setUp(self):
+        self.expanded = pywavefront.Wavefront(fixture(self.obj_file), create_materials=True)
+        self.indexed = pywavefront.Wavefront(fixture(self.obj_file), create_materials=True,
+                                             indexed=True, storage=self.storage)
+
+    def testExpandedVerticesMatch(self):
+        """Expanding the indexed vertices should reproduce the regular vertex data"""
+        for name, material in self.indexed.materials.items():
+            expected = self.expanded.materials[name].vertices
+            size = material.vertex_size
+            vertices = list(material.vertices)
+            expanded = []
+            for index in material.indices:
+                expanded += vertices[index * size:(index + 1) * size]
+
+            self.assertTrue(material.is_indexed)
+            self.assertEqual(len(expanded), len(expected))
+            for a, b in zip(expanded, expected):
+                self.assertAlmostEqual(a, b, places=6)
+
+    def testUniqueVertices(self):
+        material = self.indexed.materials['default0']
+        # 3 + 4 + 6 positions are referenced without uvs or normals
+        self.assertEqual(len(material.vertices), 13 * material.vertex_size)
+        # 1 + 6 + 10 triangles
+        self.assertEqual(len(material.indices), 17 * 3)
+        self.assertEqual(list(material.indices[:3]), [0, 1, 2])
+
+    def testNotIndexedByDefault(self):
+        for material in self.expanded.materials.values():
+            self.assertFalse(material.is_indexed)
+
+
+class TestParserIndexedAttributes(TestParserIndexed):
+    obj_file = 'simple.obj'
+
+    def testUniqueVertices(self):
+        material = self.indexed.materials['Material.simple']
+        self.assertEqual(len(material.vertices), 3 * material.vertex_size)
+        self.assertEqual(list(material.indices), [0, 1, 2])
+
+
+@unittest.skipIf(numpy is None, "numpy is not installed")
+class TestParserIndexedNumpy(TestParserIndexed):
+    storage = "numpy"
+
+    def testIndexArray(self):
+        for material in self.indexed.materials.values():
+            self.assertEqual(material.indices.dtype, numpy.uint32)
+
+
+@unittest.skipIf(numpy is None, "numpy is not installed")
+class TestParserTrailingCommentsNumpy(TestParserNumpyStorage):
+    """Comments are dropped before converting blocks to arrays"""
+    def setUp(self):
+        meshes = pywavefront.Wavefront(fixture('simple_trailing_comments.obj'), storage="numpy")
+        self.mesh1 = meshes.mesh_list[0]
+        self.mesh2 = meshes.mesh_list[1]
+
+
+@unittest.skipIf(numpy is None, "numpy is not installed")
+class TestParserIrregularVerticesNumpy(TestParserNumpyStorage):
+    """Blocks with irregular lines should be converted line by line"""
+    def setUp(self):
+        meshes = pywavefront.Wavefront(fixture('simple_irregular_vertices.obj'), storage="numpy")
+        self.mesh1 = meshes.mesh_list[0]
+        self.mesh2 = meshes.mesh_list[1]
+        self.vertices = meshes.vertices
+
+    def testVertexCount(self):
+        expected = pywavefront.Wavefront(fixture('simple_irregular_vertices.obj'))
+        numpy.testing.assert_allclose(self.vertices, expected.vertices, rtol=1e-6)
+
+
+@unittest.skipIf(numpy is None, "numpy is not installed")
+class TestParserParallel(TestParsers):
+    """Run all tests in TestParsers with byte ranges parsed in worker processes"""
+    def setUp(self):
+        meshes = pywavefront.Wavefront(fixture('simple.obj'), workers=3)
+        self.mesh1 = meshes.mesh_list[0]
+        self.mesh2 = meshes.mesh_list[1]
+
+
+@unittest.skipIf(numpy is None, "numpy is not installed")
+class TestParserParallelNegativeIndices(TestParsers):
+    """Negative indices must be resolved across byte ranges"""
+    def setUp(self):
+        meshes = pywavefront.Wavefront(fixture('simple_negative_indices.obj'), workers=5)
+        self.mesh1 = meshes.mesh_list[0]
+        self.mesh2 = meshes.mesh_list[1]
+
+
+@unittest.skipIf(numpy is None, "numpy is not installed")
+class TestParserParallelTrailingComments(TestParsers):
+    """Comments should also be ignored by the chunk parser"""
+    def setUp(self):
+        meshes = pywavefront.Wavefront(fixture('simple_trailing_comments.obj'), workers=3)
+        self.mesh1 = meshes.mesh_list[0]
+        self.mesh2 = meshes.mesh_list[1]
+
+
+@unittest.skipIf(numpy is None, "numpy is not installed")
+class TestParserParallelMatchesSerial(unittest.TestCase):
+    """Parsing with workers should produce the same scene as a regular parse"""
+
+    def assertSameScene(self, name, **kwargs):
+        serial = pywavefront.Wavefront(fixture(name), create_materials=True, **kwargs)
+        parallel = pywavefront.Wavefront(fixture(name), create_materials=True, workers=4, **kwargs)
+
+        self.assertEqual(list(serial.materials), list(parallel.materials))
+        self.assertEqual([m.name for m in serial.mesh_list], [m.name for m in parallel.mesh_list])
+        for serial_mesh, parallel_mesh in zip(serial.mesh_list, parallel.mesh_list):
+            self.assertEqual([m.name for m in serial_mesh.materials], [m.name for m in parallel_mesh.materials])
+            self.assertEqual(serial_mesh.faces, parallel_mesh.faces)
+
+        for material in serial.materials.values():
+            other = parallel.materials[material.name]
+            self.assertEqual(material.vertex_format, other.vertex_format)
+            self.assertEqual(list(material.vertices), list(other.vertices))
+            self.assertEqual(list(material.indices), list(other.indices))
+
+        self.assertEqual(serial.vertices, parallel.vertices)
+        self.assertEqual(serial.parser.normals, parallel.parser.normals)
+        self.assertEqual(serial.parser.tex_coords, parallel.parser.tex_coords)
+
+    def testArbitraryFaces(self):
+        self.assertSameScene('arbitrary-faces.obj', collect_faces=True)
+
+    def testColors(self):
+        self.assertSameScene('simple_colors.obj')
+
+    def testIndexed(self):
+        self.assertSameScene('arbitrary-faces.obj', indexed=True)
+
+    def testNoObjectNoMaterial(self):
+        self.assertSameScene('simple_no_object_no_mtl.obj')
+
+    def testSplitFile(self):
+        """Byte ranges should cover the file and start at a new line"""
+        path = fixture('arbitrary-faces.obj')
+        data = path.read_bytes()
+        ranges = parallel.split_file(path, 4)
+
+        self.assertEqual(len(ranges), 4)
+        self.assertEqual(ranges[0][0], 0)
+        self.assertEqual(ranges[-1][1], len(data))
+        for (_, end), (start, _) in zip(ranges, ranges[1:]):
+            self.assertEqual(end, start)
+            self.assertEqual(data[start - 1:start], b"\n")
+
+    def testMissingNormal(self):
+        """Normals that don't exist are left out of the vertex like in a regular parse"""
+        self.assertSameScene('simple_zero_indices.obj')
+
+    def testAllFixtures(self):
+        """Every fixture should give the same scene with and without workers"""
+        for path in sorted(FIXTURE_PATH.glob('*.obj')):
+            for kwargs in ({}, {"indexed": True}, {"collect_faces": True}):
+                with self.subTest(fixture=path.name, **kwargs):
+                    self.assertSameScene(path.name, **kwargs)
+
+    def testInvalidWorkers(self):
+        with self.assertRaises(ValueError):
+            pywavefront.Wavefront(fixture('simple.obj'), workers=0)
+
+
+class TestParserElements(unittest.TestCase):
+    """Groups, smoothing groups, lines and points should be collected in the mesh"""
+    workers = 1
+
+    def setUp(self):
+        self.scene = pywavefront.Wavefront(fixture('simple_elements.obj'), workers=self.workers)
+        self.mesh = self.scene.meshes['Elements']
+
+    def testGroups(self):
+        self.assertEqual(self.mesh.groups, ['front', 'back', 'side'])
+        self.assertEqual(self.mesh.smoothing_groups, [1, 0])
+
+    def testSmoothingGroupNames(self):
+        """Smoothing groups that are not numbers are kept as they are"""
+        scene = pywavefront.Wavefront(fixture('simple_smoothing.obj'), workers=self.workers)
+        self.assertEqual(scene.meshes['Smoothing'].smoothing_groups, ['on', 2])
+
+    def testLines(self):
+        """Polylines are split into segments and negative indices resolved"""
+        self.assertEqual(self.mesh.lines, [0, 1, 1, 2, 3, 0])
+
+    def testPoints(self):
+        self.assertEqual(self.mesh.points, [0, 1, 2])
+
+    def testUnknownStatements(self):
+        """Unknown statements should be counted and reported once"""
+        self.assertEqual(self.scene.parser.unknown_statements, {'cstype': [2, 'cstype bspline']})
+
+        with self.assertLogs('pywavefront', level='WARNING') as logs:
+            pywavefront.Wavefront(fixture('simple_elements.obj'), workers=self.workers)
+        self.assertEqual(len(logs.records), 1)
+        self.assertIn("'cstype' found 2 time(s)", logs.output[0])
+
+    def testStrict(self):
+        with self.assertRaises(PywavefrontException):
+            pywavefront.Wavefront(fixture('simple_elements.obj'), strict=True)
+
+
+@unittest.skipIf(numpy is None, "numpy is not installed")
+class TestParserElementsParallel(TestParserElements):
+    workers = 2
+
+    def testUnknownStatements(self):
+        """Unknown statements are reported by the worker processes"""
+
+
 class TestParserMissingMaterials(unittest.TestCase):
     """Test `create_materials` functionality"""
 
@@ -284,6 +773,15 @@ class TestMtlParser(unittest.TestCase):
         self.assertEqual(self.material1.texture_bump.name, 'bump.png')
 
 
+class TestMtlParserGz(TestMtlParser):
+    """Run all tests in TestMtlParser for a gzipped mtl file"""
+    def setUp(self):
+        parser = MaterialParser(fixture('simple_parsetest.mtl.gz'), strict=True)
+        self.materials = parser.materials
+        self.material1 = self.materials['Material.simple']
+        self.material2 = self.materials['Material2.simple']
+
+
 class TestParserFailure(unittest.TestCase):
 
     def testMissingParseFunction(self):
@@ -292,6 +790,15 @@ class TestParserFailure(unittest.TestCase):
         parser = pywavefront.parser.Parser(fixture('simple.obj'), strict=True)
         self.assertRaises(PywavefrontException, parser.parse)
 
+    def testTooFewValues(self):
+        """Statements with too few values should raise an exception"""
+        parser = pywavefront.ObjParser(pywavefront.Wavefront(fixture('simple.obj'), parse=False),
+                                       fixture('simple.obj'), parse=False)
+        parser.line = "vn 1 2\nvn 3 4\n"
+        parser.values = parser.line.split()
+        with self.assertRaises(PywavefrontException):
+            parser.consume_normals()
+
     def testMissingParsedFile(self):
         """Attempting to read a non-exiting file should raise an exception."""
         file_name = 'doesnotexist.obj'
@@ -0,0 +1,103 @@
+import shutil
+import tempfile
+import unittest
+from pathlib import Path
+
+import mock
+
+import pywavefront
+from pywavefront.exceptions import PywavefrontException
+from pywavefront.pointcloud import PointCloudParser
+from pywavefront.storage import numpy
+
+from utils import fixture
+
+
+@unittest.skipIf(numpy is None, "numpy is not installed")
+class TestPointCloud(unittest.TestCase):
+    obj_file = 'points.obj'
+    width = 3
+
+    def setUp(self):
+        self.points = pywavefront.load_point_cloud(fixture(self.obj_file))
+        self.expected = pywavefront.Wavefront(fixture(self.obj_file), storage="numpy").vertices
+
+    def testPoints(self):
+        """Points should be the same as the vertices of a regular parse"""
+        self.assertEqual(self.points.dtype, numpy.float32)
+        self.assertEqual(self.points.shape, (len(self.expected), self.width))
+        self.assertEqual(self.points.tolist(), self.expected.tolist())
+
+
+@unittest.skipIf(numpy is None, "numpy is not installed")
+class TestPointCloudColors(TestPointCloud):
+    obj_file = 'points_colors.obj'
+    width = 6
+
+
+class TestPointCloudSmallChunks(TestPointCloud):
+    """Lines split across chunks"""
+
+    def setUp(self):
+        with mock.patch('pywavefront.pointcloud.PointCloudParser.chunk_size', new=16):
+            super(TestPointCloudSmallChunks, self).setUp()
+
+
+class TestPointCloudColorsSmallChunks(TestPointCloudColors):
+
+    def setUp(self):
+        with mock.patch('pywavefront.pointcloud.PointCloudParser.chunk_size', new=16):
+            super(TestPointCloudColorsSmallChunks, self).setUp()
+
+
+@unittest.skipIf(numpy is None, "numpy is not installed")
+class TestPointCloudFailure(unittest.TestCase):
+
+    def testFaces(self):
+        """Files with faces are not point clouds"""
+        with self.assertRaises(PywavefrontException):
+            pywavefront.load_point_cloud(fixture('simple.obj'))
+
+    def testMissingColors(self):
+        """Every point needs colors when the first point has them"""
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            path = Path(tmp_dir, 'points.obj')
+            path.write_text("v 1 2 3 1 1 1\nv 4 5 6\n")
+            with self.assertRaises(PywavefrontException):
+                pywavefront.load_point_cloud(path)
+
+
+@unittest.skipIf(numpy is None, "numpy is not installed")
+class TestPointCloudCache(unittest.TestCase):
+    cache_format = "gzip"
+
+    def setUp(self):
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        shutil.copy(str(fixture('points_colors.obj')), self.tmp_dir.name)
+        self.path = Path(self.tmp_dir.name, 'points_colors.obj')
+
+    def tearDown(self):
+        self.tmp_dir.cleanup()
+
+    def load(self):
+        parser = PointCloudParser(self.path, cache=True, cache_format=self.cache_format)
+        return parser, parser.parse()
+
+    def testLoad(self):
+        parser_pre, points_pre = self.load()
+        parser_post, points_post = self.load()
+
+        self.assertFalse(parser_pre.cache_loaded)
+        self.assertTrue(parser_post.cache_loaded)
+        self.assertEqual(points_post.shape, (4, 6))
+        self.assertEqual(points_pre.tolist(), points_post.tolist())
+
+    def testWavefrontCache(self):
+        """Caches of a regular parse should not be loaded as point clouds"""
+        pywavefront.Wavefront(self.path, cache=True, cache_format=self.cache_format)
+        parser, _ = self.load()
+        self.assertFalse(parser.cache_loaded)
+
+
+class TestPointCloudRawCache(TestPointCloudCache):
+    cache_format = "raw"
@@ -0,0 +1,48 @@
+import unittest
+
+import mock
+
+from pywavefront.polygons import Polygons
+from pywavefront.storage import numpy
+
+
+class TestPolygons(unittest.TestCase):
+
+    def setUp(self):
+        self.polygons = Polygons()
+        for face in ([0, 1, 2], [2, 3, 4, 5], [6, 7], [8, 9, 10, 11, 12]):
+            self.polygons.add(face)
+
+    def testLayout(self):
+        self.assertEqual(len(self.polygons), 4)
+        self.assertEqual(list(self.polygons.indices), [0, 1, 2, 2, 3, 4, 5, 6, 7, 8, 9, 10, 11, 12])
+        self.assertEqual(list(self.polygons.offsets), [0, 3, 7, 9, 14])
+        self.assertEqual(self.polygons.indices.itemsize, 4)
+
+    def testFaces(self):
+        self.assertEqual(self.polygons[1], [2, 3, 4, 5])
+        self.assertEqual(self.polygons[-1], [8, 9, 10, 11, 12])
+        self.assertEqual(self.polygons.sizes(), [3, 4, 2, 5])
+        with self.assertRaises(IndexError):
+            self.polygons[4]
+
+    def testTrianglesList(self):
+        """Faces with less than three vertices are skipped"""
+        expected = [[0, 1, 2], [2, 3, 4], [5, 2, 4], [8, 9, 10], [11, 8, 10], [12, 8, 11]]
+        with mock.patch('pywavefront.polygons.numpy', new=None):
+            self.assertEqual(self.polygons.triangles(), expected)
+        self.assertEqual(self.polygons.triangle_count(), len(expected))
+
+    @unittest.skipIf(numpy is None, "numpy is not installed")
+    def testTrianglesNumpy(self):
+        with mock.patch('pywavefront.polygons.numpy', new=None):
+            expected = self.polygons.triangles()
+
+        triangles = self.polygons.triangles()
+        self.assertEqual(triangles.shape, (6, 3))
+        self.assertEqual(triangles.dtype, numpy.int32)
+        self.assertEqual(triangles.tolist(), expected)
+
+    @unittest.skipIf(numpy is None, "numpy is not installed")
+    def testEmpty(self):
+        self.assertEqual(Polygons().triangles().shape, (0, 3))
@@ -0,0 +1,88 @@
+import shutil
+import tempfile
+import unittest
+from pathlib import Path
+
+import pywavefront
+from pywavefront.stats import ParseStats, UNKNOWN
+from utils import fixture
+
+
+class TestParseStats(unittest.TestCase):
+
+    def setUp(self):
+        self.scene = pywavefront.Wavefront(fixture('simple.obj'), stats=True)
+        self.stats = self.scene.parse_stats
+
+    def testStatements(self):
+        """Lines of every statement type should be counted"""
+        lines = {name: stats.lines for name, stats in self.stats.statements.items()}
+        self.assertEqual(lines, {'mtllib': 1, 'o': 2, 'v': 8, 'vt': 8, 'vn': 2, 'usemtl': 2, 'f': 2})
+
+    def testTimes(self):
+        self.assertGreater(self.stats.total_time, 0)
+        self.assertGreater(self.stats.parse_time, 0)
+        self.assertAlmostEqual(self.stats.parse_time, sum(s.time for s in self.stats.statements.values()))
+        self.assertLessEqual(self.stats.parse_time + self.stats.io_time, self.stats.total_time)
+        self.assertEqual(self.stats.bytes_read, fixture('simple.obj').stat().st_size)
+        self.assertFalse(self.stats.cache_loaded)
+
+    def testAsDict(self):
+        values = self.stats.as_dict()
+        self.assertEqual(values['statements']['v'], {'lines': 8, 'time': self.stats.statements['v'].time})
+        self.assertEqual(values['bytes_read'], self.stats.bytes_read)
+
+    def testDisabled(self):
+        """Stats should only be recorded when enabled"""
+        self.assertIsNone(pywavefront.Wavefront(fixture('simple.obj')).parse_stats)
+
+    def testUnknown(self):
+        """Statements without a parse method should be recorded as unknown"""
+        stats = pywavefront.Wavefront(fixture('simple_elements.obj'), stats=True).parse_stats
+        self.assertEqual(stats.statements[UNKNOWN].lines, 2)
+        self.assertEqual(stats.statements['s'].lines, 2)
+
+    def testSkipped(self):
+        """Lines of attributes that are not parsed should be counted"""
+        stats = pywavefront.Wavefront(fixture('simple.obj'), stats=True, attributes=("position",)).parse_stats
+        self.assertEqual(stats.statements['vt'].lines, 8)
+        self.assertEqual(stats.statements['vn'].lines, 2)
+        self.assertEqual(stats.statements['vt'].time, 0)
+
+    def testInvalidOptions(self):
+        """Stats are only recorded when the file is parsed by the parser itself"""
+        with self.assertRaises(ValueError):
+            pywavefront.Wavefront(fixture('simple.obj'), stats=True, workers=2)
+        with self.assertRaises(ValueError):
+            pywavefront.Wavefront(fixture('simple.obj'), stats_hook=print, lazy=True)
+
+    def testHook(self):
+        """The hook should be called once with the stats"""
+        calls = []
+        scene = pywavefront.Wavefront(fixture('simple.obj'), stats_hook=calls.append)
+        self.assertEqual(calls, [scene.parse_stats])
+        self.assertIsInstance(calls[0], ParseStats)
+
+
+class TestParseStatsCache(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        for name in ('simple.obj', 'simple.mtl'):
+            shutil.copy(str(fixture(name)), self.tmp_dir.name)
+        self.path = Path(self.tmp_dir.name, 'simple.obj')
+
+    def tearDown(self):
+        self.tmp_dir.cleanup()
+
+    def testCache(self):
+        """Cache writes and loads should be timed"""
+        written = pywavefront.Wavefront(self.path, cache=True, stats=True).parse_stats
+        self.assertGreater(written.cache_write_time, 0)
+        self.assertFalse(written.cache_loaded)
+
+        loaded = pywavefront.Wavefront(self.path, cache=True, stats=True).parse_stats
+        self.assertTrue(loaded.cache_loaded)
+        self.assertGreater(loaded.cache_load_time, 0)
+        self.assertEqual(loaded.statements, {})
+        self.assertEqual(loaded.bytes_read, Path(self.tmp_dir.name, 'simple.obj.bin').stat().st_size)
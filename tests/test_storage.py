@@ -0,0 +1,167 @@
+import array
+import ctypes
+import unittest
+
+import pywavefront
+from pywavefront.exceptions import PywavefrontException
+from pywavefront.storage import numpy, as_ctypes_array, as_float_matrix, ArrayBuilder
+
+from utils import fixture
+
+
+@unittest.skipIf(numpy is None, "numpy is not installed")
+class TestNumpyStorage(unittest.TestCase):
+    obj_file = 'simple.obj'
+
+    def setUp(self):
+        self.scene_list = pywavefront.Wavefront(fixture(self.obj_file))
+        self.scene = pywavefront.Wavefront(fixture(self.obj_file), storage="numpy")
+
+    def test_vertices(self):
+        vertices = self.scene.vertices
+        self.assertIsInstance(vertices, numpy.ndarray)
+        self.assertEqual(vertices.dtype, numpy.float32)
+        self.assertTrue(vertices.flags['C_CONTIGUOUS'])
+        self.assertEqual(vertices.shape, (len(self.scene_list.vertices), len(self.scene_list.vertices[0])))
+        numpy.testing.assert_allclose(vertices, self.scene_list.vertices, rtol=1e-6)
+
+    def test_normals_and_tex_coords(self):
+        self.assertEqual(self.scene.parser.normals.dtype, numpy.float32)
+        self.assertEqual(self.scene.parser.normals.shape, (2, 3))
+        self.assertEqual(self.scene.parser.tex_coords.dtype, numpy.float32)
+        self.assertEqual(self.scene.parser.tex_coords.shape, (8, 2))
+
+    def test_material_vertices(self):
+        for name, material in self.scene.materials.items():
+            self.assertIsInstance(material.vertices, numpy.ndarray)
+            self.assertEqual(material.vertices.dtype, numpy.float32)
+            self.assertEqual(material.vertices.ndim, 1)
+            numpy.testing.assert_allclose(
+                material.vertices, self.scene_list.materials[name].vertices, rtol=1e-6)
+
+
+class TestNumpyStorageColors(TestNumpyStorage):
+    obj_file = 'simple_colors.obj'
+
+
+class TestArrayStorage(unittest.TestCase):
+    """Material data should be stored in float32 and uint32 arrays without numpy"""
+    obj_file = 'simple.obj'
+    indexed = False
+
+    def setUp(self):
+        self.scene_list = pywavefront.Wavefront(fixture(self.obj_file), indexed=self.indexed)
+        self.scene = pywavefront.Wavefront(fixture(self.obj_file), storage="array", indexed=self.indexed)
+
+    def test_material_vertices(self):
+        for name, material in self.scene.materials.items():
+            self.assertIsInstance(material.vertices, array.array)
+            self.assertEqual(material.vertices.typecode, 'f')
+            self.assertEqual(material.vertices, array.array('f', self.scene_list.materials[name].vertices))
+
+    def test_material_indices(self):
+        for name, material in self.scene.materials.items():
+            self.assertIsInstance(material.indices, array.array)
+            self.assertEqual(material.indices.typecode, 'I')
+            self.assertEqual(list(material.indices), self.scene_list.materials[name].indices)
+
+    def test_buffer_protocol(self):
+        material = self.scene.materials['Material.simple']
+        view = memoryview(material.vertices)
+        self.assertEqual(view.format, 'f')
+        self.assertEqual(view.nbytes, len(material.vertices) * 4)
+
+    def test_iter_meshes(self):
+        for mesh in pywavefront.iter_meshes(fixture(self.obj_file), storage="array", indexed=self.indexed):
+            for material in mesh.materials:
+                self.assertIsInstance(material.vertices, array.array)
+
+
+class TestArrayStorageColors(TestArrayStorage):
+    obj_file = 'simple_colors.obj'
+
+
+class TestArrayStorageIndexed(TestArrayStorage):
+    obj_file = 'arbitrary-faces.obj'
+    indexed = True
+
+    def setUp(self):
+        self.scene_list = pywavefront.Wavefront(fixture(self.obj_file), indexed=True, create_materials=True)
+        self.scene = pywavefront.Wavefront(fixture(self.obj_file), storage="array", indexed=True,
+                                           create_materials=True)
+
+    def test_buffer_protocol(self):
+        for material in self.scene.materials.values():
+            self.assertEqual(memoryview(material.indices).format, 'I')
+
+    def test_iter_meshes(self):
+        pass
+
+
+@unittest.skipIf(numpy is None, "numpy is not installed")
+class TestArrayStorageParallel(TestArrayStorage):
+
+    def setUp(self):
+        self.scene_list = pywavefront.Wavefront(fixture(self.obj_file))
+        self.scene = pywavefront.Wavefront(fixture(self.obj_file), storage="array", workers=2)
+
+
+class TestStorageArguments(unittest.TestCase):
+
+    def test_default_is_list(self):
+        scene = pywavefront.Wavefront(fixture('simple.obj'))
+        self.assertIsInstance(scene.vertices, list)
+
+    def test_unknown_storage(self):
+        with self.assertRaises(ValueError):
+            pywavefront.Wavefront(fixture('simple.obj'), storage="tuple")
+
+    def test_ctypes_array_shared(self):
+        """Buffers of the same item type should be shared instead of copied"""
+        values = array.array('f', [1.0, 2.0, 3.0])
+        result = as_ctypes_array(ctypes.c_float, 'f', values)
+        values[0] = 5.0
+        self.assertEqual(list(result), [5.0, 2.0, 3.0])
+
+    def test_ctypes_array_copied(self):
+        self.assertEqual(list(as_ctypes_array(ctypes.c_float, 'f', [1.0, 2.0])), [1.0, 2.0])
+        self.assertEqual(list(as_ctypes_array(ctypes.c_float, 'f', array.array('d', [1.0, 2.0]))), [1.0, 2.0])
+        read_only = memoryview(array.array('f', [1.0, 2.0]).tobytes()).cast('f')
+        self.assertEqual(list(as_ctypes_array(ctypes.c_float, 'f', read_only)), [1.0, 2.0])
+
+    @unittest.skipIf(numpy is None, "numpy is not installed")
+    def test_mixed_row_sizes(self):
+        with self.assertRaises(PywavefrontException):
+            as_float_matrix([(1.0, 2.0, 3.0), (1.0, 2.0, 3.0, 1.0, 1.0, 1.0)], 3)
+
+    @unittest.skipIf(numpy is None, "numpy is not installed")
+    def test_builder_row(self):
+        """Rows should be found in any block without syncing them as lists"""
+        builder = ArrayBuilder(3)
+        builder.append(numpy.arange(6, dtype=numpy.float32).reshape(2, 3))
+        builder.append(numpy.arange(6, 15, dtype=numpy.float32).reshape(3, 3))
+        self.assertEqual(builder.row(3).tolist(), [9.0, 10.0, 11.0])
+        self.assertEqual(builder.row(-1).tolist(), [12.0, 13.0, 14.0])
+        with self.assertRaises(IndexError):
+            builder.row(5)
+
+        builder.array()
+        self.assertEqual(builder.row(3).tolist(), [9.0, 10.0, 11.0])
+
+    @unittest.skipIf(numpy is None, "numpy is not installed")
+    def test_builder_take(self):
+        """Rows of index arrays should be gathered across blocks in index order"""
+        builder = ArrayBuilder(3)
+        builder.append(numpy.arange(6, dtype=numpy.float32).reshape(2, 3))
+        builder.append(numpy.arange(6, 15, dtype=numpy.float32).reshape(3, 3))
+        rows = builder[numpy.array([4, 0, 2, -4])]
+        self.assertEqual(rows.dtype, numpy.float32)
+        self.assertEqual(rows.tolist(), [[12.0, 13.0, 14.0], [0.0, 1.0, 2.0], [6.0, 7.0, 8.0], [3.0, 4.0, 5.0]])
+        self.assertEqual(builder[numpy.int64(1)].tolist(), [3.0, 4.0, 5.0])
+        self.assertEqual(builder.take([]).shape, (0, 3))
+        with self.assertRaises(IndexError):
+            builder.take([5])
+
+        builder.append(numpy.zeros((1, 6), dtype=numpy.float32))
+        with self.assertRaises(PywavefrontException):
+            builder.take([0, 5])
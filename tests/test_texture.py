@@ -1,7 +1,11 @@
 import unittest
 import os
+import shutil
+import tempfile
 from pathlib import Path
 
+from mock import patch
+
 import pywavefront.texture
 import utils
 
@@ -74,3 +78,71 @@ class TestTexture(unittest.TestCase):
         self.assertEqual(opts.s, (1.0, 1.0, 1.0))
         self.assertEqual(opts.t, (0.0, 0.0, 0.0))
         self.assertEqual(opts.texres, '1024')
+
+
+class TestTextureResolver(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.root = Path(self.tmp_dir.name)
+        (self.root / 'textures' / 'wood').mkdir(parents=True)
+        shutil.copy(str(utils.fixture('4x4.png')), str(self.root / 'textures' / 'wood' / 'Oak.png'))
+        self.resolver = pywavefront.texture.TextureResolver()
+
+    def tearDown(self):
+        self.tmp_dir.cleanup()
+
+    def texture(self, name):
+        texture = pywavefront.texture.Texture(name, search_path=self.root)
+        texture.resolver = self.resolver
+        return texture
+
+    def testSubdirectory(self):
+        """Textures should be found in subdirectories of the search path"""
+        texture = self.texture('C:\\assets\\Oak.png')
+        self.assertEqual(texture.find(), str(self.root / 'textures' / 'wood' / 'Oak.png'))
+
+    def testCaseInsensitive(self):
+        texture = self.texture('oak.PNG')
+        with self.assertRaises(FileNotFoundError):
+            texture.find()
+        self.assertEqual(texture.find(case_sensitive=False), str(self.root / 'textures' / 'wood' / 'Oak.png'))
+
+    def testRelativeSearchPath(self):
+        """Textures found in a relative search path should have a path starting with the search path"""
+        search_path = os.path.relpath(str(self.root))
+        texture = pywavefront.texture.Texture('Oak.png', search_path=search_path)
+        texture.resolver = self.resolver
+        self.assertEqual(texture.find(), str(Path(search_path, 'textures', 'wood', 'Oak.png')))
+
+    def testMaxIndexes(self):
+        """The least recently used index should be removed"""
+        resolver = pywavefront.texture.TextureResolver(max_indexes=1)
+        self.assertEqual(resolver.find(self.root, 'Oak.png'), str(self.root / 'textures' / 'wood' / 'Oak.png'))
+        self.assertIsNone(resolver.find(self.root / 'textures' / 'missing', 'Oak.png'))
+        self.assertEqual(len(resolver), 1)
+
+        with self.assertRaises(ValueError):
+            pywavefront.texture.TextureResolver(max_indexes=0)
+
+    def testIndexShared(self):
+        """The search path should only be walked once for all textures"""
+        with patch('pywavefront.texture.os.walk', side_effect=os.walk) as walk:
+            self.texture('Oak.png').find()
+            self.texture('textures/Oak.png').find()
+        self.assertEqual(walk.call_count, 1)
+
+    def testInvalidation(self):
+        """Files added after the index was built should be found"""
+        with self.assertRaises(FileNotFoundError):
+            self.texture('Pine.png').find()
+
+        shutil.copy(str(utils.fixture('4x4.png')), str(self.root / 'textures' / 'wood' / 'Pine.png'))
+        self.assertEqual(self.texture('Pine.png').find(), str(self.root / 'textures' / 'wood' / 'Pine.png'))
+
+    def testRemoved(self):
+        """Files removed after the index was built should not be returned"""
+        self.texture('Oak.png').find()
+        os.remove(str(self.root / 'textures' / 'wood' / 'Oak.png'))
+        with self.assertRaises(FileNotFoundError):
+            self.texture('Oak.png').find()
@@ -1,6 +1,8 @@
 import os
 import unittest
 
+import mock
+
 import pywavefront
 from utils import fixture
 
@@ -80,4 +82,54 @@ class TestExtraSpace(TestWavefront):
         # reset the obj file to new file with no mtl line
         self.mesh_names = ['Simple', 'SimpleB']
         self.material_names = ['Material.simple', 'Material2.simple']
-        self.meshes = pywavefront.Wavefront(fixture('simple_extra_empty_lines.obj'))
\ No newline at end of file
+        self.meshes = pywavefront.Wavefront(fixture('simple_extra_empty_lines.obj'))
+
+
+class TestIterMeshes(unittest.TestCase):
+    """Meshes should be yielded one at a time with their own vertex data"""
+
+    def testMeshes(self):
+        scene = pywavefront.Wavefront(fixture('simple.obj'))
+        meshes = list(pywavefront.iter_meshes(fixture('simple.obj')))
+
+        self.assertEqual([m.name for m in meshes], ['Simple', 'SimpleB'])
+        for mesh, expected in zip(meshes, scene.mesh_list):
+            self.assertEqual([m.name for m in mesh.materials], [m.name for m in expected.materials])
+            self.assertEqual(mesh.materials[0].vertices, expected.materials[0].vertices)
+            self.assertEqual(mesh.materials[0].vertex_format, expected.materials[0].vertex_format)
+
+    def testNoObject(self):
+        """Files without o statement should yield the mesh created by their faces"""
+        scene = pywavefront.Wavefront(fixture('simple_no_object_no_mtl.obj'))
+        meshes = list(pywavefront.iter_meshes(fixture('simple_no_object_no_mtl.obj')))
+
+        self.assertEqual(len(meshes), 1)
+        self.assertEqual(meshes[0].name, scene.mesh_list[0].name)
+        self.assertEqual(meshes[0].materials[0].vertices, scene.mesh_list[0].materials[0].vertices)
+
+    @mock.patch('pywavefront.obj.ObjParser.face_batch_size', new=1)
+    def testEndsInFaces(self):
+        """The last mesh should be yielded once when the file ends in a run of faces"""
+        meshes = list(pywavefront.iter_meshes(fixture('simple_no_object_no_mtl.obj')))
+        self.assertEqual(len(meshes), 1)
+        self.assertEqual(len(meshes[0].materials[0].vertices), 48)
+
+    def testSharedMaterial(self):
+        """Meshes using the same material should only get their own vertices"""
+        meshes = pywavefront.iter_meshes(fixture('simple_no_mtl.obj'))
+        first = next(meshes)
+        self.assertEqual(first.name, 'SimpleB')
+        self.assertEqual(len(first.materials[0].vertices), 24)
+
+        second = next(meshes)
+        self.assertEqual(second.name, 'Simple')
+        self.assertEqual(len(second.materials[0].vertices), 24)
+        self.assertEqual(len(first.materials[0].vertices), 24)
+        self.assertIsNot(first.materials[0], second.materials[0])
+
+        self.assertEqual(list(meshes), [])
+
+    def testCollectFaces(self):
+        scene = pywavefront.Wavefront(fixture('arbitrary-faces.obj'), collect_faces=True)
+        meshes = pywavefront.iter_meshes(fixture('arbitrary-faces.obj'), collect_faces=True)
+        self.assertEqual([m.faces for m in meshes], [m.faces for m in scene.mesh_list])